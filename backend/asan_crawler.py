@@ -1,9 +1,7 @@
 # === 1. 라이브러리 임포트 ===
 # 필요한 외부 기능들을 가져오는 부분
 
-import time  # 시간 관련 함수를 사용하기 위함 (예: time.sleep()으로 잠시 멈춤)
 import pandas as pd  # 데이터 분석 라이브러리. 여기서는 CSV 저장을 위함
-import json # JSON(JavaScript Object Notation) 형식의 데이터를 다루기 위함 (파일 저장/로드)
 from selenium import webdriver  # 웹 브라우저 자동화를 위한 핵심 라이브러리
 from selenium.webdriver.chrome.service import Service  # ChromeDriver 실행을 관리
 from selenium.webdriver.common.by import By  # HTML 요소를 찾는 방법(ID, CSS 선택자 등)을 지정
@@ -11,8 +9,22 @@ from selenium.webdriver.support.ui import WebDriverWait  # 웹 드라이버가 
 from selenium.webdriver.support import expected_conditions as EC  # WebDriverWait와 함께 사용되는 조건들
 from webdriver_manager.chrome import ChromeDriverManager  # ChromeDriver를 자동으로 관리(설치/업데이트)
 from bs4 import BeautifulSoup  # HTML/XML 문서에서 데이터를 추출(파싱)하기 쉽게 만듦
-import re  # 정규 표현식(문자열 패턴 검색/치환)을 사용하기 위함
 import traceback  # 예외(에러) 발생 시 상세한 호출 스택 정보를 얻기 위함
+import os  # 환경변수 / 파일 경로 처리
+import shutil  # 체크포인트 폴더 삭제 (--fresh)
+import argparse  # 명령행 옵션 처리
+import functools  # 작업 함수에 fetcher 묶기
+from crawl_scheduler import CrawlScheduler, CrawlCheckpoint, HostRateLimiter, CRAWL_WORKERS, CRAWL_MIN_INTERVAL  # 병렬 크롤링 + 체크포인트
+from fetchers import HttpDetailFetcher, extract_detail_text, CRAWL_FETCHER  # 브라우저 없이 상세 페이지 받기
+from crawl_state import CrawlState, CRAWL_STATE_PATH, corpus_documents, write_delta  # 조건부 재크롤링 + delta 기록
+from corpus_io import write_corpus, CORPUS_PATH  # JSONL 코퍼스 저장
+
+# 크롤링 대상 사이트 주소 (오프라인 테스트 시 bench/fixture_server.py 주소로 바꿔서 사용)
+SITE_ROOT = os.getenv("AMC_SITE_ROOT", "https://www.amc.seoul.kr")
+CHECKPOINT_DIR = "crawl_checkpoint"  # 진행 상황 저장 폴더
+OUTPUT_FILENAME = CORPUS_PATH  # 한 줄에 문서 하나 (JSONL)
+DELTA_FILENAME = "amc_health_info_delta.jsonl"  # 이전 실행 대비 추가/변경/삭제된 문서만
+FAILED_CONTENTS = ("Content not found.", "Error fetching content.")  # crawl_detail_page 실패 시 반환값
 
 # === 2. 상세 페이지 내용 크롤링 함수: crawl_detail_page ===
 # 이 함수는 하나의 상세 정보 페이지 URL을 받아 해당 페이지의 본문 내용을 추출함
@@ -38,25 +50,9 @@ def crawl_detail_page(detail_url, driver):
             print(f"    Fallback: Waiting for {content_container_selector}") # 대체 시도 알림
             wait.until(EC.presence_of_element_located((By.CSS_SELECTOR, content_container_selector)))
 
-        # 4. 현재 페이지의 HTML 소스 가져오기
-        detail_page_source = driver.page_source
-        # 5. BeautifulSoup으로 HTML 파싱
-        detail_soup = BeautifulSoup(detail_page_source, 'html.parser')
-        # 6. 파싱된 HTML에서 내용 컨테이너 요소 찾기
-        content_div = detail_soup.select_one(content_container_selector)
-        
-        if content_div: # 내용 컨테이너를 찾았다면
-            # 7. (선택적) 불필요한 내부 요소 제거: 예시로 LNB(좌측 내비게이션 바) 제거
-            #    실제 상세 페이지 구조를 보고 RAG에 불필요한 부분을 제거하면 내용이 깔끔해짐
-            lnb_div = content_div.select_one("div#lnb") 
-            if lnb_div:
-                lnb_div.decompose() # 해당 요소를 DOM 트리에서 제거
-
-            # 8. 내용 텍스트 추출 및 정제
-            #    get_text(): 모든 텍스트 추출, separator='\n'은 태그 사이에 줄바꿈 추가, strip=True는 앞뒤 공백 제거
-            raw_text = content_div.get_text(separator='\n', strip=True)
-            #    re.sub(): 정규 표현식으로 불필요한 연속 줄바꿈을 하나로 합치고, 전체 텍스트의 앞뒤 공백 제거
-            cleaned_text = re.sub(r'\n\s*\n', '\n', raw_text).strip()
+        # 4. 현재 페이지의 HTML 소스에서 본문 추출 (HTTP fetcher와 같은 추출 함수 사용)
+        cleaned_text = extract_detail_text(driver.page_source)
+        if cleaned_text: # 내용 컨테이너를 찾았다면
             return cleaned_text # 정제된 텍스트 반환
         else: # 내용 컨테이너를 못 찾았다면
             print(f"  Could not find content div ({content_container_selector}) on: {detail_url}")
@@ -66,18 +62,15 @@ def crawl_detail_page(detail_url, driver):
         print(f"  Error crawling detail page {detail_url}: {e}")
         return "Error fetching content." # 에러 메시지 반환
 
-# === 3. 메인 크롤링 함수: crawl_amc_health_info ===
-# 특정 부위(partId)의 목록 페이지부터 시작하여 각 항목의 상세 정보까지 크롤링합니다.
+# === 3. 목록 수집 / 상세 크롤링 함수 ===
+# 목록 페이지(partId별)에서 상세 페이지 링크를 모으고, 상세 페이지들은 워커 풀에서 병렬로 크롤링합니다.
 # category_name은 JSON 메타데이터에 저장될 카테고리 이름입니다.
 
-def crawl_amc_health_info(part_id="B000020", category_name="가슴"):
-    # 1. 크롤링 대상 URL 설정
-    base_url = "https://www.amc.seoul.kr/asan/healthinfo/management/managementList.do"
-    target_url = f"{base_url}?partId={part_id}#" # #은 페이지 내 특정 위치로 이동하는 것을 의미하지만, 여기서는 큰 영향 없음
-
+def create_driver():
     # 2. Selenium WebDriver 옵션 설정
     options = webdriver.ChromeOptions()
-    # options.add_argument("--headless") # 브라우저 창 없이 백그라운드 실행 (테스트 완료 후 사용)
+    if os.getenv("CRAWL_HEADLESS", "0") == "1": # 브라우저 창 없이 백그라운드 실행 (워커가 여러 개일 때 권장)
+        options.add_argument("--headless")
     options.add_argument("--no-sandbox") # 리눅스/Docker 환경에서 headless 사용 시 필요
     options.add_argument("--disable-dev-shm-usage") # 리눅스/Docker 환경에서 /dev/shm 파티션 관련 문제 방지
     options.add_argument("window-size=1920,1080") # 브라우저 창 크기 (headless에서도 영향 줄 수 있음)
@@ -88,17 +81,31 @@ def crawl_amc_health_info(part_id="B000020", category_name="가슴"):
     # 3. WebDriver 인스턴스 생성
     #    ChromeDriverManager().install(): ChromeDriver 자동 다운로드 및 경로 설정
     service = Service(ChromeDriverManager().install())
-    driver = webdriver.Chrome(service=service, options=options)
+    return webdriver.Chrome(service=service, options=options)
+
+
+def click_and_wait_for_next_page(driver, link, target_url, rate_limiter):
+    # 고정 sleep 대신: 요청 간격을 지킨 뒤 클릭하고, 기존 목록이 교체될 때까지 기다림
+    first_item = driver.find_element(By.CSS_SELECTOR, "div.listTypeSec6 ul.descBoxBody > li")
+    rate_limiter.wait(target_url)
+    driver.execute_script("arguments[0].click();", link) # JavaScript로 클릭
+    WebDriverWait(driver, 30).until(EC.staleness_of(first_item)) # 페이지 로드 대기
+
+
+def collect_list_items(driver, part_id, category_name, rate_limiter):
+    # 1. 크롤링 대상 URL 설정
+    base_url = f"{SITE_ROOT}/asan/healthinfo/management/managementList.do"
+    target_url = f"{base_url}?partId={part_id}#" # #은 페이지 내 특정 위치로 이동하는 것을 의미하지만, 여기서는 큰 영향 없음
 
-    rag_documents = [] # RAG 형식으로 변환된 최종 데이터를 담을 리스트
     list_items_to_process = [] # 목록에서 수집한 임시 데이터(제목, 링크)를 담을 리스트
     current_page = 1 # 현재 처리 중인 목록 페이지 번호
 
     print(f"Target URL: {target_url}")
     print(f"Crawling Part ID: {part_id} (Category: {category_name})")
 
-    try: # 전체 크롤링 과정을 try-except로 감싸 예외 처리
+    try: # 목록 수집 과정을 try-except로 감싸 예외 처리
         # 4. 목록 페이지의 첫 페이지로 이동
+        rate_limiter.wait(target_url) # 호스트별 요청 간격 지키기
         driver.get(target_url)
         # WebDriverWait 객체 생성: 목록 페이지 요소 로드를 위해 최대 30초 기다림
         list_wait = WebDriverWait(driver, 30) 
@@ -122,8 +129,7 @@ def crawl_amc_health_info(part_id="B000020", category_name="가슴"):
                 print(f"  Saved debug page source to debug_list_page_timeout_part_{part_id}_page_{current_page}.html")
                 if current_page == 1: # 첫 페이지 로드 실패 시
                     print("  Failed to load content on the first page. Aborting.")
-                    driver.quit() # 드라이버 종료
-                    return [] # 빈 리스트 반환하고 함수 종료
+                    return [] # 빈 리스트 반환하고 함수 종료 (드라이버는 스케줄러가 종료)
                 break # 현재 페이지 처리 실패, 목록 수집 중단
 
             if not page_loaded_successfully: # (이중 안전장치)
@@ -154,7 +160,7 @@ def crawl_amc_health_info(part_id="B000020", category_name="가슴"):
                     detail_page_link = title_anchor.get("href") # 상세 페이지 링크
                     # 상대 경로면 절대 경로로 변환
                     if detail_page_link and not detail_page_link.startswith("http"):
-                        detail_page_link = "https://www.amc.seoul.kr" + detail_page_link
+                        detail_page_link = SITE_ROOT + detail_page_link
                     
                     date_text = "N/A" # 이 페이지 목록에는 날짜 정보가 없으므로 N/A
 
@@ -188,18 +194,16 @@ def crawl_amc_health_info(part_id="B000020", category_name="가슴"):
                         # 비활성화된(disabled) 버튼은 클릭하지 않음
                         if not (link.get_attribute("class") and "disabled" in link.get_attribute("class")):
                             print(f"  Clicking '다음' button/link.")
-                            driver.execute_script("arguments[0].click();", link) # JavaScript로 클릭
+                            click_and_wait_for_next_page(driver, link, target_url, rate_limiter) # JavaScript로 클릭
                             current_page += 1 # 현재 처리 중인 페이지 번호 (단순 카운터)
-                            time.sleep(2.5) # 페이지 로드 대기
                             found_and_clicked_next_page = True
                             break # 다음 페이지로 갔으므로 내부 for 루프 탈출
                     # "다음" 버튼 없으면, 현재 페이지 번호보다 큰 숫자 페이지 링크 찾기
                     elif link_text.isdigit(): # 링크 텍스트가 숫자인지 확인
                         if int(link_text) > int(current_page_number_text):
                             print(f"  Clicking next page number link: {link_text}")
-                            driver.execute_script("arguments[0].click();", link)
+                            click_and_wait_for_next_page(driver, link, target_url, rate_limiter)
                             current_page += 1
-                            time.sleep(2.5)
                             found_and_clicked_next_page = True
                             break
                 
@@ -210,56 +214,163 @@ def crawl_amc_health_info(part_id="B000020", category_name="가슴"):
             except Exception as e_page: # 페이지네이션 중 에러 발생 시
                 print(f"  Reached the end of list pages or 'next' button/link issue on page {current_page}. Error: {e_page}")
                 break # while 루프 탈출
-        
-        # --- 2단계: 수집된 링크들의 상세 페이지 방문 및 RAG 형식으로 저장 ---
-        print(f"\nCollected {len(list_items_to_process)} item links in total. Now fetching details for RAG...")
-        # 임시 저장된 각 항목에 대해 반복
-        for i, info_item in enumerate(list_items_to_process):
-            print(f"Processing detail for RAG item {i+1}/{len(list_items_to_process)}: {info_item['list_title'][:50]}")
-            # 상세 페이지 링크 유효성 검사
-            if info_item["detail_page_link"] and info_item["detail_page_link"].startswith("http"):
-                # 상세 페이지 내용 크롤링 함수 호출
-                detail_content = crawl_detail_page(info_item["detail_page_link"], driver)
-                
-                # RAG 형식의 JSON 객체 생성
-                rag_document = {
-                    "content": detail_content if detail_content else "Content not found or error fetching.", # 상세 내용
-                    "metadata": { # 메타데이터
-                        "title": info_item["list_title"], # 제목
-                        "source_url": info_item["detail_page_link"], # 출처 URL
-                        "category": category_name, # 카테고리 이름 (함수 파라미터로 받음)
-                        "publish_date": info_item["list_date"] # 날짜 (현재는 "N/A")
-                    }
-                }
-                rag_documents.append(rag_document) # 최종 리스트에 추가
-                time.sleep(1.2) # 서버 부하 감소를 위해 잠시 대기
-            else: # 링크가 유효하지 않으면
-                print(f"  Skipping RAG item with invalid or missing detail_page_link: {info_item['list_title']}")
-                # 빈 내용으로 RAG 문서 구조만 유지하며 추가
-                rag_documents.append({
-                    "content": "Detail link was invalid or missing.",
-                    "metadata": {
-                        "title": info_item["list_title"],
-                        "source_url": info_item["detail_page_link"] if info_item["detail_page_link"] else "N/A",
-                        "category": category_name,
-                        "publish_date": info_item["list_date"]
-                    }
-                })
-            
-    except Exception as e_main: # 메인 크롤링 과정에서 예측 못한 에러 발생 시
-        print(f"An critical error occurred during crawling process: {e_main}")
+    except Exception as e_main: # 목록 수집 과정에서 예측 못한 에러 발생 시
+        print(f"An critical error occurred while collecting list pages: {e_main}")
         traceback.print_exc() # 에러 상세 정보 출력
-    finally: # try 블록이 끝나거나 에러로 빠져나갈 때 항상 실행
-        print("Quitting WebDriver.")
-        driver.quit() # WebDriver 종료 (브라우저 닫기)
 
-    return rag_documents # 최종 수집된 RAG 문서 리스트 반환
+    print(f"Collected {len(list_items_to_process)} item links for '{category_name}'.")
+    return list_items_to_process
+
+
+def make_rag_document(info_item, category_name, detail_content):
+    # RAG 형식의 JSON 객체 생성
+    return {
+        "content": detail_content if detail_content else "Content not found or error fetching.", # 상세 내용
+        "metadata": { # 메타데이터
+            "title": info_item["list_title"], # 제목
+            "source_url": info_item["detail_page_link"] if info_item["detail_page_link"] else "N/A", # 출처 URL
+            "category": category_name, # 카테고리 이름
+            "publish_date": info_item["list_date"] # 날짜 (현재는 "N/A")
+        }
+    }
+
+
+# --- 스케줄러 작업 함수 (워커 스레드에서 실행) ---
+
+def list_task(category_info, scheduler):
+    return collect_list_items(scheduler.get_driver(), category_info["partId"], category_info["name"], scheduler.rate_limiter)
+
+
+def detail_task(task, scheduler, http_fetcher=None, state=None):
+    info_item, category_name = task
+    detail_url = info_item["detail_page_link"]
+    # 상세 페이지 링크 유효성 검사
+    if not (detail_url and detail_url.startswith("http")):
+        print(f"  Skipping RAG item with invalid or missing detail_page_link: {info_item['list_title']}")
+        # 빈 내용으로 RAG 문서 구조만 유지하며 추가
+        return make_rag_document(info_item, category_name, "Detail link was invalid or missing.")
+    scheduler.rate_limiter.wait(detail_url) # 서버 부하 감소를 위해 호스트별 간격 유지
+    detail_content = None
+    fetch_info = {}
+    if http_fetcher: # HTTP로 먼저 시도 (브라우저 불필요)
+        previous = state.get(CrawlCheckpoint.document_key(category_name, detail_url)) if state else None
+        etag, last_modified = previous[:2] if previous else (None, None)
+        result = http_fetcher.fetch_conditional(detail_url, etag, last_modified)
+        if result["not_modified"]: # 304: 지난번에 받은 내용 그대로 사용
+            rag_document = make_rag_document(info_item, category_name, previous[2]["content"])
+            rag_document["fetch_info"] = {"etag": etag, "last_modified": last_modified, "not_modified": True}
+            return rag_document
+        detail_content = result["text"]
+        fetch_info = {"etag": result["etag"], "last_modified": result["last_modified"]}
+        if detail_content is None:
+            print(f"  HTTP fetch had no content, falling back to Selenium: {detail_url}")
+            scheduler.rate_limiter.wait(detail_url)
+    if detail_content is None:
+        # 상세 페이지 내용 크롤링 함수 호출 (JS가 필요한 페이지, 또는 --fetcher selenium)
+        detail_content = crawl_detail_page(detail_url, scheduler.get_driver())
+        fetch_info = {} # HTTP 응답에 본문이 없었으므로 그 ETag로는 본문 변경 여부를 알 수 없음
+    rag_document = make_rag_document(info_item, category_name, detail_content)
+    fetch_info["failed"] = detail_content in FAILED_CONTENTS
+    rag_document["fetch_info"] = fetch_info # 체크포인트에 같이 기록, 결과 파일에서는 제외
+    return rag_document
+
+
+def crawl_all_categories(categories, checkpoint, num_workers=CRAWL_WORKERS, min_interval=CRAWL_MIN_INTERVAL,
+                         fetcher=CRAWL_FETCHER, state=None):
+    """모든 카테고리를 크롤링. 체크포인트에 이미 있는 목록/문서는 건너뜀. (문서 리스트, delta) 반환.
+
+    fetcher="auto"면 상세 페이지를 HTTP로 먼저 받고, 본문이 없을 때만 Selenium을 씀.
+    (드라이버는 처음 필요할 때 만들어지므로 HTTP로 다 받으면 상세 단계에서는 브라우저를 띄우지 않음)
+    state(CrawlState)가 있으면 조건부 요청을 보내고, 이전 실행과 비교한 delta 레코드를 같이 반환함.
+    """
+    scheduler = CrawlScheduler(create_driver, num_workers=num_workers, rate_limiter=HostRateLimiter(min_interval))
+    http_fetcher = HttpDetailFetcher(max_connections=num_workers) if fetcher in ("auto", "http") else None
+    try:
+        # --- 1단계: 카테고리별 목록 페이지 순회하며 링크 수집 (카테고리 단위 병렬) ---
+        pending_categories = [c for c in categories if c["name"] not in checkpoint.lists]
+        print(f"List stage: {len(pending_categories)} categories to crawl "
+              f"({len(categories) - len(pending_categories)} restored from checkpoint)")
+
+        def on_list(category_info, items):
+            if items: # 빈 목록은 저장하지 않음 -> 다음 실행 때 다시 시도
+                checkpoint.record_list(category_info["name"], items)
+
+        scheduler.run(pending_categories, list_task, on_list)
+
+        # --- 2단계: 수집된 링크들의 상세 페이지 방문 (상세 페이지 단위 병렬) ---
+        # 지난 실행에서 받기 실패한 문서는 복원하지 않고 다시 시도
+        retried = checkpoint.drop_documents(lambda doc: doc["content"] in FAILED_CONTENTS)
+        if retried:
+            print(f"Retrying {retried} detail pages that failed in the previous run")
+        detail_tasks = [
+            (info_item, category_info["name"])
+            for category_info in categories
+            for info_item in checkpoint.lists.get(category_info["name"], [])
+            if not checkpoint.has_document(category_info["name"], info_item["detail_page_link"] or "N/A")
+        ]
+        print(f"\nDetail stage: {len(detail_tasks)} pages to fetch ({len(checkpoint.documents)} restored from checkpoint)")
+        done_count = 0
+
+        def on_detail(task, rag_document):
+            nonlocal done_count
+            checkpoint.record_document(rag_document) # 끝나는 즉시 디스크에 기록
+            done_count += 1
+            print(f"Processed detail {done_count}/{len(detail_tasks)}: {task[0]['list_title'][:50]}")
+
+        failed = scheduler.run(detail_tasks, functools.partial(detail_task, http_fetcher=http_fetcher, state=state),
+                               on_detail)
+        if failed:
+            print(f"{failed} detail pages failed. Re-run to retry them.")
+    finally:
+        print("Quitting WebDrivers.")
+        scheduler.close() # WebDriver 종료 (브라우저 닫기)
+        if http_fetcher:
+            http_fetcher.close()
+
+    # 카테고리/목록 순서대로 최종 문서 리스트 구성
+    fetched = []
+    for category_info in categories:
+        for info_item in checkpoint.lists.get(category_info["name"], []):
+            key = checkpoint.document_key(category_info["name"], info_item["detail_page_link"] or "N/A")
+            if key in checkpoint.documents:
+                rag_document = dict(checkpoint.documents[key])
+                fetched.append((rag_document, rag_document.pop("fetch_info", None)))
+
+    delta = None
+    if state:
+        # 목록 수집에 성공한 카테고리만 삭제 판정 (목록 실패로 전부 삭제되는 것 방지)
+        listed_categories = {c["name"] for c in categories if c["name"] in checkpoint.lists}
+        delta = state.apply_run(fetched, listed_categories, checkpoint.document_key)
+    # 받기 실패한 문서는 상태 DB의 예전 내용으로 대체 (없으면 코퍼스에서 제외)
+    all_rag_data = corpus_documents(fetched, checkpoint.document_key, state)
+    return all_rag_data, delta
+
+
+def crawl_amc_health_info(part_id="B000020", category_name="가슴", checkpoint_dir=CHECKPOINT_DIR):
+    # 카테고리 하나만 크롤링할 때 사용 (기존 함수 호환용)
+    return crawl_all_categories([{"partId": part_id, "name": category_name}], CrawlCheckpoint(checkpoint_dir))[0]
 
 # === 4. 스크립트 실행 부분 (if __name__ == "__main__":) ===
 # 이 파이썬 파일이 직접 실행될 때만 이 블록 안의 코드가 동작합니다.
 # (다른 파일에서 이 파일을 import해서 사용할 때는 실행되지 않음)
+# 중단된 경우 같은 명령으로 다시 실행하면 crawl_checkpoint/에 저장된 지점부터 이어서 크롤링합니다.
+# 주기적인 재크롤링은 --fresh로 실행: crawl_state.sqlite3와 비교해서 바뀐 문서만 delta 파일에 기록합니다.
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="서울아산병원 건강정보 크롤러")
+    parser.add_argument("--workers", type=int, default=CRAWL_WORKERS, help="동시에 실행할 브라우저(워커) 수")
+    parser.add_argument("--min-interval", type=float, default=CRAWL_MIN_INTERVAL, help="같은 호스트 요청 간 최소 간격(초)")
+    parser.add_argument("--checkpoint-dir", default=CHECKPOINT_DIR, help="진행 상황 저장 폴더")
+    parser.add_argument("--fresh", action="store_true", help="체크포인트를 지우고 처음부터 크롤링")
+    parser.add_argument("--part-ids", nargs="*", default=None, help="일부 partId만 크롤링 (예: B000020 B000007)")
+    parser.add_argument("--output", default=OUTPUT_FILENAME, help="결과 코퍼스 파일 (.jsonl, .jsonl.zst, 예전 형식은 .json)")
+    parser.add_argument("--state", default=CRAWL_STATE_PATH, help="재크롤링 상태 DB (ETag/Last-Modified/내용 해시)")
+    parser.add_argument("--no-state", action="store_true", help="상태 DB 없이 전체 크롤링 (delta 파일 생성 안 함)")
+    parser.add_argument("--delta-output", default=DELTA_FILENAME, help="추가/변경/삭제 문서 JSONL (embed_store_chunk.py --delta)")
+    parser.add_argument("--fetcher", choices=["auto", "http", "selenium"], default=CRAWL_FETCHER,
+                        help="상세 페이지 fetcher (auto: HTTP 먼저, 본문이 없으면 Selenium)")
+    args = parser.parse_args()
+
     # 1. 크롤링할 카테고리 목록 정의
     #    각 카테고리는 딕셔너리 형태로 'partId'와 'name'(메타데이터용)을 가짐
     #    실제 웹사이트에서 각 부위별 partId를 정확히 확인해야 합니다.
@@ -288,45 +399,37 @@ if __name__ == "__main__":
         # {"partId": "B000019", "name": "피부"}
     ]
 
-    all_rag_data = [] # 모든 카테고리에서 크롤링한 데이터를 합칠 리스트
+    if args.part_ids:
+        categories_to_crawl = [c for c in categories_to_crawl if c["partId"] in args.part_ids]
 
-    # 2. 정의된 각 카테고리에 대해 크롤링 실행
-    for category_info in categories_to_crawl:
-        part_id_to_crawl = category_info["partId"] 
-        category_name_for_metadata = category_info["name"] 
-        
-        print(f"\n--- Starting crawl for category: {category_name_for_metadata} (Part ID: {part_id_to_crawl}) ---")
-        # 메인 크롤링 함수 호출 (partId와 카테고리 이름 전달)
-        rag_data_for_category = crawl_amc_health_info(part_id=part_id_to_crawl, category_name=category_name_for_metadata)
-        
-        if rag_data_for_category: # 현재 카테고리에서 데이터가 수집되었다면
-            all_rag_data.extend(rag_data_for_category) # 전체 데이터 리스트에 추가
-            print(f"    Successfully crawled {len(rag_data_for_category)} items from '{category_name_for_metadata}'.")
-        else:
-            print(f"    No data crawled or an error occurred for '{category_name_for_metadata}'.")
-            
-        print(f"--- Finished crawl for category: {category_name_for_metadata}. Total RAG documents so far: {len(all_rag_data)} ---")
-        
-        # 여러 카테고리 크롤링 시, 마지막 카테고리가 아니면 잠시 대기 (서버 부하 방지)
-        if len(categories_to_crawl) > 1 and category_info != categories_to_crawl[-1]:
-            # 대기 시간을 조절할 수 있습니다. 너무 짧으면 서버에 부담을 줄 수 있습니다.
-            wait_time = 10 # 예: 10초 대기
-            print(f"Waiting for {wait_time} seconds before next category...")
-            time.sleep(wait_time) 
-
-    # 3. 수집된 전체 데이터를 JSON 파일로 저장
+    if args.fresh and os.path.exists(args.checkpoint_dir):
+        shutil.rmtree(args.checkpoint_dir)
+    checkpoint = CrawlCheckpoint(args.checkpoint_dir)
+    state = None if args.no_state else CrawlState(args.state)
+
+    # 2. 정의된 모든 카테고리를 워커 풀로 크롤링 (체크포인트에 있는 부분은 건너뜀)
+    all_rag_data, delta = crawl_all_categories(
+        categories_to_crawl, checkpoint, num_workers=args.workers, min_interval=args.min_interval,
+        fetcher=args.fetcher, state=state,
+    )
+
+    if delta is not None:
+        write_delta(args.delta_output, delta)
+        counts = {op: sum(1 for record in delta if record["op"] == op) for op in ("added", "changed", "removed")}
+        print(f"Delta saved to {args.delta_output}: {counts}")
+
+    # 3. 수집된 전체 데이터를 코퍼스 파일로 저장 (문서를 한 줄씩 기록)
     if all_rag_data: 
         print(f"\nTotal RAG documents crawled from all categories: {len(all_rag_data)}")
         
-        output_filename = "amc_health_info_all_categories_rag_data.json" # 파일 이름 변경
+        output_filename = args.output # 결과 파일 이름 (--output)
         try:
-            with open(output_filename, 'w', encoding='utf-8') as f:
-                json.dump(all_rag_data, f, ensure_ascii=False, indent=2)
+            write_corpus(output_filename, all_rag_data)
             print(f"RAG data saved to {output_filename}")
         except IOError as e: 
-            print(f"Error saving JSON file {output_filename}: {e}")
+            print(f"Error saving corpus file {output_filename}: {e}")
         except Exception as e: 
-            print(f"An unexpected error occurred during JSON saving: {e}")
+            print(f"An unexpected error occurred during corpus saving: {e}")
 
     else: 
         print("No RAG data crawled from any category.")
\ No newline at end of file
@@ -0,0 +1,65 @@
+# atomic_io.py
+# 실행 중인 서버가 mmap으로 열어 둔 인덱스 파일(index.faiss, docstore.bin, *.npy)을 덮어쓰기 위한 도구
+# 같은 폴더의 임시 파일에 다 쓰고 fsync한 뒤 os.replace로 바꿔치기
+#   -> 기존 mmap은 예전 파일(inode)을 그대로 보고, 새로 여는 쪽은 완성된 새 파일만 봄 (잘린 파일/SIGBUS 없음)
+import os
+import stat
+import tempfile
+from contextlib import contextmanager
+
+
+def _fsync_path(path):
+    with open(path, "rb") as f:
+        os.fsync(f.fileno())
+
+
+def _target_mode(path):
+    """교체할 파일의 권한 (없으면 umask를 적용한 일반 파일 권한). mkstemp는 항상 0600으로 만듦."""
+    try:
+        return stat.S_IMODE(os.stat(path).st_mode)
+    except FileNotFoundError:
+        umask = os.umask(0)
+        os.umask(umask)
+        return 0o666 & ~umask
+
+
+def _fsync_dir(directory):
+    try:
+        fd = os.open(directory, os.O_RDONLY)
+    except OSError: # 디렉터리를 열 수 없는 플랫폼(Windows)
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+
+@contextmanager
+def atomic_path(path):
+    """임시 경로를 넘겨주고, 블록이 정상적으로 끝나면 fsync 후 path로 교체.
+
+    임시 파일 이름은 원래 이름으로 끝나므로 np.save가 .npy를 덧붙이지 않음.
+    """
+    directory = os.path.dirname(path) or "."
+    fd, tmp_path = tempfile.mkstemp(prefix=".tmp-", suffix="-" + os.path.basename(path), dir=directory)
+    os.close(fd)
+    try:
+        yield tmp_path
+        _fsync_path(tmp_path)
+        os.chmod(tmp_path, _target_mode(path)) # 다른 사용자로 실행되는 서버도 읽을 수 있게
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    _fsync_dir(directory)
+
+
+@contextmanager
+def atomic_open(path, mode="w", encoding="utf-8"):
+    """atomic_path를 파일 객체로 여는 버전."""
+    with atomic_path(path) as tmp_path:
+        with open(tmp_path, mode, encoding=None if "b" in mode else encoding) as f:
+            yield f
@@ -0,0 +1,89 @@
+# bench_ann_index.py
+# 인덱스 종류별 recall@k (Flat 기준), 검색 지연시간 p50/p99, 인덱스 크기 비교
+# 실행 (backend 폴더에서): python -m bench.bench_ann_index [--k 3] [--queries 200]
+import argparse
+import json
+import os
+import time
+
+import faiss
+import numpy as np
+
+from faiss_index import build_index, tune_index, index_size_bytes
+from mmap_docstore import INDEX_FILE, IDS_FILE, has_mmap_docstore
+
+DB_PATH = "faiss_amc_db_chunked"
+
+# 인덱스 종류별로 바꿔볼 검색 파라미터
+SEARCH_PARAMS = {
+    "Flat": [{}],
+    "IVFFlat": [{"nprobe": n} for n in (1, 4, 16, 64)],
+    "HNSW": [{"ef_search": ef} for ef in (16, 64, 256)],
+    "IVFPQ": [{"nprobe": n} for n in (1, 4, 16, 64)],
+}
+
+
+def load_corpus_vectors(path):
+    index = faiss.read_index(os.path.join(path, INDEX_FILE))
+    if not has_mmap_docstore(path): # 예전 pickle 형식은 증분 삭제를 거친 적이 없으므로 라벨이 0..ntotal-1
+        return index.reconstruct_n(0, index.ntotal)
+    # 증분 업데이트로 삭제된 적이 있으면 IVF 라벨에 빈 번호가 생김 -> 매핑에 있는 실제 라벨로 복원
+    with open(os.path.join(path, IDS_FILE), "r", encoding="utf-8") as f:
+        labels = sorted(int(label) for label in json.load(f)["index_to_docstore_id"])
+    return np.stack([index.reconstruct(label) for label in labels])
+
+
+def make_queries(vectors, num_queries, seed=0):
+    # 실제 질문 대신 코퍼스 벡터에 잡음을 섞어서 "비슷하지만 똑같지는 않은" 쿼리를 만듦
+    rng = np.random.default_rng(seed)
+    picked = vectors[rng.choice(len(vectors), size=min(num_queries, len(vectors)), replace=False)]
+    noise = rng.normal(scale=vectors.std() * 0.5, size=picked.shape).astype(np.float32)
+    return np.ascontiguousarray(picked + noise, dtype=np.float32)
+
+
+def recall_at_k(truth, found):
+    hits = sum(len(set(t) & set(f)) for t, f in zip(truth, found))
+    return hits / truth.size
+
+
+def measure(index, queries, k):
+    latencies_ms = []
+    results = []
+    for query in queries: # 서버처럼 쿼리 하나씩 검색
+        start = time.perf_counter()
+        _, labels = index.search(query[None, :], k)
+        latencies_ms.append((time.perf_counter() - start) * 1000)
+        results.append(labels[0])
+    return np.array(results), np.percentile(latencies_ms, 50), np.percentile(latencies_ms, 99)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="FAISS 인덱스 종류별 벤치마크")
+    parser.add_argument("--db-path", default=DB_PATH)
+    parser.add_argument("--k", type=int, default=3)
+    parser.add_argument("--queries", type=int, default=200)
+    args = parser.parse_args()
+
+    vectors = load_corpus_vectors(args.db_path)
+    queries = make_queries(vectors, args.queries)
+    print(f"코퍼스 벡터 {vectors.shape[0]}개 (dim {vectors.shape[1]}), 쿼리 {len(queries)}개, k={args.k}\n")
+
+    flat = build_index("Flat", vectors)
+    _, truth = flat.search(queries, args.k)
+
+    print(f"{'index':<8} {'params':<16} {'recall@k':>9} {'p50 ms':>8} {'p99 ms':>8} {'size MB':>8} {'build s':>8}")
+    for index_type, param_list in SEARCH_PARAMS.items():
+        start = time.perf_counter()
+        index = build_index(index_type, vectors)
+        build_seconds = time.perf_counter() - start
+        size_mb = index_size_bytes(index) / 1024 / 1024
+        for params in param_list:
+            tune_index(index, nprobe=params.get("nprobe"), ef_search=params.get("ef_search"))
+            found, p50, p99 = measure(index, queries, args.k)
+            label = ",".join(f"{key}={value}" for key, value in params.items()) or "-"
+            print(f"{index_type:<8} {label:<16} {recall_at_k(truth, found):>9.3f} "
+                  f"{p50:>8.3f} {p99:>8.3f} {size_mb:>8.2f} {build_seconds:>8.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,144 @@
+# bench_fetchers.py
+# 상세 페이지 fetcher 비교 (로컬 fixture 서버 대상, 네트워크 불필요)
+#   parse       : 저장된 fixture HTML 파싱만 (html.parser vs lxml)
+#   http-once   : 요청마다 새 연결 (keep-alive 없음)
+#   http-pool   : HttpDetailFetcher (연결 풀 재사용)
+#   http-async  : afetch_all (비동기 동시 요청)
+#   selenium    : crawl_detail_page (--with-selenium, Chrome 필요)
+# 실행 (backend 폴더에서): python -m bench.bench_fetchers [--rounds 30] [--delay 0.0] [--with-selenium] [--save]
+import argparse
+import asyncio
+import glob
+import json
+import os
+import threading
+import time
+
+import httpx
+import numpy as np
+
+from bench.fixture_server import FIXTURE_DIR, serve
+from fetchers import HTML_PARSER, HttpDetailFetcher, afetch_all, extract_detail_text
+
+RESULTS_DIR = os.path.join("bench", "results")
+DETAIL_PATH = "/asan/healthinfo/management/managementDetail.do"
+
+
+def fixture_urls(base_url):
+    ids = sorted(os.path.basename(p)[len("detail_"):-len(".html")] for p in glob.glob(os.path.join(FIXTURE_DIR, "detail_*.html")))
+    return [f"{base_url}{DETAIL_PATH}?managementId={i}" for i in ids]
+
+
+def summarize(name, latencies_ms, wall_s, pages):
+    lat = np.array(latencies_ms)
+    return {
+        "backend": name,
+        "pages": pages,
+        "p50_ms": round(float(np.percentile(lat, 50)), 2),
+        "p99_ms": round(float(np.percentile(lat, 99)), 2),
+        "pages_per_s": round(pages / wall_s, 1),
+    }
+
+
+def time_each(name, urls, rounds, fetch_fn):
+    latencies = []
+    start = time.perf_counter()
+    for _ in range(rounds):
+        for url in urls:
+            t0 = time.perf_counter()
+            if not fetch_fn(url):
+                raise SystemExit(f"{name}: 본문을 못 찾음 ({url})")
+            latencies.append((time.perf_counter() - t0) * 1000)
+    return summarize(name, latencies, time.perf_counter() - start, len(latencies))
+
+
+def bench_parse(rounds):
+    pages = [open(p, encoding="utf-8").read() for p in glob.glob(os.path.join(FIXTURE_DIR, "detail_*.html"))]
+    results = []
+    for parser in sorted({"html.parser", HTML_PARSER}):
+        latencies = []
+        start = time.perf_counter()
+        for _ in range(rounds):
+            for html in pages:
+                t0 = time.perf_counter()
+                extract_detail_text(html, parser)
+                latencies.append((time.perf_counter() - t0) * 1000)
+        results.append(summarize(f"parse[{parser}]", latencies, time.perf_counter() - start, len(latencies)))
+    return results
+
+
+def bench_http_once(urls, rounds):
+    def fetch(url):
+        return extract_detail_text(httpx.get(url).text)
+    return time_each("http-once", urls, rounds, fetch)
+
+
+def bench_http_pool(urls, rounds):
+    fetcher = HttpDetailFetcher()
+    try:
+        return time_each("http-pool", urls, rounds, fetcher.fetch)
+    finally:
+        fetcher.close()
+
+
+def bench_http_async(urls, rounds, concurrency):
+    all_urls = urls * rounds
+    start = time.perf_counter()
+    texts = asyncio.run(afetch_all(all_urls, max_connections=concurrency))
+    wall_s = time.perf_counter() - start
+    if not all(texts.values()):
+        raise SystemExit("http-async: 본문을 못 찾은 페이지가 있음")
+    # 동시 요청이라 페이지별 지연 대신 평균 처리 시간만 의미 있음
+    per_page_ms = wall_s * 1000 / len(all_urls)
+    return {"backend": f"http-async[{concurrency}]", "pages": len(all_urls), "p50_ms": round(per_page_ms, 2),
+            "p99_ms": None, "pages_per_s": round(len(all_urls) / wall_s, 1)}
+
+
+def bench_selenium(urls, rounds):
+    from asan_crawler import crawl_detail_page, create_driver
+
+    driver = create_driver()
+    try:
+        return time_each("selenium", urls, rounds, lambda url: crawl_detail_page(url, driver))
+    finally:
+        driver.quit()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="상세 페이지 fetcher 벤치마크")
+    parser.add_argument("--rounds", type=int, default=30, help="fixture 페이지를 몇 번씩 받을지")
+    parser.add_argument("--delay", type=float, default=0.0, help="fixture 서버 응답 지연(초)")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--with-selenium", action="store_true")
+    parser.add_argument("--save", action="store_true")
+    args = parser.parse_args()
+
+    server = serve(port=0, delay=args.delay) # 빈 포트 자동 선택
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base_url = f"http://127.0.0.1:{server.server_address[1]}"
+    urls = fixture_urls(base_url)
+    print(f"fixture server: {base_url} ({len(urls)} detail pages, delay {args.delay}s)")
+
+    results = bench_parse(args.rounds)
+    results.append(bench_http_once(urls, args.rounds))
+    results.append(bench_http_pool(urls, args.rounds))
+    results.append(bench_http_async(urls, args.rounds, args.concurrency))
+    if args.with_selenium:
+        results.append(bench_selenium(urls, max(1, args.rounds // 10))) # 느리므로 횟수를 줄임
+    server.shutdown()
+
+    print(f"\n{'backend':<22}{'pages':>7}{'p50 ms':>10}{'p99 ms':>10}{'pages/s':>10}")
+    for r in results:
+        p99 = f"{r['p99_ms']:>10.2f}" if r["p99_ms"] is not None else f"{'-':>10}"
+        print(f"{r['backend']:<22}{r['pages']:>7}{r['p50_ms']:>10.2f}{p99}{r['pages_per_s']:>10.1f}")
+
+    if args.save:
+        os.makedirs(RESULTS_DIR, exist_ok=True)
+        path = os.path.join(RESULTS_DIR, f"fetchers_{time.strftime('%Y%m%d_%H%M%S')}.json")
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump({"rounds": args.rounds, "delay": args.delay, "results": results}, f, ensure_ascii=False, indent=2)
+        print(f"\n저장: {path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+# eval_medical_filter.py
+# 로컬 의학 질문 분류기 평가: 정확도, LLM 에스컬레이션 비율, 판단 지연시간
+# 실행 (backend 폴더에서): python -m bench.eval_medical_filter [--with-llm] [--save]
+#   --save: 기준값(FILTER_*)과 결과를 bench/results/medical_filter_<시각>.json 으로 저장
+import argparse
+import json
+import os
+import time
+
+import numpy as np
+
+from nodes import medical_classifier
+from nodes.medical_classifier import get_classifier, AMBIGUOUS, MEDICAL
+
+EVAL_PATH = "data/medical_filter_eval.jsonl"
+RESULTS_DIR = os.path.join("bench", "results")
+
+
+def thresholds():
+    return {
+        "medical_margin": medical_classifier.MEDICAL_MARGIN,
+        "offtopic_margin": medical_classifier.OFFTOPIC_MARGIN,
+        "corpus_medical_sim": medical_classifier.CORPUS_MEDICAL_SIM,
+        "corpus_offtopic_sim": medical_classifier.CORPUS_OFFTOPIC_SIM,
+    }
+
+
+def load_eval_set(path):
+    with open(path, "r", encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="로컬 의학 필터 평가")
+    parser.add_argument("--eval-path", default=EVAL_PATH)
+    parser.add_argument("--with-llm", action="store_true",
+                        help="애매한 질문을 실제 gpt-4 필터로 판단해서 전체 정확도도 계산 (API 호출 발생)")
+    parser.add_argument("--save", action="store_true")
+    args = parser.parse_args()
+
+    examples = load_eval_set(args.eval_path)
+    classifier = get_classifier() # 모델 로드 시간은 지연시간 측정에서 제외
+    local_correct = 0
+    local_decided = 0
+    escalated = []
+    latencies_ms = []
+    mistakes = []
+
+    for example in examples:
+        start = time.perf_counter()
+        label, scores = classifier.classify(example["text"])
+        latencies_ms.append((time.perf_counter() - start) * 1000)
+
+        if label == AMBIGUOUS:
+            escalated.append(example)
+            continue
+        local_decided += 1
+        if (label == MEDICAL) == example["is_medical"]:
+            local_correct += 1
+        else:
+            mistakes.append((example["text"], example["is_medical"], scores))
+
+    total = len(examples)
+    summary = {
+        "thresholds": thresholds(),
+        "examples": total,
+        "local_decided": local_decided,
+        "escalation_rate": round(len(escalated) / total, 4),
+        "local_accuracy": round(local_correct / local_decided, 4) if local_decided else None,
+        "p50_ms": round(float(np.percentile(latencies_ms, 50)), 2),
+        "p99_ms": round(float(np.percentile(latencies_ms, 99)), 2),
+    }
+    print(f"기준값: {summary['thresholds']}")
+    print(f"평가 문장 수: {total}")
+    print(f"로컬 판단: {local_decided} / 에스컬레이션: {len(escalated)} "
+          f"(escalation rate {len(escalated) / total:.1%})")
+    if local_decided:
+        print(f"로컬 판단 정확도: {local_correct / local_decided:.1%}")
+    print(f"로컬 판단 지연시간: p50 {np.percentile(latencies_ms, 50):.1f}ms / "
+          f"p99 {np.percentile(latencies_ms, 99):.1f}ms")
+
+    if args.with_llm and escalated:
+        from nodes.medical_filter import get_llm, build_filter_messages
+        llm = get_llm()
+        llm_correct = 0
+        for example in escalated:
+            response = llm.invoke(build_filter_messages(example["text"]))
+            if response.content.strip().lower().startswith("yes") == example["is_medical"]:
+                llm_correct += 1
+        print(f"에스컬레이션 LLM 정확도: {llm_correct / len(escalated):.1%}")
+        print(f"전체 정확도 (로컬 + LLM): {(local_correct + llm_correct) / total:.1%}")
+        summary["llm_accuracy"] = round(llm_correct / len(escalated), 4)
+        summary["overall_accuracy"] = round((local_correct + llm_correct) / total, 4)
+
+    if mistakes:
+        print("\n로컬 오판 목록:")
+        for text, expected, scores in mistakes:
+            print(f"  [{'의학' if expected else '비의학'}] {text} {scores}")
+
+    if args.save:
+        os.makedirs(RESULTS_DIR, exist_ok=True)
+        path = os.path.join(RESULTS_DIR, f"medical_filter_{time.strftime('%Y%m%d_%H%M%S')}.json")
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump({**summary, "mistakes": [{"text": text, "is_medical": expected, "scores": scores}
+                                               for text, expected, scores in mistakes]},
+                      f, ensure_ascii=False, indent=2)
+        print(f"\n저장: {path}")
+
+
+if __name__ == "__main__":
+    main()
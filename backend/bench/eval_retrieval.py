@@ -0,0 +1,95 @@
+# eval_retrieval.py
+# 검색 방식 비교: dense(FAISS) / sparse(BM25) / hybrid(RRF)의 recall@k와 검색 지연시간
+#   평가 질문: 기본은 인덱스에 있는 글 제목(괄호 속 영문명 제외)을 질문으로, 그 글의 source_url을 정답으로 사용
+#             --eval-path로 {"query": ..., "source_urls": [...]} JSONL을 줄 수도 있음
+# 실행 (backend 폴더에서): python -m bench.eval_retrieval [--k 1 3 5 10] [--limit 200] [--save]
+import argparse
+import json
+import os
+import re
+import time
+
+import numpy as np
+
+from nodes.hybrid_search import hybrid_search
+from nodes.vector_store import embed_query_cached, get_db, get_sparse_index
+
+RESULTS_DIR = os.path.join("bench", "results")
+MODES = ("dense", "sparse", "hybrid")
+
+
+def eval_set_from_titles(db):
+    """제목 -> 그 제목을 가진 글들의 source_url 집합."""
+    by_title = {}
+    for doc_id in db.index_to_docstore_id.values():
+        metadata = db.docstore.search(doc_id).metadata
+        query = re.sub(r"\(.*?\)", "", metadata.get("title", "")).strip()
+        if query and metadata.get("source_url"):
+            by_title.setdefault(query, set()).add(metadata["source_url"])
+    return [{"query": query, "source_urls": sorted(urls)} for query, urls in sorted(by_title.items())]
+
+
+def load_eval_set(path):
+    with open(path, "r", encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def evaluate(mode, examples, vectors, ks, cutoffs=False):
+    hits = {k: 0 for k in ks}
+    latencies_ms = []
+    for example, vector in zip(examples, vectors):
+        start = time.perf_counter()
+        docs = hybrid_search(example["query"], vector, k=max(ks), mode=mode, cutoffs=cutoffs)
+        latencies_ms.append((time.perf_counter() - start) * 1000)
+        relevant = set(example["source_urls"])
+        retrieved = [doc.metadata.get("source_url") for doc in docs]
+        for k in ks:
+            if relevant & set(retrieved[:k]):
+                hits[k] += 1
+    return {
+        "mode": mode,
+        **{f"recall@{k}": round(hits[k] / len(examples), 3) for k in ks},
+        "p50_ms": round(float(np.percentile(latencies_ms, 50)), 2),
+        "p99_ms": round(float(np.percentile(latencies_ms, 99)), 2),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="dense / sparse / hybrid 검색 평가")
+    parser.add_argument("--eval-path", default=None, help="평가 질문 JSONL (기본: 제목으로 자동 생성)")
+    parser.add_argument("--k", type=int, nargs="+", default=[1, 3, 5, 10])
+    parser.add_argument("--limit", type=int, default=None, help="평가 질문 수 제한")
+    parser.add_argument("--cutoffs", action="store_true", help="관련도 기준(RETRIEVAL_MIN_*)을 적용한 결과로 평가")
+    parser.add_argument("--save", action="store_true")
+    args = parser.parse_args()
+
+    db = get_db() # 로드 시간은 지연시간 측정에서 제외
+    if get_sparse_index() is None:
+        raise SystemExit("BM25 색인이 없습니다. `python sparse_index.py` 또는 embed_store_chunk.py로 먼저 만드세요.")
+    examples = load_eval_set(args.eval_path) if args.eval_path else eval_set_from_titles(db)
+    examples = examples[:args.limit] if args.limit else examples
+
+    # 질문 임베딩은 모든 방식에 공통이 아니므로(sparse는 불필요) 따로 측정
+    start = time.perf_counter()
+    vectors = [embed_query_cached(example["query"]) for example in examples]
+    embed_ms = (time.perf_counter() - start) * 1000 / len(examples)
+
+    results = [evaluate(mode, examples, vectors, args.k, args.cutoffs) for mode in MODES]
+    print(f"questions: {len(examples)}, query embedding: {embed_ms:.1f} ms/question (dense/hybrid에 추가)\n")
+    header = f"{'mode':<8}" + "".join(f"{f'R@{k}':>8}" for k in args.k) + f"{'p50 ms':>9}{'p99 ms':>9}"
+    print(header)
+    for r in results:
+        print(f"{r['mode']:<8}" + "".join(f"{r[f'recall@{k}']:>8.3f}" for k in args.k)
+              + f"{r['p50_ms']:>9.2f}{r['p99_ms']:>9.2f}")
+
+    if args.save:
+        os.makedirs(RESULTS_DIR, exist_ok=True)
+        path = os.path.join(RESULTS_DIR, f"retrieval_{time.strftime('%Y%m%d_%H%M%S')}.json")
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump({"questions": len(examples), "embed_ms": round(embed_ms, 2), "results": results},
+                      f, ensure_ascii=False, indent=2)
+        print(f"\n저장: {path}")
+
+
+if __name__ == "__main__":
+    main()
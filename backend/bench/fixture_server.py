@@ -0,0 +1,67 @@
+# fixture_server.py
+# 크롤러 오프라인 테스트용 로컬 HTTP 서버 (bench/fixtures/amc의 HTML을 실제 사이트 경로로 제공)
+# 실행 (backend 폴더에서): python -m bench.fixture_server [--port 8765] [--delay 0.0]
+# 크롤러:                 AMC_SITE_ROOT=http://127.0.0.1:8765 python asan_crawler.py --part-ids B000020 --fresh
+import argparse
+import hashlib
+import os
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+FIXTURE_DIR = os.path.join(os.path.dirname(__file__), "fixtures", "amc")
+
+
+def fixture_path(url_path, query):
+    params = parse_qs(query)
+    if url_path.endswith("/managementList.do"):
+        return os.path.join(FIXTURE_DIR, f"list_{params.get('partId', [''])[0]}.html")
+    if url_path.endswith("/managementDetail.do"):
+        return os.path.join(FIXTURE_DIR, f"detail_{params.get('managementId', [''])[0]}.html")
+    return None
+
+
+class FixtureHandler(BaseHTTPRequestHandler):
+    delay = 0.0 # 실제 서버 응답 지연 흉내 (초)
+
+    def do_GET(self):
+        parsed = urlparse(self.path)
+        path = fixture_path(parsed.path, parsed.query)
+        if path is None or not os.path.exists(path):
+            self.send_error(404)
+            return
+        if self.delay:
+            time.sleep(self.delay)
+        with open(path, "rb") as f:
+            body = f.read()
+        etag = '"' + hashlib.sha256(body).hexdigest()[:16] + '"'
+        if self.headers.get("If-None-Match") == etag: # 조건부 재크롤링 테스트용
+            self.send_response(304)
+            self.send_header("ETag", etag)
+            self.end_headers()
+            return
+        self.send_response(200)
+        self.send_header("ETag", etag)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass # 요청 로그 생략
+
+
+def serve(port=8765, delay=0.0):
+    FixtureHandler.delay = delay
+    server = ThreadingHTTPServer(("127.0.0.1", port), FixtureHandler)
+    return server
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="크롤러 fixture 서버")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--delay", type=float, default=0.0)
+    args = parser.parse_args()
+    server = serve(args.port, args.delay)
+    print(f"fixture server: http://127.0.0.1:{args.port}")
+    server.serve_forever()
@@ -0,0 +1,78 @@
+# importtime_report.py
+# `python -X importtime -c "import server"` 결과를 요약해서 시작 시간 회귀를 추적
+# 실행 (backend 폴더에서): python -m bench.importtime_report [--module server] [--top 25] [--save]
+#   --save     : bench/results/importtime_<module>_<시각>.txt 로 저장
+#   --baseline : 예전 리포트 파일과 총 import 시간 비교
+import argparse
+import os
+import re
+import subprocess
+import sys
+import time
+
+RESULTS_DIR = os.path.join("bench", "results")
+LINE_RE = re.compile(r"import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)")
+TOTAL_RE = re.compile(r"total import time: ([\d.]+) ms")
+
+
+def profile_imports(module):
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True, text=True,
+    )
+    if proc.returncode != 0:
+        raise SystemExit(f"import {module} 실패:\n{proc.stderr[-2000:]}")
+    entries = []
+    for line in proc.stderr.splitlines():
+        match = LINE_RE.match(line)
+        if match:
+            self_us, cumulative_us, indent, name = match.groups()
+            # 들여쓰기 깊이: 1이면 최상위 import
+            entries.append((name, int(self_us), int(cumulative_us), (len(indent) - 1) // 2))
+    return entries
+
+
+def build_report(module, entries, top):
+    top_level = [e for e in entries if e[3] == 0]
+    total_ms = sum(e[2] for e in top_level) / 1000
+    lines = [
+        f"module: {module}",
+        f"python: {sys.version.split()[0]}",
+        f"date: {time.strftime('%Y-%m-%d %H:%M:%S')}",
+        f"total import time: {total_ms:.1f} ms",
+        f"modules imported: {len(entries)}",
+        "",
+        f"top {top} by cumulative time (ms):",
+    ]
+    for name, self_us, cumulative_us, depth in sorted(entries, key=lambda e: e[2], reverse=True)[:top]:
+        lines.append(f"  {cumulative_us / 1000:>9.1f}  {self_us / 1000:>8.1f}  {'  ' * depth}{name}")
+    return "\n".join(lines), total_ms
+
+
+def main():
+    parser = argparse.ArgumentParser(description="import 시간 프로파일 리포트")
+    parser.add_argument("--module", default="server")
+    parser.add_argument("--top", type=int, default=25)
+    parser.add_argument("--save", action="store_true")
+    parser.add_argument("--baseline", default=None, help="비교할 예전 리포트 파일")
+    args = parser.parse_args()
+
+    report, total_ms = build_report(args.module, profile_imports(args.module), args.top)
+    print(report)
+
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            baseline_ms = float(TOTAL_RE.search(f.read()).group(1))
+        diff = total_ms - baseline_ms
+        print(f"\nbaseline {baseline_ms:.1f} ms -> now {total_ms:.1f} ms ({diff:+.1f} ms)")
+
+    if args.save:
+        os.makedirs(RESULTS_DIR, exist_ok=True)
+        path = os.path.join(RESULTS_DIR, f"importtime_{args.module}_{time.strftime('%Y%m%d_%H%M%S')}.txt")
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(report + "\n")
+        print(f"\n저장: {path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,285 @@
+# load_test.py
+# 서버 부하 테스트: /chat, /chat/stream, /summarize-audio를 정해진 동시성으로 호출해서
+# RPS, 지연시간 p50/p95/p99, 첫 토큰까지 시간(TTFT), 서버 메모리(RSS)를 측정
+#   - OpenAI 호출은 bench.mock_openai로 보냄 (API 비용/네트워크 없음, 응답 지연은 --mock-latency로 조절)
+#   - FAISS 인덱스/임베딩 모델은 실제 것을 사용, Whisper는 작은 모델(--whisper-model tiny)
+#   - 답변 캐시는 기본으로 끔 (같은 질문 반복이 캐시 hit으로 측정되지 않게, --answer-cache로 켬)
+# 실행 (backend 폴더에서): python -m bench.load_test [--scenario chat chat-stream summarize-audio]
+#                          [--concurrency 1 8 32] [--requests 64] [--save] [--compare bench/results/load_....json]
+import argparse
+import asyncio
+import json
+import os
+import random
+import subprocess
+import sys
+import time
+
+import httpx
+import numpy as np
+
+RESULTS_DIR = os.path.join("bench", "results")
+QUESTIONS_PATH = "data/medical_filter_eval.jsonl"
+AUDIO_PATH = "consultation.mp3"
+SCENARIOS = ("chat", "chat-stream", "summarize-audio")
+READY_TIMEOUT = 600 # 모델/인덱스 로드 대기 (초)
+
+
+def load_questions(path=QUESTIONS_PATH):
+    with open(path, "r", encoding="utf-8") as f:
+        examples = [json.loads(line) for line in f if line.strip()]
+    return [example["text"] for example in examples if example["is_medical"]]
+
+
+def read_rss_mb(pid):
+    """(현재 RSS, 최대 RSS) MB. /proc이 없으면 (None, None)."""
+    values = {}
+    try:
+        with open(f"/proc/{pid}/status") as f:
+            for line in f:
+                if line.startswith(("VmRSS:", "VmHWM:")):
+                    key, value = line.split(":", 1)
+                    values[key] = int(value.split()[0]) / 1024
+    except OSError:
+        return None, None
+    return values.get("VmRSS"), values.get("VmHWM")
+
+
+def percentile(values, q):
+    return round(float(np.percentile(values, q)), 1) if values else None
+
+
+def start_process(args, env, log_path):
+    log = open(log_path, "w")
+    return subprocess.Popen(args, env=env, stdout=log, stderr=subprocess.STDOUT)
+
+
+def wait_ready(url, process, timeout=READY_TIMEOUT):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if process is not None and process.poll() is not None:
+            raise SystemExit(f"서버가 종료됨 (exit {process.returncode}), 로그를 확인하세요.")
+        try:
+            if httpx.get(f"{url}/readyz", timeout=2).status_code == 200:
+                return
+        except httpx.HTTPError:
+            pass
+        time.sleep(1)
+    raise SystemExit(f"{timeout}초 안에 서버가 준비되지 않음: {url}")
+
+
+async def call_chat(client, url, question):
+    start = time.perf_counter()
+    response = await client.post(f"{url}/chat", json={"message": question})
+    latency = time.perf_counter() - start
+    return response.status_code, latency, latency # 스트리밍이 아니면 첫 응답 = 전체 응답
+
+
+async def call_chat_stream(client, url, question):
+    start = time.perf_counter()
+    ttft = None
+    async with client.stream("POST", f"{url}/chat/stream", json={"message": question}) as response:
+        async for line in response.aiter_lines():
+            # 답변 토큰(또는 캐시 hit 답변)이 처음 도착한 시점
+            if ttft is None and line.startswith(("event: token", "event: cache")):
+                ttft = time.perf_counter() - start
+    return response.status_code, time.perf_counter() - start, ttft
+
+
+async def call_summarize_audio(client, url, audio):
+    name, data = audio
+    start = time.perf_counter()
+    response = await client.post(f"{url}/summarize-audio", files={"file": (name, data)})
+    latency = time.perf_counter() - start
+    return response.status_code, latency, latency
+
+
+async def run_level(url, scenario, concurrency, total, questions, audio, pid):
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies, ttfts, statuses = [], [], {}
+    peak_rss = 0.0
+    done = asyncio.Event()
+
+    async def sample_memory(): # 실행 중 RSS 최대값
+        nonlocal peak_rss
+        while not done.is_set():
+            rss, _ = read_rss_mb(pid) if pid else (None, None)
+            peak_rss = max(peak_rss, rss or 0.0)
+            await asyncio.sleep(0.2)
+
+    async def one(i, client):
+        async with semaphore:
+            try:
+                if scenario == "summarize-audio":
+                    status, latency, ttft = await call_summarize_audio(client, url, audio)
+                else:
+                    call = call_chat_stream if scenario == "chat-stream" else call_chat
+                    status, latency, ttft = await call(client, url, questions[i % len(questions)])
+            except httpx.HTTPError as e:
+                status, latency, ttft = type(e).__name__, None, None
+        statuses[status] = statuses.get(status, 0) + 1
+        if status == 200:
+            latencies.append(latency * 1000)
+            if ttft is not None:
+                ttfts.append(ttft * 1000)
+
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(timeout=None, limits=limits) as client:
+        sampler = asyncio.create_task(sample_memory())
+        start = time.perf_counter()
+        await asyncio.gather(*(one(i, client) for i in range(total)))
+        wall = time.perf_counter() - start
+        done.set()
+        await sampler
+
+    return {
+        "scenario": scenario,
+        "concurrency": concurrency,
+        "requests": total,
+        "ok": len(latencies),
+        "statuses": {str(k): v for k, v in statuses.items()},
+        "rps": round(len(latencies) / wall, 2),
+        "p50_ms": percentile(latencies, 50),
+        "p95_ms": percentile(latencies, 95),
+        "p99_ms": percentile(latencies, 99),
+        "ttft_p50_ms": percentile(ttfts, 50),
+        "ttft_p95_ms": percentile(ttfts, 95),
+        "peak_rss_mb": round(peak_rss, 1) if peak_rss else None,
+    }
+
+
+def print_results(results):
+    print(f"\n{'scenario':<16}{'conc':>5}{'ok':>6}{'rps':>8}{'p50':>9}{'p95':>9}{'p99':>9}{'ttft50':>9}{'ttft95':>9}{'rss MB':>9}")
+    for r in results:
+        cells = [r[key] for key in ("p50_ms", "p95_ms", "p99_ms", "ttft_p50_ms", "ttft_p95_ms", "peak_rss_mb")]
+        print(f"{r['scenario']:<16}{r['concurrency']:>5}{r['ok']:>6}{r['rps']:>8.2f}"
+              + "".join(f"{c:>9.1f}" if c is not None else f"{'-':>9}" for c in cells))
+        if r["ok"] < r["requests"]:
+            print(f"{'':<16}실패/거절: {r['statuses']}")
+
+
+def compare(results, baseline_path):
+    with open(baseline_path, "r", encoding="utf-8") as f:
+        baseline = {(r["scenario"], r["concurrency"]): r for r in json.load(f)["results"]}
+    print(f"\n기준 결과와 비교: {baseline_path} (+는 증가)")
+    print(f"{'scenario':<16}{'conc':>5}{'rps':>9}{'p50':>9}{'p95':>9}{'p99':>9}{'ttft50':>9}{'rss':>9}")
+    for r in results:
+        base = baseline.get((r["scenario"], r["concurrency"]))
+        if base is None:
+            continue
+        cells = []
+        for key in ("rps", "p50_ms", "p95_ms", "p99_ms", "ttft_p50_ms", "peak_rss_mb"):
+            if r.get(key) is None or not base.get(key):
+                cells.append(f"{'-':>9}")
+            else:
+                cells.append(f"{(r[key] - base[key]) / base[key]:>+9.1%}")
+        print(f"{r['scenario']:<16}{r['concurrency']:>5}" + "".join(cells))
+
+
+def git_revision():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True).stdout.strip() or None
+    except OSError:
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="MeDot 서버 부하 테스트 (mock OpenAI)")
+    parser.add_argument("--scenario", nargs="+", choices=SCENARIOS, default=["chat", "chat-stream"])
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 8, 32])
+    parser.add_argument("--requests", type=int, default=64, help="동시성 단계마다 보낼 요청 수 (chat)")
+    parser.add_argument("--audio-requests", type=int, default=8, help="동시성 단계마다 보낼 요청 수 (summarize-audio)")
+    parser.add_argument("--audio", default=AUDIO_PATH)
+    parser.add_argument("--server-url", default=None, help="이미 떠 있는 서버 사용 (mock/서버를 띄우지 않음, 메모리 측정 없음)")
+    parser.add_argument("--port", type=int, default=8010)
+    parser.add_argument("--mock-port", type=int, default=8099)
+    parser.add_argument("--mock-latency", type=float, default=0.5, help="mock LLM 첫 토큰 지연(초)")
+    parser.add_argument("--mock-token-delay", type=float, default=0.02, help="mock LLM 토큰 간격(초)")
+    parser.add_argument("--whisper-model", default="tiny")
+    parser.add_argument("--answer-cache", action="store_true", help="답변 캐시를 켠 상태로 측정")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--save", action="store_true")
+    parser.add_argument("--compare", default=None, help="예전 --save 결과 JSON과 비교")
+    args = parser.parse_args()
+
+    questions = load_questions()
+    random.Random(args.seed).shuffle(questions)
+    audio = None
+    if "summarize-audio" in args.scenario:
+        with open(args.audio, "rb") as f:
+            audio = (os.path.basename(args.audio), f.read())
+
+    processes = []
+    server = None
+    url = args.server_url
+    log_dir = os.path.join(RESULTS_DIR, "logs")
+    os.makedirs(log_dir, exist_ok=True)
+    try:
+        if url is None:
+            mock_base = f"http://127.0.0.1:{args.mock_port}/v1"
+            processes.append(start_process(
+                [sys.executable, "-m", "bench.mock_openai", "--port", str(args.mock_port),
+                 "--latency", str(args.mock_latency), "--token-delay", str(args.mock_token_delay)],
+                os.environ.copy(), os.path.join(log_dir, "mock_openai.log"),
+            ))
+            env = {
+                **os.environ,
+                "OPENAI_BASE_URL": mock_base, "OPENAI_API_BASE": mock_base, "OPENAI_API_KEY": "mock",
+                "WHISPER_MODEL_SIZE": args.whisper_model,
+                "WHISPER_PRELOAD": "1" if "summarize-audio" in args.scenario else "0",
+                "TRACE_LOG": "0",
+            }
+            if not args.answer_cache:
+                env["ANSWER_CACHE_THRESHOLD"] = "2" # 코사인 유사도는 1을 넘지 않으므로 항상 miss
+            server = start_process(
+                [sys.executable, "-m", "uvicorn", "server:app", "--port", str(args.port), "--log-level", "warning"],
+                env, os.path.join(log_dir, "server.log"),
+            )
+            processes.append(server)
+            url = f"http://127.0.0.1:{args.port}"
+
+        print(f"서버 준비 대기: {url}")
+        start = time.perf_counter()
+        wait_ready(url, server)
+        startup_s = time.perf_counter() - start
+        idle_rss, _ = read_rss_mb(server.pid) if server else (None, None)
+        print(f"준비 완료 ({startup_s:.1f}s), idle RSS: {idle_rss and round(idle_rss)} MB")
+
+        # 워밍업: 첫 요청의 지연 로드/JIT가 결과에 섞이지 않게
+        asyncio.run(run_level(url, "chat", 1, 2, questions, audio, None))
+
+        results = []
+        for scenario in args.scenario:
+            total = args.audio_requests if scenario == "summarize-audio" else args.requests
+            for concurrency in args.concurrency:
+                result = asyncio.run(run_level(url, scenario, concurrency, total, questions, audio,
+                                               server.pid if server else None))
+                results.append(result)
+                print(f"{scenario} x{concurrency}: {result['rps']} rps, p50 {result['p50_ms']} ms")
+        _, max_rss = read_rss_mb(server.pid) if server else (None, None)
+    finally:
+        for process in processes:
+            process.terminate()
+        for process in processes:
+            try:
+                process.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                process.kill()
+
+    print_results(results)
+    print(f"\nstartup {startup_s:.1f}s, idle RSS {idle_rss and round(idle_rss)} MB, max RSS {max_rss and round(max_rss)} MB")
+    if args.compare:
+        compare(results, args.compare)
+
+    if args.save:
+        path = os.path.join(RESULTS_DIR, f"load_{time.strftime('%Y%m%d_%H%M%S')}.json")
+        config = {key: value for key, value in vars(args).items() if key not in ("save", "compare")}
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump({"git_revision": git_revision(), "config": config, "startup_s": round(startup_s, 1),
+                       "idle_rss_mb": idle_rss and round(idle_rss, 1), "max_rss_mb": max_rss and round(max_rss, 1),
+                       "results": results}, f, ensure_ascii=False, indent=2)
+        print(f"\n저장: {path}")
+
+
+if __name__ == "__main__":
+    main()
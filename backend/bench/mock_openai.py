@@ -0,0 +1,102 @@
+# mock_openai.py
+# 부하 테스트용 로컬 OpenAI 호환 서버 (/v1/chat/completions만, 일반 응답 + SSE 스트리밍)
+#   첫 토큰까지 --latency초, 이후 토큰마다 --token-delay초 -> 실제 gpt-4 응답 시간을 흉내 내면서 API 비용 없음
+#   의학 필터 프롬프트에는 "yes", 그 외에는 고정 문장을 --answer-tokens개 토큰으로 나눠서 응답
+# 실행 (backend 폴더에서): python -m bench.mock_openai [--port 8099] [--latency 0.5] [--token-delay 0.02]
+# 서버:                   OPENAI_BASE_URL=http://127.0.0.1:8099/v1 OPENAI_API_KEY=mock uvicorn server:app
+import argparse
+import json
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+ANSWER_WORDS = "증상이 계속되면 가까운 병원에서 진료를 받아보시는 것이 좋습니다. 충분한 휴식과 수분 섭취가 도움이 됩니다.".split()
+
+
+def answer_tokens(messages, count):
+    if any("medical filter" in str(message.get("content", "")) for message in messages):
+        return ["yes"]
+    return [ANSWER_WORDS[i % len(ANSWER_WORDS)] + " " for i in range(count)]
+
+
+def prompt_token_estimate(messages):
+    # 한국어는 대략 글자 2개당 토큰 1개 (정확한 값이 아니라 지표가 0이 아니게 하는 용도)
+    return sum(len(str(message.get("content", ""))) for message in messages) // 2 + 1
+
+
+class MockOpenAIHandler(BaseHTTPRequestHandler):
+    latency = 0.5 # 첫 토큰까지 (초)
+    token_delay = 0.02 # 이후 토큰 간격 (초)
+    answer_tokens = 60
+
+    def do_POST(self):
+        if not self.path.rstrip("/").endswith("/chat/completions"):
+            self.send_error(404)
+            return
+        request = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+        messages = request.get("messages", [])
+        tokens = answer_tokens(messages, self.answer_tokens)
+        usage = {"prompt_tokens": prompt_token_estimate(messages), "completion_tokens": len(tokens)}
+        usage["total_tokens"] = usage["prompt_tokens"] + usage["completion_tokens"]
+        base = {"id": f"chatcmpl-{uuid.uuid4().hex}", "created": int(time.time()), "model": request.get("model", "gpt-4")}
+
+        time.sleep(self.latency)
+        if request.get("stream"):
+            self._stream(base, tokens, usage, (request.get("stream_options") or {}).get("include_usage"))
+            return
+        time.sleep(self.token_delay * (len(tokens) - 1))
+        body = json.dumps({
+            **base, "object": "chat.completion",
+            "choices": [{"index": 0, "message": {"role": "assistant", "content": "".join(tokens).strip()},
+                         "finish_reason": "stop"}],
+            "usage": usage,
+        }).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _stream(self, base, tokens, usage, include_usage):
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.end_headers() # HTTP/1.0: 연결을 닫아서 응답 끝을 알림
+
+        def send_chunk(payload):
+            self.wfile.write(f"data: {json.dumps({**base, 'object': 'chat.completion.chunk', **payload})}\n\n".encode())
+            self.wfile.flush()
+
+        for i, token in enumerate(tokens):
+            if i:
+                time.sleep(self.token_delay)
+            delta = {"role": "assistant", "content": token} if i == 0 else {"content": token}
+            send_chunk({"choices": [{"index": 0, "delta": delta, "finish_reason": None}]})
+        send_chunk({"choices": [{"index": 0, "delta": {}, "finish_reason": "stop"}]})
+        if include_usage:
+            send_chunk({"choices": [], "usage": usage})
+        self.wfile.write(b"data: [DONE]\n\n")
+        self.wfile.flush()
+
+    def log_message(self, format, *args):
+        pass # 요청 로그 생략
+
+
+def serve(port=8099, latency=0.5, token_delay=0.02, tokens=60):
+    MockOpenAIHandler.latency = latency
+    MockOpenAIHandler.token_delay = token_delay
+    MockOpenAIHandler.answer_tokens = tokens
+    server = ThreadingHTTPServer(("127.0.0.1", port), MockOpenAIHandler)
+    server.daemon_threads = True
+    return server
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="로컬 OpenAI 호환 mock 서버")
+    parser.add_argument("--port", type=int, default=8099)
+    parser.add_argument("--latency", type=float, default=0.5, help="첫 토큰까지 지연(초)")
+    parser.add_argument("--token-delay", type=float, default=0.02, help="토큰 간격(초)")
+    parser.add_argument("--answer-tokens", type=int, default=60)
+    args = parser.parse_args()
+    server = serve(args.port, args.latency, args.token_delay, args.answer_tokens)
+    print(f"mock OpenAI: http://127.0.0.1:{args.port}/v1")
+    server.serve_forever()
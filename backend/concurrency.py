@@ -0,0 +1,92 @@
+# concurrency.py
+# 엔드포인트별 동시 실행 수 제한 + 대기열 길이 제한 (backpressure)
+import asyncio
+import os
+import time
+
+from fastapi import HTTPException
+
+
+class EndpointLimiter:
+    """동시에 max_concurrency개까지만 실행하고, 대기열이 max_queue를 넘으면 429로 거절함."""
+
+    def __init__(self, name, max_concurrency, max_queue, retry_after=1):
+        self.name = name
+        self.max_concurrency = max_concurrency
+        self.max_queue = max_queue
+        self.retry_after = retry_after
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self.in_flight = 0
+        self.waiting = 0
+        self.rejected = 0
+        self.completed = 0
+
+    def reject_if_full(self):
+        """대기열이 가득 찼으면 바로 429를 발생시킴."""
+        if self._semaphore.locked() and self.waiting >= self.max_queue:
+            self.rejected += 1
+            raise HTTPException(
+                status_code=429,
+                detail=f"{self.name}: 요청이 많아 잠시 후 다시 시도해주세요.",
+                headers={"Retry-After": str(self.retry_after)},
+            )
+
+    async def acquire(self):
+        self.reject_if_full()
+        self.waiting += 1
+        try:
+            await self._semaphore.acquire()
+        finally:
+            self.waiting -= 1
+        self.in_flight += 1
+
+    def release(self):
+        self.in_flight -= 1
+        self.completed += 1
+        self._semaphore.release()
+
+    async def __aenter__(self):
+        await self.acquire()
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        self.release()
+        return False
+
+    def stats(self):
+        return {
+            "max_concurrency": self.max_concurrency,
+            "max_queue": self.max_queue,
+            "in_flight": self.in_flight,
+            "queue_depth": self.waiting,
+            "rejected": self.rejected,
+            "completed": self.completed,
+        }
+
+
+class AsyncRateLimiter:
+    """작업 시작 간격을 1/rate_per_second초 이상으로 벌림 (rate_per_second <= 0이면 제한 없음)."""
+
+    def __init__(self, rate_per_second):
+        self.interval = 1.0 / rate_per_second if rate_per_second > 0 else 0.0
+        self._next_start = 0.0
+        self._lock = asyncio.Lock()
+
+    async def wait(self):
+        if not self.interval:
+            return
+        async with self._lock:
+            now = time.monotonic()
+            delay = self._next_start - now
+            self._next_start = max(now, self._next_start) + self.interval
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+
+def limiter_from_env(name, prefix, default_concurrency, default_queue):
+    """<PREFIX>_MAX_CONCURRENCY / <PREFIX>_MAX_QUEUE 환경변수로 설정값을 덮어쓸 수 있음."""
+    return EndpointLimiter(
+        name,
+        max_concurrency=int(os.getenv(f"{prefix}_MAX_CONCURRENCY", default_concurrency)),
+        max_queue=int(os.getenv(f"{prefix}_MAX_QUEUE", default_queue)),
+    )
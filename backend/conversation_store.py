@@ -0,0 +1,122 @@
+# conversation_store.py
+# 세션별 대화 기록 저장소 ({"summary": 이전 대화 요약, "turns": [{"role", "content"}, ...]})
+# 두 저장소 모두 같은 메서드를 제공함: get(session_id), put(session_id, session), delete(session_id), __len__()
+# 마지막 사용 후 ttl_seconds가 지난 세션은 없는 것으로 보고, 세션 수가 max_sessions를 넘으면 오래된 것부터 삭제
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+
+ROLE_NAMES = {"user": "사용자", "assistant": "도우미"}
+
+
+def new_session():
+    return {"summary": "", "turns": []}
+
+
+def format_turns(turns):
+    return "\n".join(f"{ROLE_NAMES[turn['role']]}: {turn['content']}" for turn in turns)
+
+
+def format_history(session):
+    """프롬프트에 넣을 대화 기록 텍스트 (없으면 빈 문자열)."""
+    if not session or not (session["summary"] or session["turns"]):
+        return ""
+    parts = []
+    if session["summary"]:
+        parts.append(f"이전 대화 요약: {session['summary']}")
+    if session["turns"]:
+        parts.append(format_turns(session["turns"]))
+    return "\n".join(parts)
+
+
+class InMemoryConversationStore:
+    """프로세스 메모리에 저장하는 LRU (서버 재시작 시 사라짐)."""
+
+    def __init__(self, max_sessions=1000, ttl_seconds=86400):
+        self.max_sessions = max_sessions
+        self.ttl_seconds = ttl_seconds
+        self._sessions = OrderedDict() # session_id -> (session, updated_at)
+        self._lock = threading.Lock()
+
+    def get(self, session_id):
+        with self._lock:
+            entry = self._sessions.get(session_id)
+            if entry is None:
+                return None
+            session, updated_at = entry
+            if time.time() - updated_at > self.ttl_seconds:
+                del self._sessions[session_id]
+                return None
+            self._sessions.move_to_end(session_id)
+            return json.loads(json.dumps(session)) # 호출한 쪽에서 고쳐도 저장본은 그대로
+
+    def put(self, session_id, session):
+        with self._lock:
+            self._sessions[session_id] = (session, time.time())
+            self._sessions.move_to_end(session_id)
+            while len(self._sessions) > self.max_sessions:
+                self._sessions.popitem(last=False)
+
+    def delete(self, session_id):
+        with self._lock:
+            self._sessions.pop(session_id, None)
+
+    def __len__(self):
+        return len(self._sessions)
+
+
+class SQLiteConversationStore:
+    """디스크(SQLite)에 저장. 서버 재시작/여러 워커 간에도 대화가 이어짐."""
+
+    def __init__(self, path="conversations.sqlite3", max_sessions=1000, ttl_seconds=86400):
+        self.max_sessions = max_sessions
+        self.ttl_seconds = ttl_seconds
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("CREATE TABLE IF NOT EXISTS sessions (session_id TEXT PRIMARY KEY, data TEXT, updated_at REAL)")
+        self._conn.commit()
+
+    def get(self, session_id):
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT data, updated_at FROM sessions WHERE session_id = ?", (session_id,)
+            ).fetchone()
+        if row is None or time.time() - row[1] > self.ttl_seconds:
+            return None
+        return json.loads(row[0])
+
+    def put(self, session_id, session):
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO sessions VALUES (?, ?, ?)",
+                (session_id, json.dumps(session, ensure_ascii=False), time.time()),
+            )
+            # 만료된 세션과 개수 제한을 넘은 오래된 세션 삭제
+            self._conn.execute("DELETE FROM sessions WHERE updated_at < ?", (time.time() - self.ttl_seconds,))
+            self._conn.execute(
+                "DELETE FROM sessions WHERE session_id IN "
+                "(SELECT session_id FROM sessions ORDER BY updated_at DESC LIMIT -1 OFFSET ?)", (self.max_sessions,)
+            )
+            self._conn.commit()
+
+    def delete(self, session_id):
+        with self._lock:
+            self._conn.execute("DELETE FROM sessions WHERE session_id = ?", (session_id,))
+            self._conn.commit()
+
+    def __len__(self):
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM sessions").fetchone()[0]
+
+
+def store_from_env():
+    """CONVERSATION_* 환경변수로 저장소 생성."""
+    max_sessions = int(os.getenv("CONVERSATION_MAX_SESSIONS", "1000"))
+    ttl_seconds = float(os.getenv("CONVERSATION_TTL", "86400"))
+    if os.getenv("CONVERSATION_BACKEND", "memory") == "sqlite":
+        return SQLiteConversationStore(os.getenv("CONVERSATION_PATH", "conversations.sqlite3"), max_sessions, ttl_seconds)
+    return InMemoryConversationStore(max_sessions, ttl_seconds)
@@ -0,0 +1,112 @@
+# corpus_io.py
+# 크롤링 코퍼스 입출력 (한 줄에 문서 하나인 JSONL, .zst 확장자면 zstd 압축)
+#   - read_corpus(path)  : 문서를 한 줄씩 읽는 제너레이터 (전체를 메모리에 올리지 않음)
+#   - CorpusWriter(path) : 문서를 하나씩 바로 기록 (with 문으로 사용)
+#   - 예전 형식(.json, 문서 배열 하나)도 읽을 수 있음 -> 아래 변환기로 JSONL로 바꾸는 것을 권장
+# 변환 실행: python corpus_io.py amc_health_info_all_categories_rag_data.json amc_health_info_all_categories_rag_data.jsonl[.zst]
+import io
+import json
+import os
+
+LEGACY_CORPUS_PATH = "amc_health_info_all_categories_rag_data.json"
+CORPUS_PATH = "amc_health_info_all_categories_rag_data.jsonl"
+
+
+def _is_zstd(path):
+    return path.endswith(".zst")
+
+
+def _open_text(path, mode):
+    """mode는 "r" 또는 "w". .zst면 zstandard 스트림으로 감싸서 텍스트로 읽고 씀."""
+    if not _is_zstd(path):
+        return open(path, mode, encoding="utf-8")
+    try:
+        import zstandard
+    except ImportError:
+        raise RuntimeError("zstd 압축 코퍼스를 쓰려면 `pip install zstandard`가 필요합니다.")
+    raw = open(path, mode + "b")
+    if mode == "r":
+        stream = zstandard.ZstdDecompressor().stream_reader(raw, closefd=True)
+    else:
+        stream = zstandard.ZstdCompressor(level=10).stream_writer(raw, closefd=True)
+    return io.TextIOWrapper(stream, encoding="utf-8")
+
+
+def resolve_corpus_path(path=None):
+    """경로를 안 주면 JSONL 코퍼스를, 없으면 예전 JSON 파일을 사용."""
+    if path:
+        return path
+    for candidate in (CORPUS_PATH, CORPUS_PATH + ".zst", LEGACY_CORPUS_PATH):
+        if os.path.exists(candidate):
+            return candidate
+    return CORPUS_PATH
+
+
+def read_corpus(path):
+    """문서(dict)를 하나씩 yield. 빈 줄은 건너뜀."""
+    if path.endswith(".json"):
+        # 예전 형식: 배열 전체를 한 번에 읽어야 함 (스트리밍 아님)
+        with open(path, "r", encoding="utf-8") as f:
+            yield from json.load(f)
+        return
+    with _open_text(path, "r") as f:
+        for line_number, line in enumerate(f, 1):
+            if not line.strip():
+                continue
+            try:
+                yield json.loads(line)
+            except json.JSONDecodeError as e:
+                raise ValueError(f"{path}:{line_number}: 잘못된 JSON 줄 ({e})") from e
+
+
+class CorpusWriter:
+    """문서를 한 줄씩 기록. 임시 파일에 쓰고 close 시 이름을 바꿔서 읽는 쪽이 반쯤 쓰인 파일을 보지 않게 함."""
+
+    def __init__(self, path):
+        self.path = path
+        self.count = 0
+        self._tmp_path = path + ".tmp"
+        self._file = _open_text(self._tmp_path, "w")
+
+    def write(self, document):
+        self._file.write(json.dumps(document, ensure_ascii=False) + "\n")
+        self.count += 1
+
+    def close(self):
+        self._file.close()
+        os.replace(self._tmp_path, self.path)
+
+    def abort(self):
+        self._file.close()
+        os.remove(self._tmp_path)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+
+
+def write_corpus(path, documents):
+    """documents(이터러블)를 기록하고 문서 수를 반환. .json 경로면 예전 배열 형식으로 저장."""
+    if path.endswith(".json"):
+        documents = list(documents)
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(documents, f, ensure_ascii=False, indent=2)
+        return len(documents)
+    with CorpusWriter(path) as writer:
+        for document in documents:
+            writer.write(document)
+    return writer.count
+
+
+if __name__ == "__main__":
+    import sys
+
+    source = sys.argv[1] if len(sys.argv) > 1 else LEGACY_CORPUS_PATH
+    target = sys.argv[2] if len(sys.argv) > 2 else CORPUS_PATH
+    count = write_corpus(target, read_corpus(source))
+    print(f"변환 완료: {source} -> {target} ({count} documents, {os.path.getsize(target) / 1e6:.1f} MB)")
@@ -0,0 +1,144 @@
+# crawl_scheduler.py
+# 크롤링 작업 스케줄러
+#   - HostRateLimiter : 호스트별 최소 요청 간격을 지키는 politeness 제한 (고정 sleep 대체)
+#   - CrawlCheckpoint : 끝난 작업을 JSONL로 바로 기록 -> 중단돼도 이어서 크롤링 가능
+#   - CrawlScheduler  : 워커 스레드 풀 (스레드마다 자기 WebDriver를 필요할 때 생성)
+import json
+import os
+import threading
+import time
+import traceback
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from urllib.parse import urlparse
+
+CRAWL_MIN_INTERVAL = float(os.getenv("CRAWL_MIN_INTERVAL", "1.0")) # 같은 호스트 요청 간 최소 간격(초)
+CRAWL_WORKERS = int(os.getenv("CRAWL_WORKERS", "4"))
+
+
+class HostRateLimiter:
+    """호스트마다 min_interval초에 한 번씩만 요청이 나가도록 순번(slot)을 예약함."""
+
+    def __init__(self, min_interval=CRAWL_MIN_INTERVAL):
+        self.min_interval = min_interval
+        self._next_slot = {}
+        self._lock = threading.Lock()
+
+    def wait(self, url):
+        host = urlparse(url).netloc
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next_slot.get(host, 0.0))
+            self._next_slot[host] = slot + self.min_interval
+        delay = slot - now
+        if delay > 0:
+            time.sleep(delay)
+
+
+class CrawlCheckpoint:
+    """크롤링 진행 상황을 디스크에 남기는 체크포인트.
+
+    lists.jsonl     : 카테고리별로 수집이 끝난 목록 (상세 페이지 링크들)
+    documents.jsonl : 크롤링이 끝난 RAG 문서 (한 줄에 하나)
+    """
+
+    def __init__(self, directory):
+        os.makedirs(directory, exist_ok=True)
+        self.lists_path = os.path.join(directory, "lists.jsonl")
+        self.documents_path = os.path.join(directory, "documents.jsonl")
+        self._lock = threading.Lock()
+        self.lists = {record["category"]: record["items"] for record in self._read(self.lists_path)}
+        self.documents = {self.document_key(doc["metadata"]["category"], doc["metadata"]["source_url"]): doc
+                          for doc in self._read(self.documents_path)}
+
+    @staticmethod
+    def document_key(category, url):
+        return f"{category}\t{url}"
+
+    @staticmethod
+    def _read(path):
+        if not os.path.exists(path):
+            return []
+        records = []
+        with open(path, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    records.append(json.loads(line))
+                except json.JSONDecodeError:
+                    pass # 중단 시점에 반쯤 쓰인 마지막 줄은 무시
+        return records
+
+    def _append(self, path, record):
+        with open(path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(record, ensure_ascii=False) + "\n")
+            f.flush()
+
+    def record_list(self, category, items):
+        with self._lock:
+            self._append(self.lists_path, {"category": category, "items": items})
+            self.lists[category] = items
+
+    def record_document(self, doc):
+        key = self.document_key(doc["metadata"]["category"], doc["metadata"]["source_url"])
+        with self._lock:
+            self._append(self.documents_path, doc)
+            self.documents[key] = doc
+
+    def drop_documents(self, predicate):
+        """predicate가 참인 문서를 복원 목록에서 빼서 다시 크롤링되게 함. 뺀 개수를 반환."""
+        with self._lock:
+            keys = [key for key, doc in self.documents.items() if predicate(doc)]
+            for key in keys:
+                del self.documents[key]
+        return len(keys)
+
+    def has_document(self, category, url):
+        return self.document_key(category, url) in self.documents
+
+
+class CrawlScheduler:
+    """작업 목록을 워커 스레드 풀로 처리. 작업 함수는 (task, driver)를 받음.
+
+    driver는 스레드마다 처음 요청할 때 driver_factory로 만들고, run()이 끝나면 모두 종료함.
+    """
+
+    def __init__(self, driver_factory, num_workers=CRAWL_WORKERS, rate_limiter=None):
+        self.driver_factory = driver_factory
+        self.num_workers = num_workers
+        self.rate_limiter = rate_limiter or HostRateLimiter()
+        self._local = threading.local()
+        self._drivers = []
+        self._drivers_lock = threading.Lock()
+
+    def get_driver(self):
+        driver = getattr(self._local, "driver", None)
+        if driver is None:
+            driver = self.driver_factory()
+            self._local.driver = driver
+            with self._drivers_lock:
+                self._drivers.append(driver)
+        return driver
+
+    def run(self, tasks, work_fn, on_result):
+        """tasks를 병렬로 처리하고, 끝나는 순서대로 on_result(task, result)를 호출 (메인 스레드)."""
+        failed = 0
+        with ThreadPoolExecutor(max_workers=self.num_workers, thread_name_prefix="crawler") as executor:
+            futures = {executor.submit(work_fn, task, self): task for task in tasks}
+            for future in as_completed(futures):
+                task = futures[future]
+                try:
+                    on_result(task, future.result())
+                except Exception as e:
+                    failed += 1
+                    print(f"  Task failed ({task}): {e}")
+                    traceback.print_exc()
+        return failed
+
+    def close(self):
+        with self._drivers_lock:
+            for driver in self._drivers:
+                try:
+                    driver.quit()
+                except Exception:
+                    pass
+            self._drivers.clear()
+        self._local = threading.local()
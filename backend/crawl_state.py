@@ -0,0 +1,122 @@
+# crawl_state.py
+# 재크롤링용 상태 저장소 (SQLite, 실행 간에 유지)
+#   문서(카테고리 + URL)마다 ETag / Last-Modified / 내용 해시 / 마지막 확인 시각 / 문서 본문을 저장
+#   -> 다음 실행에서 조건부 요청(If-None-Match, If-Modified-Since)을 보내고, 304면 저장된 문서를 그대로 씀
+#   -> 실행이 끝나면 이전 상태와 비교해서 추가/변경/삭제된 문서만 delta JSONL로 기록
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+
+CRAWL_STATE_PATH = "crawl_state.sqlite3"
+DELTA_OPS = ("added", "changed", "removed")
+
+
+def content_hash(content):
+    return hashlib.sha256(content.encode("utf-8")).hexdigest()
+
+
+class CrawlState:
+    def __init__(self, path=CRAWL_STATE_PATH):
+        self._conn = sqlite3.connect(path, check_same_thread=False) # 워커 스레드에서도 조회
+        self._lock = threading.Lock()
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS documents ("
+            " doc_key TEXT PRIMARY KEY, url TEXT, category TEXT, etag TEXT, last_modified TEXT,"
+            " content_hash TEXT, document TEXT, last_seen REAL)"
+        )
+        self._conn.commit()
+
+    def get(self, doc_key):
+        """(etag, last_modified, 저장된 문서) 또는 None."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT etag, last_modified, document FROM documents WHERE doc_key = ?", (doc_key,)
+            ).fetchone()
+        if row is None:
+            return None
+        etag, last_modified, document = row
+        return etag, last_modified, json.loads(document)
+
+    def apply_run(self, documents, crawled_categories, key_fn):
+        """이번 실행 결과를 저장하고 delta 레코드 리스트를 반환.
+
+        documents          : (문서, fetch_info) 리스트. fetch_info는 {"etag", "last_modified", "failed"} 또는 None
+        crawled_categories : 목록 수집에 성공한 카테고리 (여기 속한 문서만 삭제 판정)
+        key_fn             : (category, url) -> doc_key
+        """
+        now = time.time()
+        delta = []
+        seen_keys = set()
+        with self._lock:
+            stored = {key: (url, category, digest) for key, url, category, digest in self._conn.execute(
+                "SELECT doc_key, url, category, content_hash FROM documents"
+            )}
+            for doc, fetch_info in documents:
+                fetch_info = fetch_info or {}
+                metadata = doc["metadata"]
+                key = key_fn(metadata["category"], metadata["source_url"])
+                seen_keys.add(key)
+                if fetch_info.get("failed"):
+                    # 이번에 받기 실패한 문서는 예전 내용을 유지 (다음 실행에서 다시 시도)
+                    # 처음 보는 문서면 오류 문구가 색인되지 않도록 저장/delta 모두 건너뜀
+                    if key in stored:
+                        self._conn.execute("UPDATE documents SET last_seen = ? WHERE doc_key = ?", (now, key))
+                    continue
+                digest = content_hash(doc["content"])
+                if key not in stored:
+                    delta.append({"op": "added", "document": doc})
+                elif stored[key][2] != digest:
+                    delta.append({"op": "changed", "document": doc})
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO documents VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                    (key, metadata["source_url"], metadata["category"], fetch_info.get("etag"),
+                     fetch_info.get("last_modified"), digest, json.dumps(doc, ensure_ascii=False), now),
+                )
+
+            removed = [(key, url, category) for key, (url, category, _) in stored.items()
+                       if category in crawled_categories and key not in seen_keys]
+            self._conn.executemany("DELETE FROM documents WHERE doc_key = ?", [(key,) for key, _, _ in removed])
+            # 같은 URL이 다른 카테고리에 남아 있으면 인덱스에서는 지우지 않음 (청크는 URL 기준으로 중복 제거됨)
+            remaining_urls = {row[0] for row in self._conn.execute("SELECT url FROM documents")}
+            for key, url, category in removed:
+                if url not in remaining_urls:
+                    delta.append({"op": "removed", "document": {"metadata": {"source_url": url, "category": category}}})
+            self._conn.commit()
+        return delta
+
+    def __len__(self):
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM documents").fetchone()[0]
+
+
+def corpus_documents(fetched, key_fn, state=None):
+    """전체 코퍼스 파일에 쓸 문서 리스트.
+
+    fetched: (문서, fetch_info) 리스트. 이번에 받기 실패한 문서는 상태 DB에 저장된 예전 내용으로 대체하고,
+    예전 내용이 없으면 뺌 (오류 문구가 코퍼스에 들어가서 좋은 청크를 덮어쓰지 않도록)
+    """
+    documents = []
+    for doc, fetch_info in fetched:
+        if not (fetch_info or {}).get("failed"):
+            documents.append(doc)
+            continue
+        previous = state.get(key_fn(doc["metadata"]["category"], doc["metadata"]["source_url"])) if state else None
+        if previous is not None:
+            documents.append(previous[2])
+    return documents
+
+    def close(self):
+        self._conn.close()
+
+
+def write_delta(path, delta):
+    with open(path, "w", encoding="utf-8") as f:
+        for record in delta:
+            f.write(json.dumps(record, ensure_ascii=False) + "\n")
+
+
+def read_delta(path):
+    with open(path, "r", encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
@@ -1,13 +1,31 @@
 # embed_store.py
+# 증분 인덱싱: 청크마다 내용 해시(source_url + chunk_index + text)를 만들고,
+# 인덱스 옆 manifest.json과 비교해서 새로 생기거나 바뀐 청크만 임베딩함
+# 코퍼스(JSONL)를 한 줄씩 읽어 청킹 -> segment_size개씩 임베딩하는 제너레이터 파이프라인
+# 실행: python embed_store_chunk.py [--full] [--data amc_health_info_all_categories_rag_data.jsonl]
+#       python embed_store_chunk.py --delta amc_health_info_delta.jsonl  (크롤러가 만든 변경분만 반영)
 from langchain_community.vectorstores import FAISS
-from langchain_community.embeddings import SentenceTransformerEmbeddings 
+from mmap_docstore import load_vector_store, save_vector_store
+from langchain_community.docstore.in_memory import InMemoryDocstore
 from langchain_core.documents import Document
 from langchain.text_splitter import RecursiveCharacterTextSplitter
+from embedding_pipeline import embed_texts, IndexOnlyEmbeddings, EMBED_BATCH_SIZE, EMBED_WORKERS
+from faiss_index import build_index, supports_remove, remove_documents, add_documents, INDEX_TYPES, FAISS_INDEX_TYPE
+from crawl_state import read_delta
+from corpus_io import read_corpus, resolve_corpus_path
+from sparse_index import build_from_vector_store
+from atomic_io import atomic_open
+import argparse
+import hashlib
+import itertools
 import json
+import os
+import time
 
-# json 로딩
-with open("amc_health_info_all_categories_rag_data.json", "r", encoding="utf-8") as f:
-    raw_data = json.load(f)
+EMBEDDING_MODEL_NAME = "jhgan/ko-sbert-nli" # 한국어 최적화 모델
+db_path = "faiss_amc_db_chunked" # 새로운 DB 경로/이름
+MANIFEST_NAME = "manifest.json" # 인덱스에 들어있는 청크 목록 (chunk_id -> 출처 정보)
+EMBED_SEGMENT_SIZE = int(os.getenv("EMBED_SEGMENT_SIZE", "20000")) # 한 번에 임베딩해서 인덱스에 넣을 청크 수
 
 text_splitter = RecursiveCharacterTextSplitter(
     chunk_size=700, # 각 청크의 최대 크기
@@ -16,29 +34,247 @@ text_splitter = RecursiveCharacterTextSplitter(
     is_separator_regex=False # 구분자가 정규 표현식이 아닌 경우
 )
 
-all_chunked_documents = [] # 청킹된 모든 문서를 담을 리스트
-for item in raw_data:
-    # 각 항목에서 content와 metadata 추출
-    content = item.get("content", "")
-    metadata_original = item.get("metadata", {}) 
 
-    chunks = text_splitter.split_text(content)
-    for i, chunk_content in enumerate(chunks):
-        # 각 청크에 대한 Document 객체 생성
-        # 메타데이터에 청크 정보 추가 기능
-        chunk_metadata = metadata_original.copy() # 원본 메타데이터를 복사하여 수정
-        chunk_metadata["chunk_index"] = i
-        
-        all_chunked_documents.append(Document(page_content=chunk_content, metadata=chunk_metadata)) 
+def make_chunk_id(source_url, chunk_index, text):
+    # 내용이 같으면 항상 같은 id -> 바뀌지 않은 청크는 다시 임베딩하지 않음
+    key = f"{source_url}\x00{chunk_index}\x00{text}"
+    return hashlib.sha256(key.encode("utf-8")).hexdigest()
 
-# 임베딩 + 벡터 저장
-embedding_model = SentenceTransformerEmbeddings(model_name="jhgan/ko-sbert-nli") # 한국어 최적화 모델
 
-db = FAISS.from_documents(all_chunked_documents, embedding_model) 
+def iter_chunks(raw_data):
+    """문서 이터러블을 받아 청크 Document를 하나씩 yield (코퍼스 전체를 메모리에 두지 않음)."""
+    seen_ids = set()
+    for item in raw_data:
+        # 각 항목에서 content와 metadata 추출
+        content = item.get("content", "")
+        metadata_original = item.get("metadata", {})
+
+        chunks = text_splitter.split_text(content)
+        for i, chunk_content in enumerate(chunks):
+            # 각 청크에 대한 Document 객체 생성
+            # 메타데이터에 청크 정보 추가 기능
+            chunk_metadata = metadata_original.copy() # 원본 메타데이터를 복사하여 수정
+            chunk_metadata["chunk_index"] = i
+            chunk_id = make_chunk_id(chunk_metadata.get("source_url"), i, chunk_content)
+            # 같은 글이 여러 카테고리에 중복 수집된 경우 한 번만 인덱싱
+            if chunk_id in seen_ids:
+                continue
+            seen_ids.add(chunk_id)
+            chunk_metadata["chunk_id"] = chunk_id
+
+            yield Document(page_content=chunk_content, metadata=chunk_metadata)
+
+
+def chunk_documents(raw_data):
+    return list(iter_chunks(raw_data))
+
+
+def iter_segments(iterable, size):
+    iterator = iter(iterable)
+    while True:
+        segment = list(itertools.islice(iterator, size))
+        if not segment:
+            return
+        yield segment
+
+
+def load_manifest(path):
+    manifest_path = os.path.join(path, MANIFEST_NAME)
+    if not os.path.exists(manifest_path):
+        return None
+    with open(manifest_path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def manifest_chunks(documents):
+    return {
+        doc.metadata["chunk_id"]: {
+            "source_url": doc.metadata.get("source_url"),
+            "chunk_index": doc.metadata["chunk_index"],
+        }
+        for doc in documents
+    }
+
+
+def save_manifest(path, chunks, index_type):
+    manifest = {
+        "embedding_model": EMBEDDING_MODEL_NAME,
+        "index_type": index_type,
+        "chunks": chunks,
+    }
+    with atomic_open(os.path.join(path, MANIFEST_NAME)) as f: # 인덱스 파일을 모두 바꾼 뒤 마지막에 교체
+        json.dump(manifest, f, ensure_ascii=False)
+
+
+def embed_documents(documents, args):
+    vectors, report = embed_texts(
+        [doc.page_content for doc in documents],
+        EMBEDDING_MODEL_NAME,
+        batch_size=args.batch_size,
+        num_workers=args.workers,
+        out_path=args.memmap,
+    )
+    print(f"임베딩: {report['docs']}개 / {report['seconds']}s "
+          f"({report['docs_per_sec']} docs/sec, workers={report['workers']}, peak RSS {report['peak_rss']})")
+    return vectors
+
+
+def build_full(chunks, args):
+    """청크 이터러블을 segment_size개씩 임베딩해서 인덱스에 추가. (db, manifest chunks) 반환.
+
+    첫 구간으로 인덱스를 만들고(IVF/PQ는 이 구간으로 학습) 이후 구간은 추가만 함
+    -> 원본 코퍼스와 전체 임베딩 배열을 한꺼번에 메모리에 올리지 않음.
+    """
+    db = None
+    chunks_info = {}
+    for segment in iter_segments(chunks, args.segment_size):
+        vectors = embed_documents(segment, args)
+        ids = [doc.metadata["chunk_id"] for doc in segment]
+        if db is None:
+            # 임베딩 배열로 바로 인덱스 학습 + 추가 (Document -> 임베딩 리스트 변환 과정 없음)
+            db = FAISS(
+                embedding_function=IndexOnlyEmbeddings(),
+                index=build_index(args.index_type, vectors),
+                docstore=InMemoryDocstore(dict(zip(ids, segment))),
+                index_to_docstore_id=dict(enumerate(ids)),
+            )
+        else:
+            add_documents(db, vectors, segment, ids)
+        chunks_info.update(manifest_chunks(segment))
+        print(f"  {len(chunks_info)}개 청크 인덱싱됨")
+    if db is None:
+        raise SystemExit("코퍼스에 문서가 없습니다.")
+    return db, chunks_info
+
+
+def update_incremental(load_chunks, manifest, args):
+    """manifest와 비교해서 바뀐 부분만 반영. (db, manifest chunks, 추가된 청크 수, 삭제된 청크 수) 반환.
+
+    load_chunks: 호출할 때마다 새 청크 제너레이터를 돌려주는 함수 (전체 재구축이 필요하면 한 번 더 읽음)
+    """
+    db = load_vector_store(db_path, IndexOnlyEmbeddings(), use_mmap=False)
+    indexed_ids = set(manifest["chunks"])
+    chunks_info = {}
+    to_add = []
+    for doc in load_chunks():
+        chunks_info.update(manifest_chunks([doc]))
+        if doc.metadata["chunk_id"] not in indexed_ids:
+            to_add.append(doc)
+
+    # 내용이 바뀐 청크는 id도 바뀌므로 "예전 id 삭제 + 새 id 추가"로 처리됨
+    to_remove = [chunk_id for chunk_id in indexed_ids if chunk_id not in chunks_info]
+
+    if to_remove and not supports_remove(db.index):
+        print("HNSW 인덱스는 삭제를 지원하지 않아 전체 재구축합니다.")
+        db, chunks_info = build_full(load_chunks(), args)
+        return db, chunks_info, len(to_add), len(to_remove)
+    apply_changes(db, to_remove, to_add, args)
+    return db, chunks_info, len(to_add), len(to_remove)
+
+
+def apply_changes(db, to_remove, to_add, args):
+    if to_remove:
+        try:
+            remove_documents(db, to_remove) # FAISS index.remove_ids
+        except RuntimeError as e:
+            raise SystemExit(f"{e} --full로 다시 실행하세요.")
+    if to_add:
+        vectors = embed_documents(to_add, args)
+        add_documents(db, vectors, to_add, [doc.metadata["chunk_id"] for doc in to_add])
+
+
+def update_from_delta(delta, manifest, args):
+    """크롤러 delta(added/changed/removed 문서)만 반영. (db, 새 manifest chunks, 추가 수, 삭제 수) 반환.
+
+    전체 JSON을 다시 읽고 청킹하지 않음. 바뀌거나 삭제된 URL의 청크는 모두 지우고, 새 내용을 청킹해서 추가.
+    """
+    db = load_vector_store(db_path, IndexOnlyEmbeddings(), use_mmap=False)
+    stale_urls = {record["document"]["metadata"]["source_url"] for record in delta
+                  if record["op"] in ("changed", "removed")}
+    to_remove = [chunk_id for chunk_id, info in manifest["chunks"].items() if info["source_url"] in stale_urls]
+    kept_ids = set(manifest["chunks"]) - set(to_remove)
+    new_documents = chunk_documents([record["document"] for record in delta if record["op"] in ("added", "changed")])
+    # 다른 카테고리에 같은 글이 이미 인덱싱되어 있으면 건너뜀
+    to_add = [doc for doc in new_documents if doc.metadata["chunk_id"] not in kept_ids]
+
+    if to_remove and not supports_remove(db.index):
+        raise SystemExit("HNSW 인덱스는 삭제를 지원하지 않습니다. --delta 없이 전체 데이터로 실행하세요.")
+    apply_changes(db, to_remove, to_add, args)
+    chunks = {chunk_id: info for chunk_id, info in manifest["chunks"].items() if chunk_id in kept_ids}
+    chunks.update(manifest_chunks(to_add))
+    return db, chunks, len(to_add), len(to_remove)
+
+
+def save_sparse_index(db):
+    # BM25 색인은 임베딩이 필요 없으므로 매번 전체 청크로 다시 만듦 (idf/평균 길이가 전체 기준이라)
+    start = time.perf_counter()
+    sparse = build_from_vector_store(db)
+    sparse.save(db_path)
+    print(f"BM25 색인 저장: {len(sparse.vocab)} terms ({time.perf_counter() - start:.1f}s)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="FAISS 벡터 DB 생성/증분 업데이트")
+    parser.add_argument("--full", action="store_true", help="manifest를 무시하고 전체 재구축")
+    parser.add_argument("--batch-size", type=int, default=EMBED_BATCH_SIZE, help="임베딩 배치 크기")
+    parser.add_argument("--workers", type=int, default=EMBED_WORKERS, help="임베딩 워커 프로세스 수")
+    parser.add_argument("--index-type", choices=INDEX_TYPES, default=FAISS_INDEX_TYPE,
+                        help="FAISS 인덱스 종류 (바꾸면 전체 재구축)")
+    parser.add_argument("--memmap", default=None, help="임베딩을 기록할 .npy memmap 파일 경로 (기본: 메모리)")
+    parser.add_argument("--data", default=None,
+                        help="코퍼스 파일 (.jsonl, .jsonl.zst 또는 예전 .json, 기본: 있는 것 중 JSONL 우선)")
+    parser.add_argument("--segment-size", type=int, default=EMBED_SEGMENT_SIZE,
+                        help="한 번에 임베딩해서 인덱스에 추가할 청크 수 (메모리 상한)")
+    parser.add_argument("--delta", default=None, help="크롤러가 만든 delta JSONL (전체 JSON 대신 변경분만 반영)")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+
+    manifest = load_manifest(db_path)
+    can_update = (
+        not args.full
+        and manifest is not None
+        and manifest.get("embedding_model") == EMBEDDING_MODEL_NAME
+        and manifest.get("index_type", "Flat") == args.index_type
+        and os.path.exists(os.path.join(db_path, "index.faiss"))
+    )
+
+    if args.delta:
+        if not can_update:
+            raise SystemExit("delta를 적용할 기존 인덱스가 없거나 모델/인덱스 종류가 다릅니다. --delta 없이 실행하세요.")
+        delta = read_delta(args.delta)
+        db, chunks, added, removed = update_from_delta(delta, manifest, args)
+        save_vector_store(db, db_path)
+        save_sparse_index(db)
+        save_manifest(db_path, chunks, args.index_type)
+        print(f"delta 반영 ({len(delta)}개 문서 변경): 추가 {added}개, 삭제 {removed}개 청크")
+        print(f"FAISS 벡터 DB (청크됨) 저장 완료: {db_path} ({time.perf_counter() - start:.1f}s)")
+        print(f"Total chunked documents: {len(chunks)}")
+        return
+
+    # 코퍼스를 한 줄씩 읽어서 청킹 (제너레이터)
+    data_path = resolve_corpus_path(args.data)
+    print(f"코퍼스: {data_path}")
+
+    def load_chunks():
+        return iter_chunks(read_corpus(data_path))
+
+    if can_update:
+        db, chunks, added, removed = update_incremental(load_chunks, manifest, args)
+        print(f"증분 업데이트: 추가 {added}개, 삭제 {removed}개 청크")
+    else:
+        # manifest가 없는 예전 인덱스이거나 모델/인덱스 종류가 바뀐 경우 전체 재구축
+        print(f"전체 재구축 ({args.index_type}): 모든 청크를 임베딩합니다.")
+        db, chunks = build_full(load_chunks(), args)
+
+    # 로컬에 저장 (pickle 대신 mmap 가능한 docstore 형식)
+    save_vector_store(db, db_path)
+    save_sparse_index(db) # 같은 청크로 키워드 검색용 BM25 색인 (하이브리드 검색)
+    save_manifest(db_path, chunks, args.index_type)
+
+    print(f"FAISS 벡터 DB (청크됨) 저장 완료: {db_path} ({time.perf_counter() - start:.1f}s)")
+    print(f"Total chunked documents: {len(chunks)}") # 인덱스의 총 청크 수 확인
 
-# 로컬에 저장 (파일명 변경 권장)
-db_path = "faiss_amc_db_chunked" # 새로운 DB 경로/이름
-db.save_local(db_path) 
 
-print(f"FAISS 벡터 DB (청크됨) 저장 완료: {db_path}")
-print(f"Total chunked documents created: {len(all_chunked_documents)}") # 생성된 총 청크 수 확인
\ No newline at end of file
+if __name__ == "__main__":
+    main()
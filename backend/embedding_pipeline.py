@@ -0,0 +1,132 @@
+# embedding_pipeline.py
+# 코퍼스 인덱싱용 배치 임베딩 파이프라인
+# - 길이 순으로 정렬해서 배치를 만들어 패딩 낭비를 줄임
+# - 여러 워커 프로세스가 각자 SentenceTransformer 모델을 들고 배치를 나눠 처리
+#   (모델/워커 풀은 프로세스 안에서 재사용 -> 구간마다 embed_texts를 불러도 모델을 다시 로드하지 않음)
+# - 결과는 미리 할당한 float32 배열(또는 memmap 파일)의 원래 위치에 바로 기록
+import atexit
+import multiprocessing
+import os
+import resource
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+EMBED_BATCH_SIZE = int(os.getenv("EMBED_BATCH_SIZE", "64"))
+EMBED_WORKERS = int(os.getenv("EMBED_WORKERS", "0")) or min(4, os.cpu_count() or 1)
+
+_worker_model = None
+_worker_model_name = None
+_pools = {} # (model_name, num_workers) -> ProcessPoolExecutor
+
+
+def _init_worker(model_name, torch_threads):
+    # 워커마다 모델을 한 번만 로드 (torch 스레드 수는 코어를 워커끼리 나눠 씀)
+    global _worker_model, _worker_model_name
+    if _worker_model is not None and _worker_model_name == model_name:
+        return
+    import torch
+    from sentence_transformers import SentenceTransformer
+    torch.set_num_threads(torch_threads)
+    _worker_model = SentenceTransformer(model_name)
+    _worker_model_name = model_name
+
+
+def _encode_batch(positions, texts):
+    vectors = _worker_model.encode(texts, batch_size=len(texts), convert_to_numpy=True)
+    # 워커 풀은 계속 살아 있으므로(RUSAGE_CHILDREN에 잡히지 않음) 워커가 자기 최대 RSS를 같이 보냄
+    return positions, vectors.astype(np.float32, copy=False), resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+
+def _get_pool(model_name, num_workers):
+    pool = _pools.get((model_name, num_workers))
+    if pool is None:
+        pool = ProcessPoolExecutor(
+            max_workers=num_workers,
+            mp_context=multiprocessing.get_context("spawn"), # torch는 fork와 궁합이 나쁨
+            initializer=_init_worker,
+            initargs=(model_name, max(1, (os.cpu_count() or 1) // num_workers)),
+        )
+        _pools[(model_name, num_workers)] = pool
+    return pool
+
+
+@atexit.register
+def shutdown_workers():
+    """재사용 중인 워커 풀 종료 (프로세스 종료 시 자동 호출)."""
+    for pool in _pools.values():
+        pool.shutdown()
+    _pools.clear()
+
+
+def _make_batches(texts, batch_size):
+    order = sorted(range(len(texts)), key=lambda i: len(texts[i]))
+    return [order[i:i + batch_size] for i in range(0, len(order), batch_size)]
+
+
+def peak_rss_mb(worker_kb=0):
+    """현재 프로세스와 워커 프로세스 중 가장 큰 최대 RSS (MB, Linux 기준 ru_maxrss는 KB)."""
+    own = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return {"main_mb": round(own / 1024, 1), "worker_mb": round(worker_kb / 1024, 1)}
+
+
+def embed_texts(texts, model_name, batch_size=EMBED_BATCH_SIZE, num_workers=EMBED_WORKERS, out_path=None):
+    """texts를 임베딩해서 (len(texts), dim) float32 배열을 반환.
+
+    out_path를 주면 .npy memmap 파일에 기록함 (코퍼스가 메모리보다 클 때).
+    반환값: (vectors, report)
+    """
+    start = time.perf_counter()
+    batches = _make_batches(texts, batch_size)
+    vectors = None
+    worker_rss_kb = 0
+
+    def write(positions, batch_vectors, rss_kb):
+        nonlocal vectors, worker_rss_kb
+        worker_rss_kb = max(worker_rss_kb, rss_kb)
+        if vectors is None: # 첫 결과에서 차원을 알게 되면 한 번만 할당
+            shape = (len(texts), batch_vectors.shape[1])
+            if out_path:
+                vectors = np.lib.format.open_memmap(out_path, mode="w+", dtype=np.float32, shape=shape)
+            else:
+                vectors = np.empty(shape, dtype=np.float32)
+        vectors[positions] = batch_vectors
+
+    if num_workers <= 1:
+        _init_worker(model_name, os.cpu_count() or 1)
+        for positions in batches:
+            write(*_encode_batch(positions, [texts[i] for i in positions]))
+    else:
+        executor = _get_pool(model_name, num_workers)
+        futures = [executor.submit(_encode_batch, positions, [texts[i] for i in positions])
+                   for positions in batches]
+        for future in as_completed(futures):
+            write(*future.result())
+
+    if vectors is None:
+        vectors = np.zeros((0, 0), dtype=np.float32)
+    if out_path:
+        vectors.flush()
+
+    elapsed = time.perf_counter() - start
+    report = {
+        "docs": len(texts),
+        "batches": len(batches),
+        "workers": num_workers,
+        "seconds": round(elapsed, 2),
+        "docs_per_sec": round(len(texts) / elapsed, 1) if elapsed > 0 else None,
+        "peak_rss": peak_rss_mb(worker_rss_kb if num_workers > 1 else 0),
+    }
+    return vectors, report
+
+
+class IndexOnlyEmbeddings(Embeddings):
+    """인덱스 구축/저장만 할 때 FAISS 래퍼에 넘기는 자리표시자 (메인 프로세스에 모델을 올리지 않음)."""
+
+    def embed_documents(self, texts):
+        raise RuntimeError("인덱싱 스크립트에서는 embedding_pipeline.embed_texts를 사용하세요.")
+
+    def embed_query(self, text):
+        raise RuntimeError("인덱싱 스크립트에서는 embedding_pipeline.embed_texts를 사용하세요.")
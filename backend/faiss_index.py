@@ -0,0 +1,157 @@
+# faiss_index.py
+# FAISS 인덱스 종류 선택 / 학습 / 검색 파라미터 설정
+#   Flat    : 정확한 전수 검색 (기본값, 코퍼스가 작을 때)
+#   IVFFlat : 클러스터(nlist)로 나눠서 nprobe개 클러스터만 검색
+#   HNSW    : 그래프 기반 근사 검색 (efSearch로 정확도/속도 조절, 삭제 미지원)
+#   IVFPQ   : IVF + Product Quantization으로 벡터를 압축 (메모리 절약)
+import math
+import os
+
+import faiss
+import numpy as np
+
+INDEX_TYPES = ("Flat", "IVFFlat", "HNSW", "IVFPQ")
+FAISS_INDEX_TYPE = os.getenv("FAISS_INDEX_TYPE", "Flat")
+
+# 검색 시 파라미터 (서버에서 인덱스를 불러올 때 적용)
+FAISS_NPROBE = int(os.getenv("FAISS_NPROBE", "16"))
+FAISS_EF_SEARCH = int(os.getenv("FAISS_EF_SEARCH", "64"))
+
+HNSW_M = 32 # 노드당 연결 수
+HNSW_EF_CONSTRUCTION = 200
+PQ_NBITS = 8
+
+
+def default_nlist(num_vectors):
+    # 일반적인 권장값 4*sqrt(N), 클러스터당 학습 벡터가 최소 39개는 되도록 제한
+    return max(1, min(int(4 * math.sqrt(num_vectors)), num_vectors // 39))
+
+
+def default_pq_m(dim):
+    # 서브벡터 수: 차원을 나누어떨어지게 하면서 서브벡터당 16차원 정도
+    for m in (dim // 16, 64, 48, 32, 16, 8):
+        if m > 0 and dim % m == 0:
+            return m
+    return 1
+
+
+def build_index(index_type, vectors, nlist=None, pq_m=None):
+    """임베딩 배열로 인덱스를 만들고(필요하면 학습) 벡터를 추가해서 반환."""
+    if index_type not in INDEX_TYPES:
+        raise ValueError(f"지원하지 않는 인덱스 종류: {index_type} (가능: {', '.join(INDEX_TYPES)})")
+    vectors = np.ascontiguousarray(vectors, dtype=np.float32)
+    num_vectors, dim = vectors.shape
+
+    if index_type == "Flat":
+        index = faiss.IndexFlatL2(dim)
+    elif index_type == "HNSW":
+        index = faiss.IndexHNSWFlat(dim, HNSW_M)
+        index.hnsw.efConstruction = HNSW_EF_CONSTRUCTION
+    else:
+        nlist = nlist or default_nlist(num_vectors)
+        quantizer = faiss.IndexFlatL2(dim)
+        if index_type == "IVFFlat":
+            index = faiss.IndexIVFFlat(quantizer, dim, nlist)
+        else:
+            # PQ 코드북 학습에는 최소 2^nbits개의 벡터가 필요 -> 작은 코퍼스에서는 nbits를 낮춤
+            nbits = max(1, min(PQ_NBITS, int(math.log2(max(num_vectors, 2)))))
+            index = faiss.IndexIVFPQ(quantizer, dim, nlist, pq_m or default_pq_m(dim), nbits)
+        # id 기반 삭제(remove_ids)와 벡터 복원(reconstruct)을 함께 지원하는 direct map
+        index.set_direct_map_type(faiss.DirectMap.Hashtable)
+
+    if not index.is_trained:
+        index.train(vectors)
+    if faiss.try_extract_index_ivf(index) is not None:
+        # Hashtable direct map은 add_with_ids로 넣은 라벨만 기록함 (add로 넣으면 remove_ids/reconstruct가 라벨을 못 찾음)
+        index.add_with_ids(vectors, np.arange(num_vectors, dtype=np.int64))
+    else:
+        index.add(vectors)
+    return index
+
+
+def index_type_of(index):
+    if isinstance(index, faiss.IndexHNSWFlat):
+        return "HNSW"
+    if isinstance(index, faiss.IndexIVFPQ):
+        return "IVFPQ"
+    if isinstance(index, faiss.IndexIVFFlat):
+        return "IVFFlat"
+    return "Flat"
+
+
+def supports_remove(index):
+    # HNSW 그래프는 노드 삭제를 지원하지 않음 -> 삭제가 필요하면 전체 재구축
+    return index_type_of(index) != "HNSW"
+
+
+def unmapped_labels(index, labels):
+    """remove_ids로 지울 수 없는 라벨 목록.
+
+    예전 build_index로 만든 IVF 인덱스는 Hashtable direct map이 비어 있어서 어떤 라벨도 찾지 못함.
+    """
+    ivf = faiss.try_extract_index_ivf(index)
+    if ivf is None:
+        return [label for label in labels if not 0 <= label < index.ntotal] # Flat: 라벨 = 위치
+    if ivf.direct_map.type != faiss.DirectMap.Hashtable:
+        return []
+    missing = []
+    for label in labels:
+        try:
+            ivf.direct_map.get(int(label))
+        except RuntimeError:
+            missing.append(label)
+    return missing
+
+
+def remove_documents(db, doc_ids):
+    """LangChain FAISS 스토어에서 docstore id 목록을 삭제 (index.remove_ids 사용).
+
+    Flat은 삭제 후 남은 벡터를 앞으로 당기므로 라벨을 다시 매기고,
+    IVF는 라벨이 그대로 유지되므로 매핑에서 지운 라벨만 제거함.
+    지울 수 없는 라벨이 있으면 아무것도 지우지 않고 RuntimeError (인덱스와 매핑이 어긋나지 않도록).
+    """
+    remove_set = set(doc_ids)
+    labels = [label for label, doc_id in db.index_to_docstore_id.items() if doc_id in remove_set]
+    if not labels:
+        return 0
+    missing = unmapped_labels(db.index, labels)
+    if missing:
+        raise RuntimeError(f"FAISS 인덱스에서 찾을 수 없는 라벨 {len(missing)}개 (전체 {len(labels)}개): "
+                           "direct map이 없는 예전 인덱스이므로 전체 재구축이 필요합니다.")
+    db.index.remove_ids(np.array(labels, dtype=np.int64))
+    remaining = {label: doc_id for label, doc_id in db.index_to_docstore_id.items() if doc_id not in remove_set}
+    if faiss.try_extract_index_ivf(db.index) is None:
+        remaining = {new_label: remaining[old_label] for new_label, old_label in enumerate(sorted(remaining))}
+    removed_doc_ids = [db.index_to_docstore_id[label] for label in labels]
+    db.index_to_docstore_id = remaining
+    db.docstore.delete(removed_doc_ids)
+    return len(labels)
+
+
+def add_documents(db, vectors, documents, ids):
+    """미리 계산한 임베딩으로 문서를 추가. IVF는 삭제로 생긴 빈 라벨과 겹치지 않게 add_with_ids 사용."""
+    vectors = np.ascontiguousarray(vectors, dtype=np.float32)
+    if faiss.try_extract_index_ivf(db.index) is not None:
+        start = max(db.index_to_docstore_id, default=-1) + 1
+        labels = np.arange(start, start + len(ids), dtype=np.int64)
+        db.index.add_with_ids(vectors, labels)
+    else:
+        start = db.index.ntotal
+        labels = np.arange(start, start + len(ids), dtype=np.int64)
+        db.index.add(vectors)
+    db.docstore.add(dict(zip(ids, documents)))
+    db.index_to_docstore_id.update({int(label): doc_id for label, doc_id in zip(labels, ids)})
+
+
+def tune_index(index, nprobe=FAISS_NPROBE, ef_search=FAISS_EF_SEARCH):
+    """검색 정확도/속도 파라미터 적용 (Flat은 변경 없음)."""
+    ivf = faiss.try_extract_index_ivf(index)
+    if ivf is not None and nprobe:
+        ivf.nprobe = min(nprobe, ivf.nlist)
+    if isinstance(index, faiss.IndexHNSWFlat) and ef_search:
+        index.hnsw.efSearch = ef_search
+    return index
+
+
+def index_size_bytes(index):
+    return int(faiss.serialize_index(index).nbytes)
@@ -0,0 +1,114 @@
+# fetchers.py
+# 상세 페이지 fetcher
+#   - extract_detail_text : HTML -> 본문 텍스트 (Selenium/HTTP 공통 추출 로직)
+#   - HttpDetailFetcher   : keep-alive 연결 풀을 쓰는 HTTP 클라이언트 + lxml 파서 (브라우저 없이 수십 ms)
+#   - afetch_all          : 비동기 클라이언트로 여러 페이지를 한 번에 받기 (벤치마크/일괄 수집용)
+# 본문이 JS로 그려져서 HTTP 응답에 없으면 None을 돌려주고, 호출 쪽(asan_crawler)이 Selenium으로 다시 시도함
+import asyncio
+import os
+import re
+
+import httpx
+from bs4 import BeautifulSoup
+
+try:
+    import lxml # noqa: F401
+    HTML_PARSER = "lxml"
+except ImportError: # lxml이 없으면 기본 파서 사용 (느리지만 결과는 같음)
+    HTML_PARSER = "html.parser"
+
+CRAWL_FETCHER = os.getenv("CRAWL_FETCHER", "auto") # auto: HTTP 먼저, 실패 시 Selenium / http / selenium
+HTTP_TIMEOUT = float(os.getenv("CRAWL_HTTP_TIMEOUT", "10"))
+USER_AGENT = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/90.0.4430.85 Safari/537.36"
+
+CONTENT_SELECTORS = ("div#content div.healthCont", "div#content") # 앞의 것부터 시도
+
+
+def extract_detail_text(html, parser=HTML_PARSER):
+    """상세 페이지 HTML에서 본문 텍스트를 추출. 내용 컨테이너가 없으면 None."""
+    soup = BeautifulSoup(html, parser)
+    content_div = None
+    for selector in CONTENT_SELECTORS:
+        content_div = soup.select_one(selector)
+        if content_div:
+            break
+    if not content_div:
+        return None
+
+    # 불필요한 내부 요소 제거 (LNB: 좌측 내비게이션 바)
+    lnb_div = content_div.select_one("div#lnb")
+    if lnb_div:
+        lnb_div.decompose()
+
+    raw_text = content_div.get_text(separator='\n', strip=True)
+    # 연속 줄바꿈을 하나로 합치고 앞뒤 공백 제거
+    cleaned_text = re.sub(r'\n\s*\n', '\n', raw_text).strip()
+    return cleaned_text or None # 빈 컨테이너는 JS 렌더링 페이지일 가능성 -> Selenium으로 재시도
+
+
+def make_http_client(max_connections=8, timeout=HTTP_TIMEOUT, client_class=httpx.Client):
+    return client_class(
+        headers={"User-Agent": USER_AGENT},
+        timeout=timeout,
+        follow_redirects=True,
+        limits=httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections),
+    )
+
+
+class HttpDetailFetcher:
+    """연결 풀을 공유하는 HTTP fetcher. httpx.Client는 스레드 안전하므로 워커 스레드들이 같이 씀."""
+
+    def __init__(self, max_connections=8, parser=HTML_PARSER):
+        self.parser = parser
+        self.client = make_http_client(max_connections)
+
+    def fetch(self, url):
+        """본문 텍스트를 반환. HTTP 오류이거나 본문이 응답에 없으면 None (-> Selenium 대상)."""
+        return self.fetch_conditional(url)["text"]
+
+    def fetch_conditional(self, url, etag=None, last_modified=None):
+        """조건부 요청. {"text", "etag", "last_modified", "not_modified"} 반환.
+
+        서버가 304를 주면 not_modified=True, text=None (저장된 문서를 그대로 쓰면 됨).
+        """
+        headers = {}
+        if etag:
+            headers["If-None-Match"] = etag
+        if last_modified:
+            headers["If-Modified-Since"] = last_modified
+        result = {"text": None, "etag": None, "last_modified": None, "not_modified": False}
+        try:
+            response = self.client.get(url, headers=headers)
+            if response.status_code == 304:
+                result.update(etag=etag, last_modified=last_modified, not_modified=True)
+                return result
+            response.raise_for_status()
+        except httpx.HTTPError as e:
+            print(f"  HTTP fetch failed for {url}: {e}")
+            return result
+        result.update(
+            text=extract_detail_text(response.text, self.parser),
+            etag=response.headers.get("ETag"),
+            last_modified=response.headers.get("Last-Modified"),
+        )
+        return result
+
+    def close(self):
+        self.client.close()
+
+
+async def afetch_all(urls, max_connections=8, parser=HTML_PARSER):
+    """여러 상세 페이지를 비동기로 받아서 {url: 본문 텍스트 또는 None} 반환."""
+    semaphore = asyncio.Semaphore(max_connections)
+    async with make_http_client(max_connections, client_class=httpx.AsyncClient) as client:
+        async def fetch_one(url):
+            async with semaphore:
+                try:
+                    response = await client.get(url)
+                    response.raise_for_status()
+                except httpx.HTTPError:
+                    return url, None
+            # 파싱은 CPU 작업이므로 이벤트 루프를 막지 않도록 스레드에서
+            return url, await asyncio.to_thread(extract_detail_text, response.text, parser)
+
+        return dict(await asyncio.gather(*(fetch_one(url) for url in urls)))
@@ -1,6 +1,116 @@
 # gpt_chat_interface.py
+# 그래프 호출 래퍼: 질문 하나(chat_with_rag) / 여러 질문 배치(achat_batch, /chat/batch와 CLI에서 사용)
+# 배치: 모든 질문을 SentenceTransformer 한 번으로 임베딩 -> FAISS search 한 번으로 dense 후보 검색
+#       -> 질문별 그래프(필터/캐시/검색/LLM)를 동시에 실행 (동시 실행 수 + 초당 시작 수 제한), 끝나는 순서대로 결과 반환
+# CLI (backend 폴더에서): python gpt_chat_interface.py questions.txt [--output answers.jsonl] [--concurrency 8] [--rate 4]
+#   입력: 한 줄에 질문 하나 (.txt) 또는 {"question": ...} JSONL (.jsonl)
+import asyncio
+import json
+import logging
+import os
+import sys
+import time
+
 from main import app
+from concurrency import AsyncRateLimiter
+from nodes.context_builder import source_summaries
+from nodes.gpt_response_rag import RETRIEVAL_K
+from nodes.hybrid_search import dense_candidates_batch
+from nodes.vector_store import embed_queries_cached
+from tracing import current_request_id
+
+BATCH_CONCURRENCY = int(os.getenv("BATCH_CONCURRENCY", "8")) # 배치 하나에서 동시에 실행하는 질문 수
+BATCH_RATE = float(os.getenv("BATCH_RATE", "4")) # 초당 시작하는 질문 수 (OpenAI rate limit 대비, 0이면 제한 없음)
+NOT_MEDICAL_ANSWER = "의학 질문만 응답 가능합니다."
+BATCH_ERROR_MESSAGE = "답변 생성 중 오류가 발생했습니다."
+
+logger = logging.getLogger("medot.batch")
+
+def chat_with_rag(user_input: str, session_id: str = None) -> str:
+    # session_id를 주면 같은 세션의 이전 대화를 이어서 답변
+    result = app.invoke({"user_input": user_input, "session_id": session_id})
+    return result.get("answer", NOT_MEDICAL_ANSWER)
+
+def batch_result(index, question, result, started):
+    return {
+        "index": index,
+        "question": question,
+        "answer": result.get("answer", NOT_MEDICAL_ANSWER),
+        "is_medical": result.get("is_medical"),
+        "cache_hit": result.get("cache_hit"),
+        "sources": source_summaries(result.get("source_documents")),
+        "total_ms": round((time.perf_counter() - started) * 1000, 1),
+    }
+
+async def achat_batch(questions, concurrency=BATCH_CONCURRENCY, rate=BATCH_RATE):
+    """질문별 결과 dict를 끝나는 순서대로 yield (index로 입력 순서 확인).
+    실패한 질문은 error(고정 문구)/error_type만 채움 (예외 내용은 request id와 함께 로그로만 남김)."""
+    if not questions:
+        return
+    # 임베딩/FAISS 검색은 CPU 연산이므로 이벤트 루프 밖에서 한 번씩만 실행
+    vectors = await asyncio.to_thread(embed_queries_cached, questions)
+    dense = await asyncio.to_thread(dense_candidates_batch, vectors, RETRIEVAL_K)
+    semaphore = asyncio.Semaphore(concurrency)
+    limiter = AsyncRateLimiter(rate)
+
+    async def run(index):
+        async with semaphore:
+            await limiter.wait()
+            started = time.perf_counter()
+            try:
+                result = await app.ainvoke({
+                    "user_input": questions[index],
+                    "query_vector": vectors[index],
+                    "dense_candidates": dense[index],
+                })
+            except Exception as e:
+                logger.exception("request_id=%s batch question %d failed", current_request_id(), index)
+                return {"index": index, "question": questions[index], "error": BATCH_ERROR_MESSAGE,
+                        "error_type": type(e).__name__}
+            return batch_result(index, questions[index], result, started)
+
+    tasks = [asyncio.create_task(run(index)) for index in range(len(questions))]
+    try:
+        for task in asyncio.as_completed(tasks):
+            yield await task
+    finally:
+        for task in tasks: # 클라이언트가 끊기면 남은 질문은 취소
+            task.cancel()
+
+def read_questions(path):
+    with open(path, "r", encoding="utf-8") as f:
+        lines = [line.strip() for line in f if line.strip()]
+    if path.endswith(".jsonl"):
+        return [json.loads(line)["question"] for line in lines]
+    return lines
+
+async def run_cli(args):
+    questions = read_questions(args.input)
+    output = open(args.output, "w", encoding="utf-8") if args.output else None
+    start = time.perf_counter()
+    failed = 0
+    try:
+        async for result in achat_batch(questions, args.concurrency, args.rate):
+            failed += "error" in result
+            line = json.dumps(result, ensure_ascii=False)
+            if output:
+                output.write(line + "\n")
+                output.flush()
+                print(f"[{result['index'] + 1}/{len(questions)}] {result['question']}", file=sys.stderr)
+            else:
+                print(line)
+    finally:
+        if output:
+            output.close()
+    # 진행 상황은 stderr로 (표준 출력은 결과 JSONL만)
+    print(f"완료: {len(questions)}개 질문 ({failed}개 실패), {time.perf_counter() - start:.1f}s", file=sys.stderr)
+
+if __name__ == "__main__":
+    import argparse
 
-def chat_with_rag(user_input: str) -> str:
-    result = app.invoke({"user_input": user_input})
-    return result.get("answer", "의학 질문만 응답 가능합니다.")
+    parser = argparse.ArgumentParser(description="여러 질문을 한 번에 답변 (결과는 JSONL)")
+    parser.add_argument("input", help="질문 파일 (.txt: 한 줄에 하나, .jsonl: {\"question\": ...})")
+    parser.add_argument("--output", default=None, help="결과 JSONL 경로 (없으면 표준 출력)")
+    parser.add_argument("--concurrency", type=int, default=BATCH_CONCURRENCY)
+    parser.add_argument("--rate", type=float, default=BATCH_RATE, help="초당 시작하는 질문 수 (0이면 제한 없음)")
+    asyncio.run(run_cli(parser.parse_args()))
@@ -1,37 +1,78 @@
 # medot/main.py
 from langgraph.graph import StateGraph, END
-from nodes.medical_filter import medical_filter_node
-from nodes.gpt_response_rag import gpt_response_node
-from typing import TypedDict, Optional
+from langchain_core.runnables import RunnableLambda
+from nodes.conversation import condense_query_node, acondense_query_node, save_turn_node, asave_turn_node
+from nodes.query_embedding import embed_query_node, aembed_query_node
+from nodes.medical_filter import medical_filter_node, amedical_filter_node
+from nodes.answer_cache import cache_lookup_node, acache_lookup_node, cache_store_node, acache_store_node
+from nodes.gpt_response_rag import retrieve_node, aretrieve_node, gpt_response_node, agpt_response_node
+from langchain_core.documents import Document
+from tracing import traced_node
+from typing import TypedDict, Optional, List
 
 class ChatState(TypedDict):
     user_input: str
+    session_id: Optional[str] # 있으면 세션 대화 기록을 이어서 사용
+    history: Optional[dict] # {"summary": 이전 대화 요약, "turns": 최근 대화}
+    query: Optional[str] # 검색/필터용 질문 (후속 질문이면 대화 없이도 이해되게 바꾼 질문)
+    query_vector: Optional[List[float]] # 그래프 진입 시 한 번만 계산하는 질문 임베딩
+    dense_candidates: Optional[list] # 배치 요청에서 미리 검색한 FAISS 후보 (없으면 Retrieve에서 검색)
     is_medical: Optional[bool]
+    filter_method: Optional[str] # "local"(임베딩 분류기) 또는 "llm"
+    cache_hit: Optional[bool]
+    generation_started_at: Optional[float]
+    source_documents: Optional[List[Document]]
     answer: Optional[str]
 
 
 
 # 그래프 정의
 builder = StateGraph(ChatState) 
-builder.add_node("MedicalFilter", medical_filter_node)
-builder.add_node("GPTResponse", gpt_response_node)
+# 노드마다 동기/비동기 구현을 함께 등록 (invoke -> 동기, ainvoke -> 비동기)
+# traced_node: 노드별 실행 시간을 /metrics 히스토그램과 요청 로그에 기록
+def add_traced_node(name, func, afunc):
+    builder.add_node(name, RunnableLambda(traced_node(name, func), afunc=traced_node(name, afunc)))
+
+add_traced_node("CondenseQuery", condense_query_node, acondense_query_node)
+add_traced_node("EmbedQuery", embed_query_node, aembed_query_node)
+add_traced_node("MedicalFilter", medical_filter_node, amedical_filter_node)
+add_traced_node("CacheLookup", cache_lookup_node, acache_lookup_node)
+add_traced_node("Retrieve", retrieve_node, aretrieve_node)
+add_traced_node("GPTResponse", gpt_response_node, agpt_response_node)
+add_traced_node("CacheStore", cache_store_node, acache_store_node)
+add_traced_node("SaveTurn", save_turn_node, asave_turn_node)
 
 # 분기 처리
 def condition_router(state):
-    return "GPTResponse" if state["is_medical"] else END
+    return "CacheLookup" if state["is_medical"] else END
+
+# 캐시 hit이면 검색/LLM 호출 없이 대화 기록만 저장하고 종료
+def cache_router(state):
+    return "SaveTurn" if state["cache_hit"] else "Retrieve"
 
-builder.set_entry_point("MedicalFilter")
+builder.set_entry_point("CondenseQuery")
+builder.add_edge("CondenseQuery", "EmbedQuery")
+builder.add_edge("EmbedQuery", "MedicalFilter")
 builder.add_conditional_edges("MedicalFilter", condition_router, {
-    "GPTResponse": "GPTResponse",
+    "CacheLookup": "CacheLookup",
     END: END
 })
-builder.add_edge("GPTResponse", END)
+builder.add_conditional_edges("CacheLookup", cache_router, {
+    "Retrieve": "Retrieve",
+    "SaveTurn": "SaveTurn"
+})
+builder.add_edge("Retrieve", "GPTResponse")
+builder.add_edge("GPTResponse", "CacheStore")
+builder.add_edge("CacheStore", "SaveTurn")
+builder.add_edge("SaveTurn", END)
 
 app = builder.compile()
 
 # 실행
 if __name__ == "__main__":
+    import uuid
+    session_id = uuid.uuid4().hex # 터미널 대화 하나를 세션 하나로 (후속 질문 가능)
     while True:
         user_input = input("질문을 입력하세요: ")
-        result = app.invoke({"user_input": user_input})
+        result = app.invoke({"user_input": user_input, "session_id": session_id})
         print("결과:", result.get("answer", "의학 질문만 응답 가능합니다."))
@@ -0,0 +1,131 @@
+# mmap_docstore.py
+# pickle(index.pkl) 대신 쓰는 메모리 매핑 문서 저장소
+#   docstore.bin     : 청크별 JSON({"page_content", "metadata"})을 이어 붙인 파일 (UTF-8)
+#   docstore.idx.npy : 각 레코드의 시작 위치 (uint64, 마지막 값은 파일 끝)
+#   docstore_ids.json: 레코드 순서대로의 docstore id + FAISS 라벨 -> id 매핑
+# 서버는 파일을 mmap으로 열고 검색된 id만 그때그때 디코딩함
+# -> 여러 uvicorn 워커가 같은 페이지를 공유하고, 시작 시 pickle 역직렬화가 없음
+import json
+import mmap
+import os
+
+import faiss
+import numpy as np
+from langchain_community.docstore.base import Docstore
+from langchain_community.docstore.in_memory import InMemoryDocstore
+from langchain_community.vectorstores import FAISS
+from langchain_core.documents import Document
+
+from atomic_io import atomic_open, atomic_path
+
+INDEX_FILE = "index.faiss"
+DATA_FILE = "docstore.bin"
+OFFSETS_FILE = "docstore.idx.npy"
+IDS_FILE = "docstore_ids.json"
+LEGACY_PICKLE_FILE = "index.pkl"
+
+
+class MmapDocstore(Docstore):
+    """읽기 전용 docstore. search(id) 호출 시에만 해당 레코드를 디코딩함."""
+
+    def __init__(self, path):
+        with open(os.path.join(path, IDS_FILE), "r", encoding="utf-8") as f:
+            self._ids = json.load(f)["ids"]
+        self._positions = {doc_id: i for i, doc_id in enumerate(self._ids)}
+        self._offsets = np.load(os.path.join(path, OFFSETS_FILE), mmap_mode="r")
+        with open(os.path.join(path, DATA_FILE), "rb") as f:
+            # 빈 파일은 mmap 할 수 없음
+            self._data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) if os.fstat(f.fileno()).st_size else b""
+
+    def _decode(self, position):
+        start, end = int(self._offsets[position]), int(self._offsets[position + 1])
+        record = json.loads(self._data[start:end].decode("utf-8"))
+        return Document(page_content=record["page_content"], metadata=record["metadata"])
+
+    def search(self, search):
+        position = self._positions.get(search)
+        if position is None:
+            return f"ID {search} not found." # InMemoryDocstore와 같은 반환 형식
+        return self._decode(position)
+
+    def to_dict(self):
+        """인덱싱 스크립트에서 수정할 수 있도록 전체를 메모리로 읽어옴."""
+        return {doc_id: self._decode(i) for i, doc_id in enumerate(self._ids)}
+
+    def __len__(self):
+        return len(self._ids)
+
+
+# 서버가 mmap으로 열어 둔 파일을 제자리에서 덮어쓰지 않도록 모두 임시 파일 -> os.replace로 교체
+# docstore_ids.json을 마지막에 바꿔서, 새 로드는 데이터 파일이 모두 준비된 뒤에 새 id 목록을 봄
+def write_docstore(path, index_to_docstore_id, docstore):
+    ids = [index_to_docstore_id[label] for label in sorted(index_to_docstore_id)]
+    offsets = np.zeros(len(ids) + 1, dtype=np.uint64)
+    with atomic_open(os.path.join(path, DATA_FILE), "wb") as f:
+        for i, doc_id in enumerate(ids):
+            doc = docstore.search(doc_id)
+            record = json.dumps({"page_content": doc.page_content, "metadata": doc.metadata}, ensure_ascii=False)
+            f.write(record.encode("utf-8"))
+            offsets[i + 1] = f.tell()
+    with atomic_open(os.path.join(path, OFFSETS_FILE), "wb") as f:
+        np.save(f, offsets)
+    with atomic_open(os.path.join(path, IDS_FILE)) as f:
+        json.dump({"ids": ids, "index_to_docstore_id": {str(k): v for k, v in index_to_docstore_id.items()}},
+                  f, ensure_ascii=False)
+
+
+def read_faiss_index(path, use_mmap=True):
+    index_path = os.path.join(path, INDEX_FILE)
+    if use_mmap:
+        try:
+            return faiss.read_index(index_path, faiss.IO_FLAG_MMAP | faiss.IO_FLAG_READ_ONLY)
+        except RuntimeError:
+            pass # 이 인덱스 종류/faiss 버전에서 mmap을 지원하지 않으면 일반 로드
+    return faiss.read_index(index_path)
+
+
+def has_mmap_docstore(path):
+    return all(os.path.exists(os.path.join(path, name)) for name in (INDEX_FILE, DATA_FILE, OFFSETS_FILE, IDS_FILE))
+
+
+def load_vector_store(path, embedding, use_mmap=True):
+    """mmap 형식이 있으면 그걸 쓰고, 없으면 예전 pickle 형식(FAISS.load_local)으로 로드.
+
+    use_mmap=False는 인덱싱 스크립트용 (수정 가능한 InMemoryDocstore + 일반 인덱스).
+    """
+    if not has_mmap_docstore(path):
+        return FAISS.load_local(path, embedding, allow_dangerous_deserialization=True)
+
+    mmap_docstore = MmapDocstore(path)
+    docstore = mmap_docstore if use_mmap else InMemoryDocstore(mmap_docstore.to_dict())
+    with open(os.path.join(path, IDS_FILE), "r", encoding="utf-8") as f:
+        index_to_docstore_id = {int(k): v for k, v in json.load(f)["index_to_docstore_id"].items()}
+    return FAISS(
+        embedding_function=embedding,
+        index=read_faiss_index(path, use_mmap),
+        docstore=docstore,
+        index_to_docstore_id=index_to_docstore_id,
+    )
+
+
+def save_vector_store(db, path):
+    os.makedirs(path, exist_ok=True)
+    with atomic_path(os.path.join(path, INDEX_FILE)) as tmp_path:
+        faiss.write_index(db.index, tmp_path)
+    write_docstore(path, db.index_to_docstore_id, db.docstore)
+    # 예전 pickle 파일이 남아 있으면 내용이 달라지므로 삭제
+    legacy_path = os.path.join(path, LEGACY_PICKLE_FILE)
+    if os.path.exists(legacy_path):
+        os.remove(legacy_path)
+
+
+# 예전 pickle 형식 인덱스를 다시 임베딩하지 않고 mmap 형식으로 변환
+# 실행: python mmap_docstore.py [faiss_amc_db_chunked]
+if __name__ == "__main__":
+    import sys
+    from embedding_pipeline import IndexOnlyEmbeddings
+
+    target = sys.argv[1] if len(sys.argv) > 1 else "faiss_amc_db_chunked"
+    legacy_db = FAISS.load_local(target, IndexOnlyEmbeddings(), allow_dangerous_deserialization=True)
+    save_vector_store(legacy_db, target)
+    print(f"변환 완료: {target} ({len(legacy_db.index_to_docstore_id)} chunks)")
@@ -0,0 +1,141 @@
+# model_registry.py
+# Whisper 모델을 프로세스당 한 번만 로드해서 요청 간에 공유하는 레지스트리
+# 요청마다 whisper.load_model()을 호출하면 모델 역직렬화 + 가중치 할당 비용을 매번 치르게 됨
+import asyncio
+import os
+import queue
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+
+import numpy as np
+
+from resources import lazy_resource
+
+# 모델 크기: tiny / base / small / medium / large (환경변수로 변경 가능)
+WHISPER_MODEL_SIZE = os.getenv("WHISPER_MODEL_SIZE", "base")
+# 동시에 transcribe 할 수 있는 모델 인스턴스 수 (기본값: CPU 코어 수의 절반, 최소 1)
+# 각 인스턴스가 torch 연산에서 여러 스레드를 쓰므로 코어 수 그대로 쓰면 오히려 느려짐
+WHISPER_POOL_SIZE = int(os.getenv("WHISPER_POOL_SIZE", "0")) or max(1, (os.cpu_count() or 1) // 2)
+
+WARMUP_SECONDS = 1  # 워밍업에 쓰는 무음 길이(초)
+SAMPLE_RATE = 16000  # whisper 입력 샘플레이트
+
+
+class WhisperModelPool:
+    """크기가 제한된 Whisper 모델 풀.
+
+    모델은 필요할 때 pool_size까지만 생성되고, 이후 요청은 반납된 모델을 기다림.
+    """
+
+    def __init__(self, model_size=WHISPER_MODEL_SIZE, pool_size=WHISPER_POOL_SIZE):
+        self.model_size = model_size
+        self.pool_size = pool_size
+        self._idle = queue.Queue()
+        self._created = 0
+        self._lock = threading.Lock()
+        # CPU 연산인 transcribe를 이벤트 루프 밖에서 돌리기 위한 전용 스레드 풀
+        # (torch 연산은 GIL을 풀기 때문에 스레드로도 코어를 활용함)
+        self._executor = ThreadPoolExecutor(max_workers=pool_size, thread_name_prefix="whisper")
+
+        # 지표 (startup / latency)
+        self._stats_lock = threading.Lock()
+        self.load_seconds = []  # 인스턴스별 로드 시간
+        self.warmup_seconds = None
+        self.transcribe_count = 0
+        self.transcribe_total_seconds = 0.0
+        self.transcribe_max_seconds = 0.0
+        self.wait_count = 0
+        self.wait_total_seconds = 0.0
+
+    def _load_model(self):
+        import whisper # whisper / torch import는 무거워서 모델이 실제로 필요할 때 처음 import
+        start = time.perf_counter()
+        model = whisper.load_model(self.model_size)
+        elapsed = time.perf_counter() - start
+        with self._stats_lock:
+            self.load_seconds.append(elapsed)
+        print(f"Whisper 모델 로드 완료 ({self.model_size}): {elapsed:.2f}s")
+        return model
+
+    @contextmanager
+    def acquire(self):
+        """풀에서 모델 하나를 빌려오고, with 블록이 끝나면 반납함."""
+        wait_start = time.perf_counter()
+        try:
+            model = self._idle.get_nowait()
+        except queue.Empty:
+            with self._lock:
+                can_create = self._created < self.pool_size
+                if can_create:
+                    self._created += 1
+            if can_create:
+                try:
+                    model = self._load_model()
+                except Exception:
+                    with self._lock:
+                        self._created -= 1
+                    raise
+            else:
+                model = self._idle.get()  # 다른 요청이 반납할 때까지 대기
+        with self._stats_lock:
+            self.wait_count += 1
+            self.wait_total_seconds += time.perf_counter() - wait_start
+        try:
+            yield model
+        finally:
+            self._idle.put(model)
+
+    def warmup(self):
+        """첫 모델을 미리 로드하고 짧은 무음으로 한 번 돌려서 첫 요청 지연을 없앰."""
+        start = time.perf_counter()
+        with self.acquire() as model:
+            model.transcribe(np.zeros(SAMPLE_RATE * WARMUP_SECONDS, dtype=np.float32))
+        self.warmup_seconds = time.perf_counter() - start
+
+    def transcribe(self, audio, **kwargs):
+        """audio는 파일 경로 또는 16kHz float32 배열."""
+        with self.acquire() as model:
+            start = time.perf_counter()
+            result = model.transcribe(audio, **kwargs)
+            elapsed = time.perf_counter() - start
+        with self._stats_lock:
+            self.transcribe_count += 1
+            self.transcribe_total_seconds += elapsed
+            self.transcribe_max_seconds = max(self.transcribe_max_seconds, elapsed)
+        return result
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    async def atranscribe(self, audio, **kwargs):
+        """transcribe를 전용 스레드 풀에서 실행해서 이벤트 루프를 막지 않음."""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, lambda: self.transcribe(audio, **kwargs))
+
+    def stats(self):
+        with self._stats_lock:
+            count = self.transcribe_count
+            return {
+                "model_size": self.model_size,
+                "pool_size": self.pool_size,
+                "models_loaded": len(self.load_seconds),
+                "load_seconds": [round(s, 3) for s in self.load_seconds],
+                "warmup_seconds": round(self.warmup_seconds, 3) if self.warmup_seconds is not None else None,
+                "transcribe_count": count,
+                "transcribe_avg_seconds": round(self.transcribe_total_seconds / count, 3) if count else None,
+                "transcribe_max_seconds": round(self.transcribe_max_seconds, 3),
+                "wait_avg_seconds": round(self.wait_total_seconds / self.wait_count, 3) if self.wait_count else None,
+            }
+
+
+# 프로세스 전역에서 공유하는 풀
+whisper_pool = WhisperModelPool()
+
+
+# 서버 시작 시 preload 대상: 첫 모델 로드 + 워밍업
+@lazy_resource("whisper")
+def get_warm_whisper_pool():
+    whisper_pool.warmup()
+    return whisper_pool
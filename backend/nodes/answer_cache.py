@@ -0,0 +1,40 @@
+# answer_cache.py
+# RAG 체인 앞단의 의미 기반 답변 캐시 노드
+import asyncio
+import time
+
+from conversation_store import format_history
+from nodes.vector_store import DB_PATH
+from semantic_cache import cache_from_env
+from tracing import record_cache
+
+answer_cache = cache_from_env(index_dir=DB_PATH)
+
+# 세션 대화 기록(증상, 복용 약, 요약)을 보고 만든 답변은 그 사용자만의 답변이므로
+# 전역 캐시에 저장하지 않고, 다른 사용자가 만든 일반 답변으로 대신하지도 않음
+def uses_history(state):
+    return bool(format_history(state.get("history")))
+
+def cache_lookup_node(state):
+    started_at = time.perf_counter()
+    if uses_history(state):
+        return {**state, "cache_hit": False, "generation_started_at": started_at}
+    cached_answer = answer_cache.lookup(state["query_vector"])
+    record_cache("answer", cached_answer is not None)
+    if cached_answer is not None:
+        return {**state, "answer": cached_answer, "cache_hit": True}
+    return {**state, "cache_hit": False, "generation_started_at": started_at}
+
+async def acache_lookup_node(state):
+    return await asyncio.to_thread(cache_lookup_node, state)
+
+# 검색 + 답변 생성에 걸린 시간을 함께 저장 (캐시 hit 시 절약된 시간으로 집계)
+def cache_store_node(state):
+    started_at = state.get("generation_started_at")
+    generation_seconds = time.perf_counter() - started_at if started_at is not None else 0.0
+    if state.get("answer") and not uses_history(state):
+        answer_cache.store_answer(state["query_vector"], state["answer"], generation_seconds)
+    return state
+
+async def acache_store_node(state):
+    return await asyncio.to_thread(cache_store_node, state)
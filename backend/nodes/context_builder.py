@@ -0,0 +1,86 @@
+# context_builder.py
+# 검색된 청크로 RAG 프롬프트의 참고 정보를 만듦 ("stuff" 방식 대체)
+#   1. 같은 청크 중복 제거
+#   2. 같은 글(source_url)의 청크를 chunk_index 순서로 모으고, 이어지는 청크는 겹치는 부분(chunk_overlap)을 지우고 합침
+#   3. 검색 순위가 높은 글부터 토큰 예산(CONTEXT_TOKEN_BUDGET) 안에 들어갈 만큼만 넣음
+import os
+from nodes.tokens import count_tokens, get_tokenizer
+
+CONTEXT_TOKEN_BUDGET = int(os.getenv("CONTEXT_TOKEN_BUDGET", "2000"))
+MAX_OVERLAP_CHARS = 200 # 청크 겹침(chunk_overlap=70)을 찾을 최대 길이 (분할 위치에 따라 70자보다 길어질 수 있음)
+MIN_OVERLAP_CHARS = 10 # 이보다 짧게 겹치면 우연의 일치로 보고 그대로 둠
+MIN_PARTIAL_TOKENS = 50 # 남은 예산이 이보다 적으면 잘라서 넣지 않음
+
+def naive_context(docs):
+    # 예전 "stuff" 방식: 검색된 청크를 그대로 이어 붙임 (절약 토큰 비교용)
+    return "\n\n".join(doc.page_content for doc in docs)
+
+def strip_overlap(previous, text):
+    """previous의 끝부분과 같은 text의 앞부분을 제거."""
+    limit = min(MAX_OVERLAP_CHARS, len(previous), len(text))
+    for size in range(limit, MIN_OVERLAP_CHARS - 1, -1):
+        if previous.endswith(text[:size]):
+            return text[size:].lstrip()
+    return text
+
+def merge_runs(docs):
+    """같은 글의 청크를 합쳐서 (가장 높은 검색 순위, 텍스트) 리스트로 반환. 글 순서는 가장 높은 순위 기준."""
+    groups = {}
+    seen = set()
+    for rank, doc in enumerate(docs):
+        key = doc.metadata.get("chunk_id") or doc.page_content
+        if key in seen:
+            continue
+        seen.add(key)
+        source = doc.metadata.get("source_url")
+        chunk_index = doc.metadata.get("chunk_index")
+        if source is None or chunk_index is None: # 예전 인덱스: 청크 정보가 없으면 따로 취급
+            source, chunk_index = f"#{rank}", 0
+        groups.setdefault(source, []).append((chunk_index, rank, doc.page_content))
+
+    runs = []
+    for chunks in groups.values():
+        chunks.sort()
+        current_index, best_rank, text = chunks[0]
+        for chunk_index, rank, content in chunks[1:]:
+            if chunk_index == current_index + 1: # 이어지는 청크: 겹친 부분만 빼고 붙임
+                text = text + "\n" + strip_overlap(text, content)
+            else: # 같은 글이지만 떨어진 청크
+                text = text + "\n...\n" + content
+            current_index = chunk_index
+            best_rank = min(best_rank, rank)
+        runs.append((best_rank, text))
+    runs.sort(key=lambda run: run[0])
+    return runs
+
+def truncate_tokens(text, max_tokens):
+    tokenizer = get_tokenizer()
+    return tokenizer.decode(tokenizer.encode(text)[:max_tokens])
+
+def build_context(docs, budget=CONTEXT_TOKEN_BUDGET):
+    """토큰 예산 안에서 참고 정보 텍스트를 만듦."""
+    sections = []
+    used = 0
+    for _, text in merge_runs(docs):
+        tokens = count_tokens(text)
+        if used + tokens <= budget:
+            sections.append(text)
+            used += tokens
+            continue
+        remaining = budget - used
+        # 예산이 남으면 앞부분만 넣고 끝냄 (가장 관련 높은 글은 예산이 작아도 앞부분은 넣음)
+        if remaining >= MIN_PARTIAL_TOKENS or not sections:
+            sections.append(truncate_tokens(text, remaining))
+        break
+    return "\n\n".join(sections)
+
+def source_summaries(docs):
+    # 같은 문서의 여러 청크는 출처 하나로 합침 (응답에 붙이는 참고 자료 목록)
+    sources, seen = [], set()
+    for doc in docs or []:
+        url = doc.metadata.get("source_url")
+        if url in seen:
+            continue
+        seen.add(url)
+        sources.append({"title": doc.metadata.get("title"), "source_url": url})
+    return sources
@@ -0,0 +1,134 @@
+# conversation.py
+# 세션별 대화 기록 (요청에 session_id가 있을 때만, 없으면 예전처럼 한 번짜리 질문)
+#   CondenseQuery: 대화 기록을 불러오고, 후속 질문("그럼 약은요?")을 대화 없이도 이해되는 검색용 질문으로 바꿈
+#                  -> 임베딩/필터/캐시/검색은 바꾼 질문(state["query"])을 사용, 답변 생성은 원래 질문 + 대화 기록 사용
+#   SaveTurn     : 질문/답변을 기록에 추가하고, 기록이 토큰 예산을 넘으면 오래된 대화를 요약에 합쳐서 줄임
+import asyncio
+import os
+
+from langchain_openai import ChatOpenAI
+from langchain_core.messages import SystemMessage, HumanMessage
+
+from conversation_store import format_history, format_turns, new_session, store_from_env
+from nodes.llm_usage import LLMUsageCallback
+from nodes.tokens import count_tokens
+from resources import lazy_resource
+
+HISTORY_TOKEN_BUDGET = int(os.getenv("HISTORY_TOKEN_BUDGET", "1000")) # 요약 + 최근 대화 토큰 상한
+HISTORY_KEEP_MESSAGES = int(os.getenv("HISTORY_KEEP_MESSAGES", "4")) # 요약하지 않고 그대로 두는 최근 메시지 수
+
+conversation_store = store_from_env()
+
+CONDENSE_SYSTEM_PROMPT = (
+    "You rewrite follow-up questions for a medical search engine. "
+    "Given the previous conversation and a follow-up question, rewrite the follow-up as a standalone question "
+    "that can be understood without the conversation, keeping the disease, symptom or drug names it refers to. "
+    "Use the same language as the follow-up. Reply with the rewritten question only."
+)
+SUMMARY_SYSTEM_PROMPT = (
+    "You maintain a running summary of a conversation between a user and a medical assistant. "
+    "Merge the existing summary and the new messages into one short summary that keeps the user's symptoms, "
+    "conditions, medications and the advice already given. Use the same language as the conversation."
+)
+
+
+@lazy_resource("conversation_llm")
+def get_llm():
+    return ChatOpenAI(model="gpt-4", temperature=0)
+
+
+def search_query(state):
+    """검색/필터에 쓰는 질문 (후속 질문이면 바꾼 질문)."""
+    return state.get("query") or state["user_input"]
+
+
+def build_condense_messages(session, user_input):
+    return [
+        SystemMessage(content=CONDENSE_SYSTEM_PROMPT),
+        HumanMessage(content=f"대화:\n{format_history(session)}\n\n후속 질문: {user_input}"),
+    ]
+
+
+def build_summary_messages(summary, turns):
+    return [
+        SystemMessage(content=SUMMARY_SYSTEM_PROMPT),
+        HumanMessage(content=f"기존 요약:\n{summary or '(없음)'}\n\n새 대화:\n{format_turns(turns)}"),
+    ]
+
+
+def load_session(state):
+    session_id = state.get("session_id")
+    if not session_id:
+        return None
+    return conversation_store.get(session_id) or new_session()
+
+
+def condensed_state(state, session, response=None):
+    query = response.content.strip() if response is not None else state["user_input"]
+    return {**state, "history": session, "query": query or state["user_input"]}
+
+
+def needs_condense(session):
+    return bool(session and (session["summary"] or session["turns"])) # 첫 질문은 바꿀 필요 없음
+
+
+def condense_query_node(state):
+    session = load_session(state)
+    if not needs_condense(session):
+        return condensed_state(state, session)
+    response = get_llm().invoke(build_condense_messages(session, state["user_input"]),
+                                config={"callbacks": [LLMUsageCallback("condense")]})
+    return condensed_state(state, session, response)
+
+
+async def acondense_query_node(state):
+    session = await asyncio.to_thread(load_session, state) # SQLite 저장소일 수 있으므로 스레드에서
+    if not needs_condense(session):
+        return condensed_state(state, session)
+    response = await get_llm().ainvoke(build_condense_messages(session, state["user_input"]),
+                                       config={"callbacks": [LLMUsageCallback("condense")]})
+    return condensed_state(state, session, response)
+
+
+def append_turn(state):
+    """질문/답변을 추가한 세션과, 요약에 합쳐야 하는 오래된 메시지 목록을 반환."""
+    session = state.get("history") or new_session()
+    session = {"summary": session["summary"], "turns": session["turns"] + [
+        {"role": "user", "content": state["user_input"]},
+        {"role": "assistant", "content": state["answer"]},
+    ]}
+    if count_tokens(format_history(session)) <= HISTORY_TOKEN_BUDGET or len(session["turns"]) <= HISTORY_KEEP_MESSAGES:
+        return session, []
+    return session, session["turns"][:-HISTORY_KEEP_MESSAGES]
+
+
+def compacted(session, old_turns, response):
+    return {"summary": response.content.strip(), "turns": session["turns"][len(old_turns):]}
+
+
+def should_save(state):
+    return bool(state.get("session_id") and state.get("answer"))
+
+
+def save_turn_node(state):
+    if not should_save(state):
+        return state
+    session, old_turns = append_turn(state)
+    if old_turns:
+        response = get_llm().invoke(build_summary_messages(session["summary"], old_turns),
+                                    config={"callbacks": [LLMUsageCallback("history_summary")]})
+        session = compacted(session, old_turns, response)
+    conversation_store.put(state["session_id"], session)
+    return {**state, "history": session}
+
+
+async def asave_turn_node(state):
+    if not should_save(state):
+        return state
+    session, old_turns = append_turn(state)
+    if old_turns:
+        response = await get_llm().ainvoke(build_summary_messages(session["summary"], old_turns),
+                                           config={"callbacks": [LLMUsageCallback("history_summary")]})
+        session = compacted(session, old_turns, response)
+    await asyncio.to_thread(conversation_store.put, state["session_id"], session)
+    return {**state, "history": session}
@@ -1,17 +1,23 @@
 # gpt_response_rag.py
-from langchain_community.vectorstores import FAISS
-from langchain_community.embeddings import SentenceTransformerEmbeddings
+import asyncio
+import threading
+from nodes.hybrid_search import scored_candidates, apply_cutoffs, fuse
+from nodes.tokens import count_tokens
+from nodes.context_builder import build_context, naive_context
+from resources import lazy_resource
+from nodes.llm_usage import LLMUsageCallback
+from nodes.conversation import format_history, search_query
 from langchain_openai import ChatOpenAI
-from langchain.chains import RetrievalQA # RAG 체인을 만들기 위한 클래스
+from langchain_core.output_parsers import StrOutputParser # LLM 응답을 문자열로 변환
 from langchain_core.messages import SystemMessage, HumanMessage # LLM에 전달할 메시지 타입
 from langchain.prompts import PromptTemplate # LLM 프롬프트를 구조화하기 위한 클래스
 
-# DB 불러오기
-embedding_model = SentenceTransformerEmbeddings(model_name="jhgan/ko-sbert-nli")
-db = FAISS.load_local("faiss_amc_db_chunked", embedding_model, allow_dangerous_deserialization=True)
+RETRIEVAL_K = 3 # 검색할 청크 수
 
-retriever = db.as_retriever(search_type="similarity", k=3)
-llm = ChatOpenAI(model="gpt-4", temperature=0.7)
+@lazy_resource("rag_llm")
+def get_llm():
+    # stream_usage: 스트리밍 응답에서도 토큰 사용량을 받아서 기록
+    return ChatOpenAI(model="gpt-4", temperature=0.7, stream_usage=True, callbacks=[LLMUsageCallback("rag")])
 
 
 prompt_template_str =  """당신은 친절하고 지식이 풍부한 의료 도우미입니다. 사용자 질문에 답변하기 위해 다음의 참고 정보를 활용하세요.
@@ -21,40 +27,110 @@ prompt_template_str =  """당신은 친절하고 지식이 풍부한 의료 도
 
 만약 참고 정보에서 직접적인 답변을 찾기 어렵다면, 당신의 일반적인 의학 지식을 바탕으로 사용자에게 도움이 될 수 있는 가능한 원인, 증상 완화 방법, 또는 의학적 조언을 제공해주세요. 하지만 확정적인 진단은 내릴 수 없음을 명확히 하고, 필요한 경우 전문가와 상담할 것을 권유하세요. 사용자의 증상을 잘 이해하고 공감하는 태도를 보여주세요.
 
-질문: {question}
+{history}질문: {question}
 답변:"""
 
 RAG_PROMPT = PromptTemplate(
-    template=prompt_template_str, input_variables=["context", "question"]
+    template=prompt_template_str, input_variables=["context", "history", "question"]
 )
 
-# RetrievalQA가 내부적으로 retriever 사용
-rag_chain = RetrievalQA.from_chain_type(
-    llm=llm,
-    retriever=retriever,
-    chain_type="stuff", # 검색된 모든 문서를 하나의 프롬프트에 넣어 처리
-    return_source_documents=True,
-    chain_type_kwargs={"prompt": RAG_PROMPT}
-)
+def history_block(state):
+    # 세션 대화 기록 (요약 + 최근 대화). 세션이 없거나 첫 질문이면 빈 문자열
+    history = format_history(state.get("history"))
+    return f"이전 대화:\n{history}\n\n" if history else ""
 
-def gpt_response_node(state):
-    user_input = state["user_input"]
+# 검색(Retrieve)과 생성(GPTResponse)을 별도 노드로 분리
+# -> 스트리밍 시 검색된 출처를 LLM 토큰보다 먼저 내보낼 수 있음
+def get_rag_chain():
+    return RAG_PROMPT | get_llm() | StrOutputParser()
+
+def format_docs(docs):
+    # 같은 글의 이어지는 청크는 겹침을 지우고 합친 뒤, 토큰 예산(CONTEXT_TOKEN_BUDGET) 안에서만 넣음
+    return build_context(docs)
+
+# 관련도 기준으로 버린 청크 / fallback으로 보낸 요청 / 절약한 프롬프트 토큰 (/metrics/retrieval)
+retrieval_stats = {"requests": 0, "routed_to_fallback": 0, "chunks_dropped": 0,
+                   "prompt_tokens": 0, "prompt_tokens_saved": 0}
+_retrieval_stats_lock = threading.Lock()
+
+def prompt_tokens(context, question):
+    if context:
+        return count_tokens(RAG_PROMPT.format(context=context, history="", question=question))
+    return count_tokens(FALLBACK_SYSTEM_PROMPT) + count_tokens(question)
+
+def record_retrieval(question, unfiltered_docs, docs):
+    # 기준 없이 상위 k개를 그대로 이어 붙였을 때("stuff")의 프롬프트와 비교
+    sent = prompt_tokens(format_docs(docs) if docs else "", question)
+    baseline = prompt_tokens(naive_context(unfiltered_docs), question)
+    with _retrieval_stats_lock:
+        retrieval_stats["requests"] += 1
+        retrieval_stats["routed_to_fallback"] += int(not docs)
+        retrieval_stats["chunks_dropped"] += len(unfiltered_docs) - len(docs)
+        retrieval_stats["prompt_tokens"] += sent
+        retrieval_stats["prompt_tokens_saved"] += max(0, baseline - sent)
+
+def get_retrieval_stats():
+    with _retrieval_stats_lock:
+        stats = dict(retrieval_stats)
+    requests = stats["requests"] or 1
+    stats["avg_prompt_tokens"] = round(stats["prompt_tokens"] / requests, 1)
+    stats["avg_prompt_tokens_saved"] = round(stats["prompt_tokens_saved"] / requests, 1)
+    return stats
+
+# EmbedQuery 노드에서 계산한 벡터로 바로 검색 (질문을 다시 임베딩하지 않음)
+# BM25 키워드 검색 결과와 RRF로 합쳐서 질환명/약품명처럼 임베딩으로 잘 안 잡히는 질문도 찾음
+# 관련도 기준(RETRIEVAL_MIN_SIMILARITY / RETRIEVAL_MIN_COVERAGE)을 넘는 청크만 남기고,
+# 하나도 없으면 source_documents가 비어서 GPTResponse가 바로 LLM 직접 답변으로 감
+def retrieve_node(state):
+    query = search_query(state) # 후속 질문이면 대화 없이도 이해되게 바꾼 질문으로 검색
+    # 배치 요청(/chat/batch)은 dense 후보를 모든 질문에 대해 한 번에 미리 검색해서 넘겨줌
+    dense, sparse = scored_candidates(query, state["query_vector"], RETRIEVAL_K, dense=state.get("dense_candidates"))
+    unfiltered_docs = fuse(dense, sparse, RETRIEVAL_K)
+    docs = fuse(*apply_cutoffs(dense, sparse), RETRIEVAL_K)
+    record_retrieval(query, unfiltered_docs, docs)
+    return {**state, "source_documents": docs}
 
-    # rag체인 실행
-    rag_result = rag_chain.invoke({"query": user_input})
-    answer_from_rag = rag_result['result']
-    source_documents_found = rag_result.get("source_documents", []) # 없으면 빈 리스트트
+async def aretrieve_node(state):
+    return await asyncio.to_thread(retrieve_node, state)
+
+FALLBACK_SYSTEM_PROMPT = "당신은 친절하고 지식이 풍부한 의료 도우미입니다. 사용자의 질문에 대해 당신의 일반적인 의학 지식을 바탕으로 답변해주세요. 하지만 확정적인 진단은 내릴 수 없음을 명확히 하고, 필요한 경우 전문가와 상담할 것을 권유하세요."
+
+def build_fallback_messages(user_input, history=""):
+    messages = [SystemMessage(content=FALLBACK_SYSTEM_PROMPT)]
+    if history:
+        messages.append(SystemMessage(content=history.strip()))
+    messages.append(HumanMessage(content=user_input))
+    return messages
+
+# config를 받아서 하위 LLM 호출에 넘겨줌 (LangGraph 스트리밍 콜백 전달용)
+def gpt_response_node(state, config=None):
+    user_input = state["user_input"]
+    source_documents_found = state.get("source_documents") or [] # 없으면 빈 리스트
 
     # rag 결과 및 fallback 로직 결정
     if source_documents_found:
-        # print(f'RAG 응답 (문서 {len(source_documents_found)}개 참고): {answer_from_rag}') # 디버그용
-        final_answer = answer_from_rag
+        # print(f'RAG 응답 (문서 {len(source_documents_found)}개 참고)') # 디버그용
+        final_answer = get_rag_chain().invoke(
+            {"context": format_docs(source_documents_found), "history": history_block(state), "question": user_input},
+            config=config
+        )
     else: 
-        print("RAG에서 관련 문서를 찾지 못했습니다. LLM을 직접 사용합니다.")
-        messages = [
-            SystemMessage(content="당신은 친절하고 지식이 풍부한 의료 도우미입니다. 사용자의 질문에 대해 당신의 일반적인 의학 지식을 바탕으로 답변해주세요. 하지만 확정적인 진단은 내릴 수 없음을 명확히 하고, 필요한 경우 전문가와 상담할 것을 권유하세요."),
-            HumanMessage(content=user_input)
-        ]
-        final_answer = llm.invoke(messages).content
+        print("관련도 기준을 넘는 문서가 없습니다. LLM을 직접 사용합니다.")
+        final_answer = get_llm().invoke(build_fallback_messages(user_input, history_block(state)), config=config).content
         # print("LLM 응답:", final_answer) # 디버그용
-    return {**state, "answer": final_answer}
\ No newline at end of file
+    return {**state, "answer": final_answer}
+
+# 비동기 버전 (FastAPI에서 graph.ainvoke / astream으로 실행할 때 사용)
+async def agpt_response_node(state, config=None):
+    user_input = state["user_input"]
+    source_documents_found = state.get("source_documents") or []
+
+    if source_documents_found:
+        final_answer = await get_rag_chain().ainvoke(
+            {"context": format_docs(source_documents_found), "history": history_block(state), "question": user_input},
+            config=config
+        )
+    else:
+        print("관련도 기준을 넘는 문서가 없습니다. LLM을 직접 사용합니다.")
+        final_answer = (await get_llm().ainvoke(build_fallback_messages(user_input, history_block(state)), config=config)).content
+    return {**state, "answer": final_answer}
@@ -0,0 +1,118 @@
+# hybrid_search.py
+# dense(FAISS) + sparse(BM25) 검색 결과를 Reciprocal Rank Fusion으로 합침
+#   RRF 점수 = sum(1 / (RRF_K + 순위)) -> 두 검색의 점수 척도가 달라도 순위만으로 합칠 수 있음
+# RETRIEVAL_MODE: hybrid(기본) / dense / sparse. BM25 색인이 없으면 hybrid는 dense로 동작
+# 관련도 기준: dense는 코사인 유사도, sparse는 질문 용어 커버리지 -> 기준 미달 후보는 버림
+#   (아무것도 안 남으면 참고 문서 없이 LLM 직접 답변 경로로 감)
+import os
+import numpy as np
+from langchain_core.documents import Document
+from nodes.vector_store import get_db, get_sparse_index
+
+RETRIEVAL_MODE = os.getenv("RETRIEVAL_MODE", "hybrid")
+RETRIEVAL_CANDIDATES = int(os.getenv("RETRIEVAL_CANDIDATES", "20")) # 각 검색에서 가져올 후보 수
+RRF_K = int(os.getenv("RRF_K", "60"))
+RETRIEVAL_MIN_SIMILARITY = float(os.getenv("RETRIEVAL_MIN_SIMILARITY", "0.6")) # dense 코사인 유사도 하한
+RETRIEVAL_MIN_COVERAGE = float(os.getenv("RETRIEVAL_MIN_COVERAGE", "0.5")) # sparse 용어 커버리지 하한
+
+def doc_key(doc):
+    # 예전 인덱스에는 chunk_id가 없으므로 본문으로 구분
+    return doc.metadata.get("chunk_id") or doc.page_content
+
+def _normalize(vector):
+    vector = np.asarray(vector, dtype=np.float32)
+    return vector / (np.linalg.norm(vector) + 1e-12)
+
+def dense_search_batch(query_vectors, k):
+    """질문마다 (문서, 코사인 유사도) 리스트. FAISS search는 모든 질문을 한 번에 호출.
+    인덱스에서 벡터를 복원할 수 없으면 유사도는 None."""
+    db = get_db()
+    queries = np.asarray(query_vectors, dtype=np.float32).reshape(len(query_vectors), -1)
+    _, labels = db.index.search(queries, k)
+    batch = []
+    for query, row in zip(queries, labels):
+        query_unit = _normalize(query)
+        results = []
+        for label in row:
+            label = int(label)
+            if label < 0 or label not in db.index_to_docstore_id:
+                continue
+            doc = db.docstore.search(db.index_to_docstore_id[label])
+            if not isinstance(doc, Document): # docstore에 없으면 "ID ... not found." 문자열이 반환됨
+                continue
+            try:
+                similarity = float(query_unit @ _normalize(db.index.reconstruct(label)))
+            except RuntimeError:
+                similarity = None
+            results.append((doc, similarity))
+        batch.append(results)
+    return batch
+
+def dense_search(query_vector, k):
+    return dense_search_batch([query_vector], k)[0]
+
+def sparse_search(query, k):
+    """(문서, 용어 커버리지) 리스트."""
+    sparse = get_sparse_index()
+    if sparse is None:
+        return []
+    docstore = get_db().docstore
+    results = []
+    for doc_id, _, coverage in sparse.search(query, k):
+        doc = docstore.search(doc_id)
+        if isinstance(doc, Document): # BM25 색인이 FAISS docstore보다 오래됐으면 없는 id가 있을 수 있음
+            results.append((doc, coverage))
+    return results
+
+def _resolve_mode(mode, k, candidates):
+    """(실제 모드, 각 검색에서 가져올 후보 수)"""
+    if mode == "hybrid" and get_sparse_index() is None:
+        mode = "dense"
+    return mode, (k if mode != "hybrid" else max(candidates, k))
+
+def dense_candidates_batch(query_vectors, k, mode=RETRIEVAL_MODE, candidates=RETRIEVAL_CANDIDATES):
+    """여러 질문의 dense 후보를 한 번에 미리 검색 (scored_candidates의 dense 인자로 넘김). dense를 안 쓰면 None."""
+    mode, n = _resolve_mode(mode, k, candidates)
+    if mode not in ("dense", "hybrid"):
+        return [None] * len(query_vectors)
+    return dense_search_batch(query_vectors, n)
+
+def scored_candidates(query, query_vector, k, mode=RETRIEVAL_MODE, candidates=RETRIEVAL_CANDIDATES, dense=None):
+    """모드에 맞게 (dense 후보, sparse 후보)를 가져옴. 안 쓰는 쪽은 빈 리스트.
+    dense: dense_candidates_batch로 미리 검색한 후보 (있으면 FAISS 검색을 건너뜀)."""
+    mode, n = _resolve_mode(mode, k, candidates)
+    if mode in ("dense", "hybrid"):
+        dense = dense if dense is not None else dense_search(query_vector, n)
+    else:
+        dense = []
+    sparse = sparse_search(query, n) if mode in ("sparse", "hybrid") else []
+    return dense, sparse
+
+def apply_cutoffs(dense, sparse, min_similarity=RETRIEVAL_MIN_SIMILARITY, min_coverage=RETRIEVAL_MIN_COVERAGE):
+    # 유사도를 모르는 후보(벡터 복원 불가 인덱스)는 버리지 않음
+    dense = [(doc, score) for doc, score in dense if score is None or score >= min_similarity]
+    sparse = [(doc, score) for doc, score in sparse if score >= min_coverage]
+    return dense, sparse
+
+def rrf_fuse(result_lists, k, rrf_k=RRF_K):
+    scores = {}
+    docs = {}
+    for results in result_lists:
+        for rank, doc in enumerate(results, 1):
+            key = doc_key(doc)
+            scores[key] = scores.get(key, 0.0) + 1.0 / (rrf_k + rank)
+            docs.setdefault(key, doc)
+    ranked = sorted(scores, key=scores.get, reverse=True)[:k]
+    return [docs[key] for key in ranked]
+
+def fuse(dense, sparse, k):
+    lists = [[doc for doc, _ in results] for results in (dense, sparse) if results]
+    if len(lists) == 1:
+        return lists[0][:k]
+    return rrf_fuse(lists, k)
+
+def hybrid_search(query, query_vector, k, mode=RETRIEVAL_MODE, candidates=RETRIEVAL_CANDIDATES, cutoffs=False):
+    dense, sparse = scored_candidates(query, query_vector, k, mode, candidates)
+    if cutoffs:
+        dense, sparse = apply_cutoffs(dense, sparse)
+    return fuse(dense, sparse, k)
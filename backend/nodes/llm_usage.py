@@ -0,0 +1,42 @@
+# llm_usage.py
+# ChatOpenAI 호출마다 시간/토큰/비용을 tracing에 기록하는 LangChain 콜백
+# (ChatOpenAI(callbacks=[LLMUsageCallback("rag")])처럼 LLM을 만들 때 단계 이름과 함께 붙임)
+import threading
+import time
+
+from langchain_core.callbacks import BaseCallbackHandler
+
+from tracing import record_llm
+
+
+class LLMUsageCallback(BaseCallbackHandler):
+    def __init__(self, stage):
+        self.stage = stage
+        self._started = {}
+        self._lock = threading.Lock()
+
+    def on_chat_model_start(self, serialized, messages, *, run_id, **kwargs):
+        with self._lock:
+            self._started[run_id] = time.perf_counter()
+
+    def on_llm_end(self, response, *, run_id, **kwargs):
+        with self._lock:
+            started = self._started.pop(run_id, None)
+        seconds = time.perf_counter() - started if started is not None else 0.0
+        llm_output = response.llm_output or {}
+        model = llm_output.get("model_name", "unknown")
+        usage = None
+        if response.generations and response.generations[0]:
+            message = getattr(response.generations[0][0], "message", None)
+            usage = getattr(message, "usage_metadata", None) # 스트리밍은 stream_usage=True일 때만 있음
+            model = (getattr(message, "response_metadata", None) or {}).get("model_name", model)
+        if usage:
+            prompt_tokens, completion_tokens = usage.get("input_tokens"), usage.get("output_tokens")
+        else:
+            token_usage = llm_output.get("token_usage") or {}
+            prompt_tokens, completion_tokens = token_usage.get("prompt_tokens"), token_usage.get("completion_tokens")
+        record_llm(self.stage, model, prompt_tokens, completion_tokens, seconds)
+
+    def on_llm_error(self, error, *, run_id, **kwargs):
+        with self._lock:
+            self._started.pop(run_id, None)
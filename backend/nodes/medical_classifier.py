@@ -0,0 +1,82 @@
+# medical_classifier.py
+# GPT 호출 없이 로컬 임베딩으로 의학 질문 여부를 빠르게 판단하는 분류기
+# 확실한 경우(의학 / 비의학)만 로컬에서 결정하고, 애매한 질문만 LLM으로 넘김
+import json
+import os
+
+import numpy as np
+
+from nodes.vector_store import get_db, get_embedding_model, embed_query_cached
+from resources import lazy_resource
+
+SEEDS_PATH = "data/medical_filter_seeds.json"
+
+# 판단 기준값 (bench/eval_medical_filter.py 결과를 보고 조정)
+# margin = (의학 중심벡터와의 코사인) - (비의학 중심벡터와의 코사인)
+MEDICAL_MARGIN = float(os.getenv("FILTER_MEDICAL_MARGIN", "0.08"))
+OFFTOPIC_MARGIN = float(os.getenv("FILTER_OFFTOPIC_MARGIN", "-0.05"))
+# 가장 가까운 FAISS 청크와의 코사인 유사도
+CORPUS_MEDICAL_SIM = float(os.getenv("FILTER_CORPUS_MEDICAL_SIM", "0.75"))
+CORPUS_OFFTOPIC_SIM = float(os.getenv("FILTER_CORPUS_OFFTOPIC_SIM", "0.5"))
+
+MEDICAL = "medical"
+NON_MEDICAL = "non_medical"
+AMBIGUOUS = "ambiguous"
+
+
+def _normalize(vectors):
+    vectors = np.asarray(vectors, dtype=np.float32)
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    return vectors / np.maximum(norms, 1e-12)
+
+
+class MedicalQueryClassifier:
+    """라벨링된 예시 문장의 중심벡터(centroid) + FAISS 코퍼스 유사도로 판단하는 분류기."""
+
+    def __init__(self, seeds_path=SEEDS_PATH):
+        with open(seeds_path, "r", encoding="utf-8") as f:
+            seeds = json.load(f)
+        embedding_model = get_embedding_model()
+        medical = _normalize(embedding_model.embed_documents(seeds["medical"]))
+        non_medical = _normalize(embedding_model.embed_documents(seeds["non_medical"]))
+        self.medical_centroid = _normalize(medical.mean(axis=0))
+        self.non_medical_centroid = _normalize(non_medical.mean(axis=0))
+
+    def corpus_similarity(self, query_vector):
+        """쿼리와 가장 가까운 청크의 코사인 유사도 (인덱스에서 벡터 복원이 안 되면 None)."""
+        query = np.asarray(query_vector, dtype=np.float32).reshape(1, -1)
+        index = get_db().index
+        _, indices = index.search(query, 1)
+        nearest = int(indices[0][0])
+        if nearest < 0:
+            return None
+        try:
+            chunk_vector = index.reconstruct(nearest)
+        except RuntimeError:
+            return None
+        return float(_normalize(query)[0] @ _normalize(chunk_vector))
+
+    def score(self, query_vector):
+        query = _normalize(query_vector)
+        margin = float(query @ self.medical_centroid - query @ self.non_medical_centroid)
+        return margin, self.corpus_similarity(query_vector)
+
+    def classify_vector(self, query_vector):
+        """MEDICAL / NON_MEDICAL / AMBIGUOUS 중 하나와 판단 근거 점수를 반환."""
+        margin, corpus_sim = self.score(query_vector)
+        scores = {"margin": round(margin, 4), "corpus_sim": None if corpus_sim is None else round(corpus_sim, 4)}
+
+        if margin >= MEDICAL_MARGIN or (corpus_sim is not None and corpus_sim >= CORPUS_MEDICAL_SIM):
+            return MEDICAL, scores
+        corpus_far = corpus_sim is None or corpus_sim < CORPUS_OFFTOPIC_SIM
+        if margin <= OFFTOPIC_MARGIN and corpus_far:
+            return NON_MEDICAL, scores
+        return AMBIGUOUS, scores
+
+    def classify(self, text):
+        return self.classify_vector(embed_query_cached(text))
+
+
+@lazy_resource("medical_classifier")
+def get_classifier():
+    return MedicalQueryClassifier()
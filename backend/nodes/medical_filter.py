@@ -1,14 +1,25 @@
 # medical_filter.py
+import asyncio
+import logging
 from langchain_openai import ChatOpenAI
 from langchain.schema import SystemMessage, HumanMessage
 from dotenv import load_dotenv
+from nodes.medical_classifier import get_classifier, AMBIGUOUS, MEDICAL
+from resources import lazy_resource
+from nodes.llm_usage import LLMUsageCallback
+from nodes.conversation import search_query
+from tracing import current_request_id, record_filter
 
 load_dotenv()
-llm = ChatOpenAI(model="gpt-4", temperature=0)
 
-def medical_filter_node(state):
-    user_input = state["user_input"]
-    messages = [
+logger = logging.getLogger("medot.filter") # 로컬 분류 점수는 기준값 조정할 때만 DEBUG로 확인
+
+@lazy_resource("filter_llm")
+def get_llm():
+    return ChatOpenAI(model="gpt-4", temperature=0, callbacks=[LLMUsageCallback("medical_filter")])
+
+def build_filter_messages(user_input):
+    return [
         SystemMessage(content=(
             "You are a medical filter. "
             "You will be given a user question, possibly in Korean or English. "
@@ -17,8 +28,34 @@ def medical_filter_node(state):
         )),
         HumanMessage(content=f"{user_input}")
     ]
-    response = llm.invoke(messages)
+
+def parse_filter_response(state, response):
     result = response.content.strip().lower()
-    print("판단된 응답:", result) 
     is_medical = result.startswith("yes")
-    return {**state, "is_medical": is_medical}
+    record_filter("llm", is_medical, llm_response=result)
+    return {**state, "is_medical": is_medical, "filter_method": "llm"}
+
+def local_filter_result(state, label, scores):
+    logger.debug("request_id=%s local filter: %s %s", current_request_id(), label, scores)
+    if label == AMBIGUOUS:
+        return None # 애매한 경우 LLM으로 넘김
+    record_filter("local", label == MEDICAL)
+    return {**state, "is_medical": label == MEDICAL, "filter_method": "local"}
+
+# 1차: 로컬 임베딩 분류기 (수 ms), 2차: 애매한 질문만 gpt-4로 판단
+def medical_filter_node(state):
+    result = local_filter_result(state, *get_classifier().classify_vector(state["query_vector"]))
+    if result is not None:
+        return result
+    response = get_llm().invoke(build_filter_messages(search_query(state)))
+    return parse_filter_response(state, response)
+
+# 비동기 버전 (FastAPI에서 graph.ainvoke로 실행할 때 사용)
+async def amedical_filter_node(state):
+    # 임베딩은 EmbedQuery 노드에서 이미 계산됨 (FAISS 최근접 검색만 스레드에서 실행)
+    label, scores = await asyncio.to_thread(get_classifier().classify_vector, state["query_vector"])
+    result = local_filter_result(state, label, scores)
+    if result is not None:
+        return result
+    response = await get_llm().ainvoke(build_filter_messages(search_query(state)))
+    return parse_filter_response(state, response)
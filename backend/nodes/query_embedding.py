@@ -0,0 +1,16 @@
+# query_embedding.py
+# 그래프 진입 시 사용자 질문(후속 질문이면 CondenseQuery가 바꾼 질문)을 한 번만 임베딩해서 state["query_vector"]에 저장
+# 필터 / 캐시 / 검색 노드는 모두 이 벡터를 재사용함
+import asyncio
+
+from nodes.vector_store import embed_query_cached
+from nodes.conversation import search_query
+
+def embed_query_node(state):
+    if state.get("query_vector") is not None: # 이미 계산된 벡터가 있으면 그대로 사용
+        return state
+    return {**state, "query_vector": embed_query_cached(search_query(state))}
+
+async def aembed_query_node(state):
+    # SentenceTransformer 추론은 CPU 연산이므로 이벤트 루프 밖에서 실행
+    return await asyncio.to_thread(embed_query_node, state)
@@ -0,0 +1,13 @@
+# tokens.py
+# gpt-4 프롬프트 토큰 수 계산 (tiktoken 인코더는 처음 쓸 때 한 번만 로드)
+from resources import lazy_resource
+
+TOKENIZER_MODEL = "gpt-4"
+
+@lazy_resource("tokenizer")
+def get_tokenizer():
+    import tiktoken
+    return tiktoken.encoding_for_model(TOKENIZER_MODEL)
+
+def count_tokens(text):
+    return len(get_tokenizer().encode(text))
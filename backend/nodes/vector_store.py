@@ -0,0 +1,86 @@
+# vector_store.py
+# 임베딩 모델과 FAISS DB를 한 곳에서 로드해서 여러 노드(필터, 검색)가 공유함
+# 둘 다 import 시점이 아니라 처음 사용할 때(또는 서버 시작 후 백그라운드 preload 때) 로드됨
+import os
+import threading
+from collections import OrderedDict
+from resources import lazy_resource
+from tracing import record_cache
+
+EMBEDDING_MODEL_NAME = "jhgan/ko-sbert-nli" # 한국어 최적화 모델
+DB_PATH = "faiss_amc_db_chunked"
+
+@lazy_resource("embedding_model")
+def get_embedding_model():
+    # sentence-transformers / torch import도 여기서 처음 일어남
+    from langchain_community.embeddings import SentenceTransformerEmbeddings
+    return SentenceTransformerEmbeddings(model_name=EMBEDDING_MODEL_NAME)
+
+# DB 불러오기
+@lazy_resource("db")
+def get_db():
+    from faiss_index import tune_index
+    from mmap_docstore import load_vector_store
+    # 인덱스와 docstore를 mmap으로 열어서 워커 간 페이지 공유 (예전 pickle 형식도 읽을 수 있음)
+    db = load_vector_store(DB_PATH, get_embedding_model())
+    tune_index(db.index) # IVF nprobe / HNSW efSearch (FAISS_NPROBE, FAISS_EF_SEARCH)
+    return db
+
+# BM25 키워드 색인 (embed_store_chunk.py가 FAISS 인덱스 옆에 만듦). 없으면 None -> dense 검색만 사용
+@lazy_resource("sparse_index")
+def get_sparse_index():
+    from sparse_index import SparseIndex, has_sparse_index
+    if not has_sparse_index(DB_PATH):
+        print(f"BM25 색인이 없어 dense 검색만 사용합니다: {DB_PATH}")
+        return None
+    return SparseIndex.load(DB_PATH)
+
+# 최근 쿼리 임베딩 LRU 캐시: 재시도/반복 질문은 SentenceTransformer 추론을 건너뜀
+EMBEDDING_CACHE_SIZE = int(os.getenv("EMBEDDING_CACHE_SIZE", "1024"))
+_embedding_cache = OrderedDict()
+_embedding_cache_lock = threading.Lock()
+embedding_cache_stats = {"hits": 0, "misses": 0}
+
+def embed_query_cached(text):
+    with _embedding_cache_lock:
+        vector = _embedding_cache.get(text)
+        if vector is not None:
+            _embedding_cache.move_to_end(text)
+            embedding_cache_stats["hits"] += 1
+            record_cache("embedding", True)
+            return vector
+        embedding_cache_stats["misses"] += 1
+    record_cache("embedding", False)
+
+    vector = get_embedding_model().embed_query(text)
+    _store_embeddings({text: vector})
+    return vector
+
+def _store_embeddings(vectors):
+    with _embedding_cache_lock:
+        for text, vector in vectors.items():
+            _embedding_cache[text] = vector
+            _embedding_cache.move_to_end(text)
+        while len(_embedding_cache) > EMBEDDING_CACHE_SIZE:
+            _embedding_cache.popitem(last=False)
+
+# 여러 질문을 한 번의 SentenceTransformer 배치로 임베딩 (캐시에 있는 질문은 제외)
+def embed_queries_cached(texts):
+    found = {}
+    with _embedding_cache_lock:
+        for text in texts:
+            vector = _embedding_cache.get(text)
+            if vector is not None:
+                _embedding_cache.move_to_end(text)
+                found[text] = vector
+        embedding_cache_stats["hits"] += sum(text in found for text in texts)
+        embedding_cache_stats["misses"] += sum(text not in found for text in texts)
+    for text in texts:
+        record_cache("embedding", text in found)
+
+    missing = list(dict.fromkeys(text for text in texts if text not in found))
+    if missing:
+        computed = dict(zip(missing, get_embedding_model().embed_documents(missing)))
+        _store_embeddings(computed)
+        found.update(computed)
+    return [found[text] for text in texts]
@@ -0,0 +1,96 @@
+# resources.py
+# 무거운 리소스(임베딩 모델, FAISS DB, LLM 클라이언트, LangGraph 그래프 등)를 import 시점이 아니라
+# 처음 필요할 때 한 번만 만드는 지연 싱글톤 + 준비 상태(readiness) 확인용 레지스트리
+import threading
+import time
+
+_registry = {}
+
+
+class LazyResource:
+    def __init__(self, name, factory):
+        self.name = name
+        self.factory = factory
+        self.load_seconds = None
+        self.error = None
+        self._value = None
+        self._loaded = False
+        self._lock = threading.Lock()
+
+    @property
+    def loaded(self):
+        return self._loaded
+
+    def get(self):
+        if self._loaded:
+            return self._value
+        with self._lock:
+            if not self._loaded: # 다른 스레드가 먼저 로드했는지 다시 확인
+                start = time.perf_counter()
+                try:
+                    self._value = self.factory()
+                except Exception as e:
+                    self.error = repr(e)
+                    raise
+                self.load_seconds = time.perf_counter() - start
+                self.error = None
+                self._loaded = True
+                print(f"리소스 로드 완료: {self.name} ({self.load_seconds:.2f}s)")
+        return self._value
+
+
+def lazy_resource(name):
+    """데코레이터: 팩토리 함수를 '처음 호출할 때 한 번만 실행되는 getter'로 바꿈.
+
+    @lazy_resource("db")
+    def get_db(): ...
+    """
+    def decorator(factory):
+        resource = LazyResource(name, factory)
+        _registry[name] = resource
+
+        def getter():
+            return resource.get()
+
+        getter.__name__ = factory.__name__
+        getter.__doc__ = factory.__doc__
+        getter.resource = resource
+        return getter
+    return decorator
+
+
+def load_all(exclude=()):
+    """등록된 리소스를 모두 미리 로드 (서버 시작 시 백그라운드에서 호출). 실패한 리소스 이름 목록을 반환.
+
+    리소스를 로드하다가 새 모듈이 import되면 거기서 등록된 리소스도 이어서 로드함.
+    하나가 실패해도 나머지는 계속 로드하고, 실패 내용은 status()의 error에 남음 (해당 리소스는 첫 요청 때 다시 시도).
+    """
+    attempted = set(exclude)
+    failed = []
+    while True:
+        pending = [resource for name, resource in _registry.items()
+                   if not resource.loaded and name not in attempted]
+        if not pending:
+            return failed
+        for resource in pending:
+            attempted.add(resource.name)
+            try:
+                resource.get()
+            except Exception:
+                failed.append(resource.name)
+                print(f"리소스 로드 실패: {resource.name} ({resource.error})")
+
+
+def status():
+    return {
+        name: {
+            "loaded": resource.loaded,
+            "load_seconds": round(resource.load_seconds, 3) if resource.load_seconds is not None else None,
+            "error": resource.error,
+        }
+        for name, resource in _registry.items()
+    }
+
+
+def all_loaded(names):
+    return all(name in _registry and _registry[name].loaded for name in names)
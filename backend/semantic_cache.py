@@ -0,0 +1,291 @@
+# semantic_cache.py
+# 쿼리 임베딩 기반 답변 캐시
+# 비슷한 질문(코사인 유사도 >= threshold)이 다시 들어오면 검색 + LLM 호출 없이 저장된 답변을 재사용함
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+
+
+def _normalize(vector):
+    vector = np.asarray(vector, dtype=np.float32)
+    return vector / max(float(np.linalg.norm(vector)), 1e-12)
+
+
+def index_fingerprint(index_dir):
+    """FAISS 인덱스 폴더의 파일 크기/수정시간으로 만든 지문. 인덱스를 다시 만들면 값이 바뀜."""
+    if not os.path.isdir(index_dir):
+        return None
+    parts = []
+    for name in sorted(os.listdir(index_dir)):
+        stat = os.stat(os.path.join(index_dir, name))
+        parts.append(f"{name}:{stat.st_size}:{stat.st_mtime_ns}")
+    return hashlib.sha1("|".join(parts).encode("utf-8")).hexdigest()
+
+
+# === 저장소 구현 ===
+# 두 저장소 모두 같은 메서드를 제공함:
+#   items(), get(key), put(key, vector, answer, generation_seconds), delete(key), clear(),
+#   get_meta(name), set_meta(name, value), version(), __len__()
+# put()은 크기 제한을 넘어서 밀려난(LRU) key 목록을 반환함
+# version()은 다른 프로세스가 내용을 바꿨는지 확인하는 값 (바뀌면 SemanticCache가 벡터 행렬을 다시 읽음)
+
+class InMemoryCacheStore:
+    """프로세스 메모리에 저장하는 LRU 캐시 (서버 재시작 시 사라짐)."""
+
+    def __init__(self, max_entries=1000):
+        self.max_entries = max_entries
+        self._entries = OrderedDict() # key -> (vector, answer, created_at, generation_seconds)
+        self._meta = {}
+
+    def items(self):
+        return [(key, *entry) for key, entry in self._entries.items()]
+
+    def get(self, key):
+        entry = self._entries.get(key)
+        if entry is not None:
+            self._entries.move_to_end(key) # 최근 사용으로 갱신
+        return entry
+
+    def put(self, key, vector, answer, generation_seconds):
+        self._entries[key] = (vector, answer, time.time(), generation_seconds)
+        self._entries.move_to_end(key)
+        evicted = []
+        while len(self._entries) > self.max_entries:
+            old_key, _ = self._entries.popitem(last=False)
+            evicted.append(old_key)
+        return evicted
+
+    def delete(self, key):
+        self._entries.pop(key, None)
+
+    def clear(self):
+        self._entries.clear()
+
+    def get_meta(self, name):
+        return self._meta.get(name)
+
+    def set_meta(self, name, value):
+        self._meta[name] = value
+
+    def version(self):
+        return None # 이 프로세스만 쓰므로 바깥에서 바뀌는 일이 없음
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class SQLiteCacheStore:
+    """디스크(SQLite)에 저장하는 LRU 캐시. 서버 재시작/여러 워커 간에도 유지됨."""
+
+    def __init__(self, path="answer_cache.sqlite3", max_entries=1000):
+        self.max_entries = max_entries
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS cache ("
+            " key TEXT PRIMARY KEY, vector BLOB, answer TEXT,"
+            " created_at REAL, last_used REAL, generation_seconds REAL)"
+        )
+        self._conn.execute("CREATE TABLE IF NOT EXISTS meta (name TEXT PRIMARY KEY, value TEXT)")
+        self._conn.commit()
+
+    def items(self):
+        rows = self._conn.execute(
+            "SELECT key, vector, answer, created_at, generation_seconds FROM cache"
+        ).fetchall()
+        return [(key, np.frombuffer(blob, dtype=np.float32), answer, created_at, seconds)
+                for key, blob, answer, created_at, seconds in rows]
+
+    def get(self, key):
+        row = self._conn.execute(
+            "SELECT vector, answer, created_at, generation_seconds FROM cache WHERE key = ?", (key,)
+        ).fetchone()
+        if row is None:
+            return None
+        self._conn.execute("UPDATE cache SET last_used = ? WHERE key = ?", (time.time(), key))
+        self._conn.commit()
+        blob, answer, created_at, seconds = row
+        return np.frombuffer(blob, dtype=np.float32), answer, created_at, seconds
+
+    def put(self, key, vector, answer, generation_seconds):
+        now = time.time()
+        self._conn.execute(
+            "INSERT OR REPLACE INTO cache VALUES (?, ?, ?, ?, ?, ?)",
+            (key, np.asarray(vector, dtype=np.float32).tobytes(), answer, now, now, generation_seconds),
+        )
+        # 크기 제한을 넘은 만큼 가장 오래 사용되지 않은 항목부터 삭제
+        evicted = [row[0] for row in self._conn.execute(
+            "SELECT key FROM cache ORDER BY last_used DESC LIMIT -1 OFFSET ?", (self.max_entries,)
+        ).fetchall()]
+        self._conn.executemany("DELETE FROM cache WHERE key = ?", [(k,) for k in evicted])
+        self._conn.commit()
+        return evicted
+
+    def delete(self, key):
+        self._conn.execute("DELETE FROM cache WHERE key = ?", (key,))
+        self._conn.commit()
+
+    def clear(self):
+        self._conn.execute("DELETE FROM cache")
+        # 비운 뒤에는 rowid가 1부터 다시 시작하므로 version()에서 구분할 수 있게 기록
+        self._conn.execute("INSERT OR REPLACE INTO meta VALUES ('cleared_at', ?)", (repr(time.time()),))
+        self._conn.commit()
+
+    def get_meta(self, name):
+        row = self._conn.execute("SELECT value FROM meta WHERE name = ?", (name,)).fetchone()
+        return row[0] if row else None
+
+    def set_meta(self, name, value):
+        self._conn.execute("INSERT OR REPLACE INTO meta VALUES (?, ?)", (name, value))
+        self._conn.commit()
+
+    def version(self):
+        # 다른 워커가 추가하면 max(rowid)가 커지고 (INSERT OR REPLACE도 새 rowid), 삭제하면 개수가 줄어듦
+        return self._conn.execute(
+            "SELECT COUNT(*), MAX(rowid), (SELECT value FROM meta WHERE name = 'cleared_at') FROM cache"
+        ).fetchone()
+
+    def __len__(self):
+        return self._conn.execute("SELECT COUNT(*) FROM cache").fetchone()[0]
+
+
+class SemanticCache:
+    """임베딩 유사도로 조회하는 답변 캐시 (threshold / TTL / 크기 제한 + 인덱스 재생성 시 무효화)."""
+
+    def __init__(self, store, threshold=0.95, ttl_seconds=86400, index_dir=None):
+        self.store = store
+        self.threshold = threshold
+        self.ttl_seconds = ttl_seconds
+        self.index_dir = index_dir
+        self._lock = threading.Lock()
+
+        # 지표
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+        self.latency_saved_seconds = 0.0
+
+        # 유사도 계산용 벡터 행렬 (저장소 내용을 메모리에 미러링)
+        self._keys = []
+        self._matrix = np.zeros((0, 0), dtype=np.float32)
+        self._created = np.zeros(0) # 행별 저장 시각 (TTL 판정용)
+        self._version = None
+        self._load_matrix()
+        self._check_index()
+
+    def _load_matrix(self):
+        self._version = self.store.version()
+        items = self.store.items()
+        self._keys = [item[0] for item in items]
+        self._matrix = (np.stack([_normalize(item[1]) for item in items])
+                        if items else np.zeros((0, 0), dtype=np.float32))
+        self._created = np.array([item[3] for item in items], dtype=np.float64)
+
+    def _sync(self):
+        """다른 워커가 같은 SQLite 저장소에 쓴 항목이 있으면 행렬을 다시 읽음."""
+        if self.store.version() != self._version:
+            self._load_matrix()
+
+    def _remove_keys(self, keys):
+        if not keys:
+            return
+        removed = set(keys)
+        keep = [i for i, key in enumerate(self._keys) if key not in removed]
+        self._keys = [self._keys[i] for i in keep]
+        self._matrix = self._matrix[keep] if keep else np.zeros((0, 0), dtype=np.float32)
+        self._created = self._created[keep]
+
+    def _check_index(self):
+        """FAISS 인덱스가 다시 만들어졌으면 캐시 전체를 비움 (예전 문서 기반 답변 방지)."""
+        if self.index_dir is None:
+            return
+        fingerprint = index_fingerprint(self.index_dir)
+        stored = self.store.get_meta("index_fingerprint")
+        if stored is not None and stored != fingerprint:
+            self.store.clear()
+            self._load_matrix()
+            self.invalidations += 1
+            print("FAISS 인덱스가 변경되어 답변 캐시를 비웠습니다.")
+        if stored != fingerprint:
+            self.store.set_meta("index_fingerprint", fingerprint)
+
+    def lookup(self, query_vector):
+        """비슷한 질문의 캐시된 답변을 반환 (없으면 None)."""
+        with self._lock:
+            self._check_index()
+            self._sync()
+            # TTL이 지난 항목은 유사도 비교 전에 삭제 (만료된 항목이 더 비슷해서 유효한 항목을 가리는 일 방지)
+            expired = [self._keys[i] for i in np.flatnonzero(time.time() - self._created > self.ttl_seconds)]
+            for key in expired:
+                self.store.delete(key)
+            self._remove_keys(expired)
+            if expired:
+                self._version = self.store.version()
+            if not self._keys:
+                self.misses += 1
+                return None
+            similarities = self._matrix @ _normalize(query_vector)
+            best = int(np.argmax(similarities))
+            if similarities[best] < self.threshold:
+                self.misses += 1
+                return None
+
+            key = self._keys[best]
+            entry = self.store.get(key)
+            if entry is None or time.time() - entry[2] > self.ttl_seconds:
+                # 다른 워커가 지웠거나 방금 만료됨 -> miss 처리
+                self.store.delete(key)
+                self._remove_keys([key])
+                self._version = self.store.version()
+                self.misses += 1
+                return None
+
+            _, answer, _, generation_seconds = entry
+            self.hits += 1
+            self.latency_saved_seconds += generation_seconds or 0.0
+            return answer
+
+    def store_answer(self, query_vector, answer, generation_seconds):
+        vector = np.asarray(query_vector, dtype=np.float32)
+        key = hashlib.sha1(vector.tobytes()).hexdigest()
+        with self._lock:
+            self._sync() # 다른 워커의 변경을 먼저 반영해야 아래에서 version을 맞춰도 놓치는 항목이 없음
+            evicted = self.store.put(key, vector, answer, generation_seconds)
+            self._remove_keys(evicted + [key])
+            self._keys.append(key)
+            row = _normalize(vector)[None, :]
+            self._matrix = row if self._matrix.size == 0 else np.vstack([self._matrix, row])
+            self._created = np.append(self._created, time.time())
+            self._version = self.store.version()
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {
+            "entries": len(self.store),
+            "threshold": self.threshold,
+            "ttl_seconds": self.ttl_seconds,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / total, 4) if total else None,
+            "latency_saved_seconds": round(self.latency_saved_seconds, 3),
+            "invalidations": self.invalidations,
+        }
+
+
+def cache_from_env(index_dir):
+    """ANSWER_CACHE_* 환경변수로 저장소/기준값을 설정해서 캐시 생성."""
+    max_entries = int(os.getenv("ANSWER_CACHE_MAX_ENTRIES", "1000"))
+    if os.getenv("ANSWER_CACHE_BACKEND", "memory") == "sqlite":
+        store = SQLiteCacheStore(os.getenv("ANSWER_CACHE_PATH", "answer_cache.sqlite3"), max_entries)
+    else:
+        store = InMemoryCacheStore(max_entries)
+    return SemanticCache(
+        store,
+        threshold=float(os.getenv("ANSWER_CACHE_THRESHOLD", "0.95")),
+        ttl_seconds=float(os.getenv("ANSWER_CACHE_TTL", "86400")),
+        index_dir=index_dir,
+    )
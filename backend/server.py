@@ -1,17 +1,67 @@
 # backend/server.py
 
-from fastapi import FastAPI, Request, UploadFile, File
+from fastapi import FastAPI, HTTPException, Request, UploadFile, File
 from fastapi.middleware.cors import CORSMiddleware
-from main import app as langgraph_app
-import whisper
-from openai import OpenAI
+from fastapi.responses import StreamingResponse, JSONResponse, PlainTextResponse
+from contextlib import asynccontextmanager
+from model_registry import whisper_pool
+from transcription import save_upload, transcribe_stream, stitch
+from summarizer import Summarizer, summary_cache
+from concurrency import limiter_from_env
+from tracing import TracingMiddleware, current_request_id, render_metrics
+from nodes.answer_cache import answer_cache
+from nodes.context_builder import source_summaries
+from nodes.vector_store import embedding_cache_stats
+from resources import lazy_resource, load_all, all_loaded, status as resource_status
+import asyncio
 import os
+import json
+import time
 from dotenv import load_dotenv
 
 load_dotenv()
-client = OpenAI()
 
-app = FastAPI()
+# 무거운 리소스는 import 시점에 만들지 않고 lifespan에서 백그라운드로 미리 로드
+# (PRELOAD_RESOURCES=0이면 첫 요청 때 로드)
+PRELOAD_RESOURCES = os.getenv("PRELOAD_RESOURCES", "1") != "0"
+WHISPER_PRELOAD = os.getenv("WHISPER_PRELOAD", "1") != "0"
+# /readyz가 200을 반환하기 전에 로드되어 있어야 하는 리소스
+READY_RESOURCES = ["graph", "embedding_model", "db", "medical_classifier"] + (["whisper"] if WHISPER_PRELOAD else [])
+
+# LangGraph 그래프 (main.py import 시 노드 모듈과 langchain이 함께 import됨)
+@lazy_resource("graph")
+def get_graph():
+    from main import app as langgraph_app
+    return langgraph_app
+
+# 이벤트 루프를 막지 않도록 비동기 OpenAI 클라이언트 사용
+@lazy_resource("openai_client")
+def get_client():
+    from openai import AsyncOpenAI
+    return AsyncOpenAI()
+
+# 엔드포인트별 동시 실행/대기열 제한 (초과 시 429)
+chat_limiter = limiter_from_env("chat", "CHAT", default_concurrency=32, default_queue=64)
+# 배치는 요청 하나가 질문 여러 개를 동시에 실행하므로 따로 제한
+batch_limiter = limiter_from_env("chat-batch", "BATCH", default_concurrency=2, default_queue=4)
+BATCH_MAX_QUESTIONS = int(os.getenv("BATCH_MAX_QUESTIONS", "500"))
+audio_limiter = limiter_from_env("summarize-audio", "AUDIO", default_concurrency=whisper_pool.pool_size, default_queue=8)
+
+def preload_resources():
+    failed = load_all(exclude=() if WHISPER_PRELOAD else ("whisper",))
+    if failed: # 실패한 리소스는 /readyz의 resources.<이름>.error로 확인
+        print("리소스 preload 실패:", ", ".join(failed))
+
+@asynccontextmanager
+async def lifespan(app):
+    # 시작: 서버는 바로 요청을 받고(liveness), 리소스는 백그라운드 스레드에서 로드(readiness)
+    if PRELOAD_RESOURCES:
+        app.state.preload_task = asyncio.create_task(asyncio.to_thread(preload_resources))
+    yield
+    # 종료: transcribe 스레드 풀 정리
+    whisper_pool.shutdown()
+
+app = FastAPI(lifespan=lifespan)
 
 # CORS 허용
 app.add_middleware(
@@ -20,49 +70,212 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Request-ID"],
 )
+# 요청마다 request id를 붙이고 노드/LLM/캐시 기록을 모아서 JSON 로그 + /metrics 히스토그램으로 남김
+app.add_middleware(TracingMiddleware)
+
+# liveness: 프로세스가 살아 있는지만 확인 (모델 로드 여부와 무관)
+@app.get("/healthz")
+def healthz():
+    return {"status": "ok"}
+
+# readiness: 필요한 모델/인덱스가 모두 로드되어 요청을 바로 처리할 수 있는지
+@app.get("/readyz")
+def readyz():
+    ready = all_loaded(READY_RESOURCES) if PRELOAD_RESOURCES else True
+    body = {"ready": ready, "resources": resource_status()}
+    return JSONResponse(body, status_code=200 if ready else 503)
+
+async def aget_graph():
+    # 아직 로드 전이면 import/로드를 스레드에서 실행해서 이벤트 루프를 막지 않음
+    return await asyncio.to_thread(get_graph)
 
 @app.post("/chat")
 async def chat(request: Request):
     data = await request.json()
     user_input = data.get("message", "")
-    result = langgraph_app.invoke({"user_input": user_input})
-    return {"answer": result.get("answer", "의학 질문만 응답 가능합니다.")}
+    session_id = data.get("session_id") # 있으면 이전 대화를 이어서 답변
+    async with chat_limiter:
+        result = await (await aget_graph()).ainvoke({"user_input": user_input, "session_id": session_id})
+    return {"answer": result.get("answer", "의학 질문만 응답 가능합니다."), "session_id": session_id}
+
+def sse_event(event, data):
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+# SSE 스트리밍 버전: filter 판단 -> 검색된 출처 -> LLM 토큰 -> done 순서로 전송
+@app.post("/chat/stream")
+async def chat_stream(request: Request):
+    data = await request.json()
+    user_input = data.get("message", "")
+    session_id = data.get("session_id")
+    # 응답 헤더를 보내기 전에 429 여부를 결정 (슬롯은 스트림 안에서 잡고 끝날 때까지 유지)
+    chat_limiter.reject_if_full()
+
+    async def event_stream():
+        start = time.perf_counter()
+        ttft_ms = None
+        answer = None
+        async with chat_limiter:
+            try:
+                langgraph_app = await aget_graph()
+                async for mode, chunk in langgraph_app.astream(
+                    {"user_input": user_input, "session_id": session_id}, stream_mode=["updates", "messages"]
+                ):
+                    if mode == "updates":
+                        for node, update in chunk.items():
+                            if node == "CondenseQuery" and update.get("query") != user_input:
+                                yield sse_event("query", {"query": update.get("query")}) # 후속 질문을 바꾼 검색 질문
+                            elif node == "MedicalFilter":
+                                yield sse_event("filter", {
+                                    "is_medical": update.get("is_medical"),
+                                    "method": update.get("filter_method"),
+                                })
+                            elif node == "CacheLookup" and update.get("cache_hit"):
+                                ttft_ms = (time.perf_counter() - start) * 1000 # 캐시 hit은 답변 전체가 첫 응답
+                                yield sse_event("cache", {"hit": True})
+                            elif node == "Retrieve":
+                                yield sse_event("sources", source_summaries(update.get("source_documents")))
+                            if node in ("CacheLookup", "GPTResponse") and update.get("answer"):
+                                answer = update.get("answer")
+                    elif mode == "messages":
+                        message_chunk, metadata = chunk
+                        # 필터 노드의 yes/no 토큰은 제외하고 답변 생성 노드의 토큰만 전송
+                        if metadata.get("langgraph_node") == "GPTResponse" and message_chunk.content:
+                            if ttft_ms is None:
+                                ttft_ms = (time.perf_counter() - start) * 1000
+                            yield sse_event("token", {"text": message_chunk.content})
+                yield sse_event("done", {
+                    "answer": answer or "의학 질문만 응답 가능합니다.",
+                    "request_id": current_request_id(),
+                    "session_id": session_id,
+                    "ttft_ms": round(ttft_ms, 1) if ttft_ms is not None else None,
+                    "total_ms": round((time.perf_counter() - start) * 1000, 1),
+                })
+            except Exception as e:
+                print("스트리밍 중 오류:", e)
+                yield sse_event("error", {"message": "응답 생성 중 오류가 발생했습니다."})
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
 
 @app.post("/summarize-audio")
 async def summarize_audio(file: UploadFile = File(...)):
-    # 1. 업로드된 파일 저장
-    temp_path = f"temp_{file.filename}"
-    with open(temp_path, "wb") as f:
-        content = await file.read()
-        f.write(content)
-
-    # 2. Whisper로 텍스트 변환
-    model = whisper.load_model("base")
-    result = model.transcribe(temp_path)
-    transcript = result["text"]
-
-    # 3. GPT로 요약
-    messages = [
-        {
-            "role": "system",
-            "content": "You are a kind and knowledgeable assistant who summarizes doctor-patient consultations. "
-                "Your goal is to explain the important points in a way that a person without medical knowledge can understand. "
-                "Focus on clearly summarizing the health concerns and medical advice from the consultation in simple, non-technical language. "
-                "Avoid using medical jargon. Be concise, friendly, and easy to understand."
-        },
-        {
-            "role": "user",
-            "content": f"다음은 의사와 환자의 상담 녹음입니다. 의학 지식이 없는 사람이 자신의 건강 상태를 쉽게 이해할 수 있도록, 중요한 증상, 진단, 처방 또는 의사의 조언을 간단하고 명확하게 요약해주세요. 요약 언어는 녹음본과 동일한 언어를 사용하세요.\n\n{transcript}"
-        },
-    ]
-
-    response = client.chat.completions.create(
-        model="gpt-4",
-        messages=messages,
+    async with audio_limiter:
+        return await _summarize_audio(file)
+
+async def _summarize_audio(file):
+    # 1. 업로드된 파일을 고유한 임시 파일에 조금씩 저장
+    temp_path = await save_upload(file)
+    try:
+        # 2. 무음 위치에서 나눈 구간들을 Whisper 모델 풀에서 병렬로 받아쓰기
+        transcript = stitch([segment async for segment in transcribe_stream(temp_path)])
+    finally:
+        # 3. 임시 파일 삭제
+        os.remove(temp_path)
+
+    # 4. GPT로 요약
+    return {"summary": await summarize_transcript(transcript)}
+
+# 여러 질문을 한 번에: {"questions": [...]} -> 질문마다 끝나는 순서대로 JSON 한 줄씩 (application/x-ndjson)
+@app.post("/chat/batch")
+async def chat_batch(request: Request):
+    data = await request.json()
+    questions = [str(q) for q in data.get("questions", [])]
+    if not questions or len(questions) > BATCH_MAX_QUESTIONS:
+        raise HTTPException(status_code=400, detail=f"questions는 1~{BATCH_MAX_QUESTIONS}개여야 합니다.")
+    batch_limiter.reject_if_full()
+    await aget_graph()
+    from gpt_chat_interface import achat_batch # 그래프(main)가 로드된 뒤 import
+
+    async def jsonl_stream():
+        async with batch_limiter:
+            # 동시 실행 수 / 초당 시작 수는 BATCH_CONCURRENCY / BATCH_RATE
+            async for result in achat_batch(questions):
+                yield json.dumps(result, ensure_ascii=False) + "\n"
+
+    return StreamingResponse(jsonl_stream(), media_type="application/x-ndjson")
+
+class UploadStreamingResponse(StreamingResponse):
+    """전송이 끝나면 업로드 임시 파일을 지우는 StreamingResponse.
+
+    본문 제너레이터의 finally는 제너레이터가 시작된 뒤에만 실행되므로, 첫 바이트를 보내기 전에
+    클라이언트가 끊기면(ClientDisconnect) 파일이 남음 -> 응답 전송(__call__) 단위로 정리함.
+    """
+
+    def __init__(self, content, temp_path, **kwargs):
+        super().__init__(content, **kwargs)
+        self.temp_path = temp_path
+
+    async def __call__(self, scope, receive, send):
+        try:
+            await super().__call__(scope, receive, send)
+        finally:
+            try:
+                os.remove(self.temp_path)
+            except FileNotFoundError:
+                pass
+
+# 스트리밍 버전: 구간별 받아쓰기(segment) -> 전체 받아쓰기(transcript) -> 요약(summary) -> done 순서로 전송
+@app.post("/summarize-audio/stream")
+async def summarize_audio_stream(file: UploadFile = File(...)):
+    audio_limiter.reject_if_full()
+    # 응답이 시작되면 UploadFile이 닫히므로 먼저 임시 파일로 옮겨둠
+    temp_path = await save_upload(file)
+
+    async def event_stream():
+        start = time.perf_counter()
+        try:
+            async with audio_limiter:
+                segments = []
+                async for segment in transcribe_stream(temp_path):
+                    segments.append(segment)
+                    yield sse_event("segment", segment)
+                transcript = stitch(segments)
+                yield sse_event("transcript", {"text": transcript, "segments": len(segments),
+                                               "transcribe_ms": round((time.perf_counter() - start) * 1000, 1)})
+                yield sse_event("summary", {"summary": await summarize_transcript(transcript)})
+                yield sse_event("done", {"total_ms": round((time.perf_counter() - start) * 1000, 1)})
+        except Exception as e:
+            print("음성 요약 스트리밍 중 오류:", e)
+            yield sse_event("error", {"message": "음성 요약 중 오류가 발생했습니다."})
+
+    return UploadStreamingResponse(
+        event_stream(),
+        temp_path,
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
     )
 
-    # 4. 임시 파일 삭제
-    os.remove(temp_path)
+# 긴 받아쓰기는 구간별로 나눠 동시에 요약한 뒤 합침 (구간/최종 요약 모두 내용 해시로 캐시)
+async def summarize_transcript(transcript):
+    return await Summarizer(get_client()).summarize(transcript)
+
+# Prometheus 스크레이프용: HTTP/노드/LLM 호출 시간 히스토그램, 토큰/비용/캐시 카운터
+@app.get("/metrics")
+def metrics():
+    return PlainTextResponse(render_metrics(), media_type="text/plain; version=0.0.4")
+
+# Whisper 모델 로드/워밍업/추론 시간 확인용
+@app.get("/metrics/whisper")
+def whisper_metrics():
+    return whisper_pool.stats()
+
+# 답변 캐시 hit rate / 절약된 시간 확인용 (threshold 조정 참고)
+@app.get("/metrics/cache")
+def cache_metrics():
+    return {**answer_cache.stats(), "embedding_cache": embedding_cache_stats, "summary_cache": summary_cache.stats()}
+
+# 관련도 기준으로 fallback된 요청 수 / 버린 청크 수 / 요청당 절약한 프롬프트 토큰
+@app.get("/metrics/retrieval")
+def retrieval_metrics():
+    from nodes.gpt_response_rag import get_retrieval_stats
+    return get_retrieval_stats()
 
-    return {"summary": response.choices[0].message.content}
+# 엔드포인트별 동시 실행 수 / 대기열 깊이 / 거절 수 확인용
+@app.get("/metrics/limits")
+def limit_metrics():
+    return {"chat": chat_limiter.stats(), "chat-batch": batch_limiter.stats(), "summarize-audio": audio_limiter.stats()}
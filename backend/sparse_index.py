@@ -0,0 +1,162 @@
+# sparse_index.py
+# 청크 키워드 검색용 BM25 역색인 (FAISS 인덱스와 같은 폴더에 저장)
+#   한국어는 조사/어미가 붙어서 공백 단위 토큰이 잘 안 맞음 ("당뇨병은", "당뇨병의")
+#   -> 어절마다 글자 n-gram(2~3)을 토큰으로 사용 (형태소 분석기 없이 질환명/약품명 부분 일치)
+# 저장 파일 (docstore처럼 np.load mmap으로 열어서 워커 간 페이지 공유)
+#   sparse_term_ptr.npy : 용어별 posting 시작 위치 (int64, 마지막 값은 전체 길이)
+#   sparse_docs.npy     : posting 문서 번호 (int32)
+#   sparse_tf.npy       : posting 용어 빈도 (float32)
+#   sparse_doc_len.npy  : 문서 길이 (토큰 수)
+#   sparse_meta.json    : 용어 -> 번호, 문서 번호 -> docstore id, BM25 파라미터
+import json
+import os
+import re
+from collections import Counter
+
+import numpy as np
+
+from atomic_io import atomic_open
+
+TERM_PTR_FILE = "sparse_term_ptr.npy"
+DOCS_FILE = "sparse_docs.npy"
+TF_FILE = "sparse_tf.npy"
+DOC_LEN_FILE = "sparse_doc_len.npy"
+META_FILE = "sparse_meta.json"
+
+NGRAM_RANGE = (2, 3)
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+_WORD_RE = re.compile(r"\w+")
+
+
+def tokenize(text, ngram_range=NGRAM_RANGE):
+    """어절마다 글자 n-gram을 만듦. n보다 짧은 어절은 그대로 사용 (예: "위", "간")."""
+    n_min, n_max = ngram_range
+    tokens = []
+    for word in _WORD_RE.findall(text.lower()):
+        if len(word) < n_min:
+            tokens.append(word)
+            continue
+        for n in range(n_min, min(n_max, len(word)) + 1):
+            tokens.extend(word[i:i + n] for i in range(len(word) - n + 1))
+    return tokens
+
+
+class SparseIndex:
+    def __init__(self, term_ptr, docs, tf, doc_len, vocab, ids, k1=BM25_K1, b=BM25_B, ngram_range=NGRAM_RANGE):
+        self.term_ptr = term_ptr
+        self.docs = docs
+        self.tf = tf
+        self.doc_len = doc_len
+        self.vocab = vocab
+        self.ids = ids
+        self.k1 = k1
+        self.b = b
+        self.ngram_range = tuple(ngram_range)
+        num_docs = len(ids)
+        self.avg_doc_len = float(doc_len.mean()) if num_docs else 0.0
+        doc_freq = np.diff(term_ptr).astype(np.float32)
+        self.idf = np.log(1 + (num_docs - doc_freq + 0.5) / (doc_freq + 0.5)).astype(np.float32)
+        self.unseen_idf = float(np.log(1 + (num_docs + 0.5) / 0.5)) # 코퍼스에 없는 용어 (df=0)
+
+    @classmethod
+    def build(cls, items, ngram_range=NGRAM_RANGE):
+        """items: (docstore id, 텍스트) 이터러블."""
+        vocab = {}
+        ids = []
+        doc_len = []
+        postings = [] # 용어 번호별 [(문서 번호, 빈도)]
+        for doc_number, (doc_id, text) in enumerate(items):
+            counts = Counter(tokenize(text, ngram_range))
+            ids.append(doc_id)
+            doc_len.append(sum(counts.values()))
+            for term, count in counts.items():
+                term_number = vocab.setdefault(term, len(vocab))
+                if term_number == len(postings):
+                    postings.append([])
+                postings[term_number].append((doc_number, count))
+
+        term_ptr = np.zeros(len(postings) + 1, dtype=np.int64)
+        term_ptr[1:] = np.cumsum([len(p) for p in postings])
+        docs = np.fromiter((d for p in postings for d, _ in p), dtype=np.int32, count=int(term_ptr[-1]))
+        tf = np.fromiter((c for p in postings for _, c in p), dtype=np.float32, count=int(term_ptr[-1]))
+        return cls(term_ptr, docs, tf, np.asarray(doc_len, dtype=np.float32), vocab, ids, ngram_range=ngram_range)
+
+    def search(self, query, k=10):
+        """BM25 상위 k개의 (docstore id, 점수, 커버리지) 리스트.
+
+        커버리지: 질문 용어의 idf 합 중 문서에 나온 용어의 비율 (0~1, 질문마다 척도가 다른 BM25 점수 대신 관련도 기준으로 사용)
+        """
+        if not self.ids:
+            return []
+        scores = np.zeros(len(self.ids), dtype=np.float32)
+        matched_idf = np.zeros(len(self.ids), dtype=np.float32)
+        query_idf = 0.0
+        length_norm = self.k1 * (1 - self.b + self.b * self.doc_len / max(self.avg_doc_len, 1e-9))
+        for term, query_count in Counter(tokenize(query, self.ngram_range)).items():
+            term_number = self.vocab.get(term)
+            if term_number is None:
+                query_idf += self.unseen_idf # 코퍼스에 없는 용어는 커버리지를 낮춤 (주제와 무관한 질문)
+                continue
+            idf = self.idf[term_number]
+            query_idf += float(idf)
+            start, end = self.term_ptr[term_number], self.term_ptr[term_number + 1]
+            docs = self.docs[start:end]
+            tf = self.tf[start:end]
+            scores[docs] += query_count * idf * tf * (self.k1 + 1) / (tf + length_norm[docs])
+            matched_idf[docs] += idf
+
+        k = min(k, len(self.ids))
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        return [(self.ids[i], float(scores[i]), float(matched_idf[i] / query_idf)) for i in top if scores[i] > 0]
+
+    def save(self, path):
+        # 서버가 mmap_mode로 열어 둔 배열을 덮어쓰지 않도록 임시 파일 -> os.replace (메타 파일은 마지막에)
+        os.makedirs(path, exist_ok=True)
+        for name, array in ((TERM_PTR_FILE, self.term_ptr), (DOCS_FILE, self.docs), (TF_FILE, self.tf),
+                            (DOC_LEN_FILE, self.doc_len)):
+            with atomic_open(os.path.join(path, name), "wb") as f:
+                np.save(f, array)
+        with atomic_open(os.path.join(path, META_FILE)) as f:
+            json.dump({"vocab": self.vocab, "ids": self.ids, "k1": self.k1, "b": self.b,
+                       "ngram_range": list(self.ngram_range)}, f, ensure_ascii=False)
+
+    @classmethod
+    def load(cls, path):
+        with open(os.path.join(path, META_FILE), "r", encoding="utf-8") as f:
+            meta = json.load(f)
+
+        def load_array(name):
+            return np.load(os.path.join(path, name), mmap_mode="r")
+
+        return cls(load_array(TERM_PTR_FILE), load_array(DOCS_FILE), load_array(TF_FILE), load_array(DOC_LEN_FILE),
+                   meta["vocab"], meta["ids"], meta["k1"], meta["b"], meta["ngram_range"])
+
+
+def has_sparse_index(path):
+    return all(os.path.exists(os.path.join(path, name))
+               for name in (TERM_PTR_FILE, DOCS_FILE, TF_FILE, DOC_LEN_FILE, META_FILE))
+
+
+def build_from_vector_store(db):
+    """FAISS 스토어의 모든 청크로 BM25 색인을 만듦 (라벨 순서)."""
+    items = []
+    for label in sorted(db.index_to_docstore_id):
+        doc_id = db.index_to_docstore_id[label]
+        items.append((doc_id, db.docstore.search(doc_id).page_content))
+    return SparseIndex.build(items)
+
+
+# 기존 FAISS 인덱스 옆에 BM25 색인만 새로 만들기 (임베딩 없이)
+# 실행: python sparse_index.py [faiss_amc_db_chunked]
+if __name__ == "__main__":
+    import sys
+    from embedding_pipeline import IndexOnlyEmbeddings
+    from mmap_docstore import load_vector_store
+
+    target = sys.argv[1] if len(sys.argv) > 1 else "faiss_amc_db_chunked"
+    sparse = build_from_vector_store(load_vector_store(target, IndexOnlyEmbeddings()))
+    sparse.save(target)
+    print(f"BM25 색인 저장 완료: {target} ({len(sparse.ids)} chunks, {len(sparse.vocab)} terms)")
@@ -1,38 +1,21 @@
 # summarize_audio.py
 # whisper 테스트용
 # 전체 파이프라인에서는 사용되지 않음.
-import whisper
-from openai import OpenAI
+from transcription import transcribe_file
+from summarizer import summarize_transcript_sync
 from dotenv import load_dotenv
+import asyncio
 import os
 
 load_dotenv()
-client = OpenAI()
 
-# 1. Whisper로 음성 파일 STT
+# 1. Whisper로 음성 파일 STT (무음 위치에서 나눈 구간을 병렬로 받아쓰고 이어 붙임)
 def transcribe_audio(file_path):
-    model = whisper.load_model("base")
-    result = model.transcribe(file_path)
-    return result["text"]
+    return asyncio.run(transcribe_file(file_path))
 
-# 2. GPT로 요약
+# 2. GPT로 요약 (서버와 같은 map-reduce 요약 사용)
 def summarize_text(transcript):
-    messages = [
-        {"role": "system", "content": (
-                "You are a kind and knowledgeable assistant who summarizes doctor-patient consultations. "
-                "Your goal is to explain the important points in a way that a person without medical knowledge can understand. "
-                "Focus on clearly summarizing the health concerns and medical advice from the consultation in simple, non-technical language. "
-                "Avoid using medical jargon. Be concise, friendly, and easy to understand."
-            )},
-        {"role": "user", "content": (
-            "다음은 의사와 환자의 상담 녹음입니다. 의학 지식이 없는 사람이 자신의 건강 상태를 쉽게 이해할 수 있도록, 중요한 증상, 진단, 처방 또는 의사의 조언을 간단하고 명확하게 요약해주세요. 요약 언어는 녹음본과 동일한 언어를 사용하세요.:\n\n" + transcript
-        )}
-    ]
-    response = client.chat.completions.create(
-        model="gpt-4",
-        messages=messages
-    )
-    return response.choices[0].message.content
+    return summarize_transcript_sync(transcript)
 
 if __name__ == "__main__":
     file_path = "consultation.mp3" 
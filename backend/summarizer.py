@@ -0,0 +1,211 @@
+# summarizer.py
+# 상담 녹음 받아쓰기 요약 (server.py /summarize-audio 와 summarize_audio.py가 같이 사용)
+#   짧은 받아쓰기: 한 번에 요약 (예전과 같은 프롬프트)
+#   긴 받아쓰기  : 토큰 수 기준으로 나눠서 구간별 요약(map)을 동시에 요청 -> 구간 요약들을 합쳐서 최종 요약(reduce)
+#                  구간 요약을 합쳐도 길면 같은 크기로 다시 나눠서 map을 반복 (reduce 프롬프트는 항상 예산 이하)
+#   구간 요약/최종 요약 모두 내용 해시로 캐시 (같은 녹음을 다시 요약하거나 재시도할 때 API 호출 없음)
+import asyncio
+import hashlib
+import os
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+from nodes.tokens import count_tokens, get_tokenizer
+from tracing import record_cache, record_llm
+
+SUMMARY_MODEL = os.getenv("SUMMARY_MODEL", "gpt-4")
+SINGLE_PASS_TOKENS = int(os.getenv("SUMMARY_SINGLE_PASS_TOKENS", "5000")) # 이하면 한 번에 요약 (gpt-4 8k 문맥 기준)
+CHUNK_TOKENS = int(os.getenv("SUMMARY_CHUNK_TOKENS", "3000")) # map 단계 구간 크기
+SUMMARY_CONCURRENCY = int(os.getenv("SUMMARY_CONCURRENCY", "4")) # 요약 하나가 동시에 보내는 요청 수
+SUMMARY_CACHE_PATH = os.getenv("SUMMARY_CACHE_PATH") # 지정하면 SQLite에 저장 (서버 재시작 후에도 유지)
+SUMMARY_CACHE_SIZE = int(os.getenv("SUMMARY_CACHE_SIZE", "256"))
+MAX_REDUCE_ROUNDS = int(os.getenv("SUMMARY_MAX_REDUCE_ROUNDS", "3")) # 구간 요약을 다시 map하는 최대 횟수
+
+SYSTEM_PROMPT = (
+    "You are a kind and knowledgeable assistant who summarizes doctor-patient consultations. "
+    "Your goal is to explain the important points in a way that a person without medical knowledge can understand. "
+    "Focus on clearly summarizing the health concerns and medical advice from the consultation in simple, non-technical language. "
+    "Avoid using medical jargon. Be concise, friendly, and easy to understand."
+)
+SUMMARY_PROMPT = "다음은 의사와 환자의 상담 녹음입니다. 의학 지식이 없는 사람이 자신의 건강 상태를 쉽게 이해할 수 있도록, 중요한 증상, 진단, 처방 또는 의사의 조언을 간단하고 명확하게 요약해주세요. 요약 언어는 녹음본과 동일한 언어를 사용하세요.\n\n{text}"
+MAP_PROMPT = "다음은 의사와 환자의 긴 상담 녹음 중 {index}/{total}번째 부분입니다. 이 부분에 나온 증상, 검사 결과, 진단, 처방, 의사의 조언을 빠짐없이 간결하게 정리해주세요. 나중에 다른 부분과 합쳐서 최종 요약을 만들 것이므로 인사말은 생략하세요. 정리 언어는 녹음본과 동일한 언어를 사용하세요.\n\n{text}"
+REDUCE_PROMPT = "다음은 의사와 환자의 긴 상담 녹음을 부분별로 정리한 내용입니다. 의학 지식이 없는 사람이 자신의 건강 상태를 쉽게 이해할 수 있도록, 중요한 증상, 진단, 처방 또는 의사의 조언을 하나의 간단하고 명확한 요약으로 합쳐주세요. 중복되는 내용은 한 번만 쓰고, 요약 언어는 녹음본과 동일한 언어를 사용하세요.\n\n{text}"
+
+_SENTENCE_RE = re.compile(r"(?<=[.?!。])\s+|\n+")
+
+
+def content_key(kind, text):
+    return hashlib.sha256(f"{SUMMARY_MODEL}\x00{kind}\x00{text}".encode("utf-8")).hexdigest()
+
+
+class SummaryCache:
+    """내용 해시 -> 요약 LRU 캐시 (path를 주면 SQLite)."""
+
+    def __init__(self, path=None, max_entries=SUMMARY_CACHE_SIZE):
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._memory = OrderedDict()
+        self._conn = None
+        if path:
+            self._conn = sqlite3.connect(path, check_same_thread=False)
+            self._conn.execute("CREATE TABLE IF NOT EXISTS summaries (key TEXT PRIMARY KEY, summary TEXT, last_used REAL)")
+            self._conn.commit()
+
+    def get(self, key):
+        with self._lock:
+            if self._conn is not None:
+                row = self._conn.execute("SELECT summary FROM summaries WHERE key = ?", (key,)).fetchone()
+                summary = row[0] if row else None
+                if summary is not None:
+                    self._conn.execute("UPDATE summaries SET last_used = julianday('now') WHERE key = ?", (key,))
+                    self._conn.commit()
+            else:
+                summary = self._memory.get(key)
+                if summary is not None:
+                    self._memory.move_to_end(key)
+            if summary is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+            return summary
+
+    def put(self, key, summary):
+        with self._lock:
+            if self._conn is not None:
+                self._conn.execute("INSERT OR REPLACE INTO summaries VALUES (?, ?, julianday('now'))", (key, summary))
+                self._conn.execute(
+                    "DELETE FROM summaries WHERE key IN "
+                    "(SELECT key FROM summaries ORDER BY last_used DESC LIMIT -1 OFFSET ?)", (self.max_entries,)
+                )
+                self._conn.commit()
+            else:
+                self._memory[key] = summary
+                self._memory.move_to_end(key)
+                while len(self._memory) > self.max_entries:
+                    self._memory.popitem(last=False)
+
+    def stats(self):
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "backend": "sqlite" if self._conn is not None else "memory",
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / total, 3) if total else None,
+            }
+
+
+summary_cache = SummaryCache(SUMMARY_CACHE_PATH)
+
+
+def split_by_tokens(text, max_tokens=CHUNK_TOKENS):
+    """문장 경계에서 max_tokens 이하 구간으로 나눔 (한 문장이 너무 길면 토큰 단위로 자름)."""
+    tokenizer = get_tokenizer()
+    chunks, current, current_tokens = [], [], 0
+    for sentence in filter(None, (s.strip() for s in _SENTENCE_RE.split(text))):
+        tokens = tokenizer.encode(sentence)
+        if len(tokens) > max_tokens: # 문장 부호 없이 길게 이어진 받아쓰기
+            if current:
+                chunks.append(" ".join(current))
+                current, current_tokens = [], 0
+            chunks.extend(tokenizer.decode(tokens[i:i + max_tokens]) for i in range(0, len(tokens), max_tokens))
+            continue
+        if current_tokens + len(tokens) > max_tokens:
+            chunks.append(" ".join(current))
+            current, current_tokens = [], 0
+        current.append(sentence)
+        current_tokens += len(tokens)
+    if current:
+        chunks.append(" ".join(current))
+    return chunks
+
+
+def truncate_tokens(text, max_tokens):
+    """앞에서부터 max_tokens 이하로 자름 (디코딩한 문자열을 다시 세어도 넘지 않게)."""
+    tokenizer = get_tokenizer()
+    tokens = tokenizer.encode(text)
+    keep = max_tokens
+    while len(tokens) > max_tokens:
+        text = tokenizer.decode(tokens[:keep])
+        tokens = tokenizer.encode(text)
+        keep -= 1
+    return text
+
+
+class Summarizer:
+    def __init__(self, client, cache=summary_cache, concurrency=SUMMARY_CONCURRENCY):
+        self.client = client # openai.AsyncOpenAI
+        self.cache = cache
+        self._semaphore = asyncio.Semaphore(concurrency)
+
+    async def _complete(self, kind, prompt):
+        key = content_key(kind, prompt)
+        cached = await asyncio.to_thread(self.cache.get, key) # SQLite 캐시일 수 있으므로 이벤트 루프 밖에서
+        record_cache(f"summary_{kind}", cached is not None)
+        if cached is not None:
+            return cached
+        async with self._semaphore:
+            started = time.perf_counter()
+            response = await self.client.chat.completions.create(
+                model=SUMMARY_MODEL,
+                messages=[
+                    {"role": "system", "content": SYSTEM_PROMPT},
+                    {"role": "user", "content": prompt},
+                ],
+            )
+            usage = response.usage
+            record_llm(f"summarize_{kind}", SUMMARY_MODEL, usage and usage.prompt_tokens,
+                       usage and usage.completion_tokens, time.perf_counter() - started)
+        summary = response.choices[0].message.content
+        await asyncio.to_thread(self.cache.put, key, summary)
+        return summary
+
+    async def _map(self, chunks):
+        total = len(chunks)
+        return await asyncio.gather(*(
+            self._complete("map", MAP_PROMPT.format(index=i, total=total, text=chunk))
+            for i, chunk in enumerate(chunks, 1)
+        ))
+
+    async def _reduce(self, partials):
+        combined = "\n\n".join(partials)
+        tokens = count_tokens(combined)
+        for _ in range(MAX_REDUCE_ROUNDS):
+            if tokens <= SINGLE_PASS_TOKENS:
+                break
+            # 구간 요약을 합쳐도 너무 길면 CHUNK_TOKENS 단위로 다시 나눠서 한 번 더 요약
+            # (구간 수가 줄지 않아도 각 구간 요약은 원문보다 짧아지므로 반복)
+            shorter = "\n\n".join(await self._map(split_by_tokens(combined)))
+            shorter_tokens = count_tokens(shorter)
+            if shorter_tokens >= tokens: # 더 줄어들지 않음 -> 아래에서 잘라냄
+                break
+            combined, tokens = shorter, shorter_tokens
+        if tokens > SINGLE_PASS_TOKENS:
+            # 반복해도 예산 안에 들어오지 않으면 뒤쪽을 잘라서라도 문맥 한도를 넘는 요청은 보내지 않음
+            combined = truncate_tokens(combined, SINGLE_PASS_TOKENS)
+        return await self._complete("reduce", REDUCE_PROMPT.format(text=combined))
+
+    async def summarize(self, transcript):
+        transcript = transcript.strip()
+        if not transcript:
+            return ""
+        if count_tokens(transcript) <= SINGLE_PASS_TOKENS:
+            return await self._complete("single", SUMMARY_PROMPT.format(text=transcript))
+        return await self._reduce(await self._map(split_by_tokens(transcript)))
+
+
+async def summarize_transcript(transcript, client):
+    return await Summarizer(client).summarize(transcript)
+
+
+def summarize_transcript_sync(transcript, client=None):
+    """CLI용 (이벤트 루프 밖에서 호출)."""
+    if client is None:
+        from openai import AsyncOpenAI
+        client = AsyncOpenAI()
+    return asyncio.run(summarize_transcript(transcript, client))
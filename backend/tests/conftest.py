@@ -0,0 +1,5 @@
+# 백엔드 모듈은 backend 폴더를 기준으로 import하므로 (python -m pytest는 backend 폴더에서 실행)
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
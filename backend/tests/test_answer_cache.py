@@ -0,0 +1,45 @@
+import numpy as np
+
+from nodes import answer_cache as answer_cache_module
+from semantic_cache import InMemoryCacheStore, SemanticCache
+
+
+def make_state(session_id, history, answer=None):
+    state = {"user_input": "그럼 약은요?", "query": "두통 약은 무엇이 있나요?", "session_id": session_id,
+             "history": history, "query_vector": np.ones(4, dtype=np.float32), "generation_started_at": 0.0}
+    if answer is not None:
+        state["answer"] = answer
+    return state
+
+
+def test_history_conditioned_answer_is_not_shared(monkeypatch):
+    cache = SemanticCache(InMemoryCacheStore(), threshold=0.9)
+    monkeypatch.setattr(answer_cache_module, "answer_cache", cache)
+    history = {"summary": "사용자는 고혈압으로 암로디핀을 복용 중", "turns": [
+        {"role": "user", "content": "머리가 아파요"}, {"role": "assistant", "content": "..."}]}
+
+    answer_cache_module.cache_store_node(make_state("alice", history, answer="암로디핀과 함께 드셔도 되는 약은..."))
+    assert len(cache.store) == 0
+
+    # 같은 검색 질문(같은 벡터)을 다른 세션이 물어도 alice의 답변은 나오지 않음
+    other = answer_cache_module.cache_lookup_node(make_state("bob", None))
+    assert other["cache_hit"] is False and "answer" not in other
+
+
+def test_history_free_answer_is_cached(monkeypatch):
+    cache = SemanticCache(InMemoryCacheStore(), threshold=0.9)
+    monkeypatch.setattr(answer_cache_module, "answer_cache", cache)
+
+    answer_cache_module.cache_store_node(make_state("alice", {"summary": "", "turns": []}, answer="일반 답변"))
+    hit = answer_cache_module.cache_lookup_node(make_state("bob", None))
+    assert hit["cache_hit"] is True and hit["answer"] == "일반 답변"
+
+
+def test_lookup_skipped_when_session_has_history(monkeypatch):
+    cache = SemanticCache(InMemoryCacheStore(), threshold=0.9)
+    monkeypatch.setattr(answer_cache_module, "answer_cache", cache)
+    answer_cache_module.cache_store_node(make_state(None, None, answer="일반 답변"))
+
+    history = {"summary": "", "turns": [{"role": "user", "content": "어지러워요"}]}
+    result = answer_cache_module.cache_lookup_node(make_state("alice", history))
+    assert result["cache_hit"] is False
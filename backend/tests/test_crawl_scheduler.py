@@ -0,0 +1,20 @@
+from crawl_scheduler import CrawlCheckpoint
+
+
+def make_doc(url, content):
+    return {"content": content, "metadata": {"category": "질환", "source_url": url, "title": url}}
+
+
+def test_dropped_documents_are_fetched_again_after_restore(tmp_path):
+    checkpoint = CrawlCheckpoint(str(tmp_path))
+    checkpoint.record_document(make_doc("u1", "위염 설명"))
+    checkpoint.record_document(make_doc("u2", "Error fetching content."))
+
+    restored = CrawlCheckpoint(str(tmp_path))
+    assert restored.drop_documents(lambda doc: doc["content"] == "Error fetching content.") == 1
+    assert restored.has_document("질환", "u1")
+    assert not restored.has_document("질환", "u2")
+
+    # 다시 받은 내용이 나중 줄로 기록되므로 다음 복원에서는 새 내용이 남음
+    restored.record_document(make_doc("u2", "장염 설명"))
+    assert CrawlCheckpoint(str(tmp_path)).documents["질환\tu2"]["content"] == "장염 설명"
@@ -0,0 +1,50 @@
+from corpus_io import read_corpus, write_corpus
+from crawl_state import CrawlState, corpus_documents
+
+
+def key_fn(category, url):
+    return f"{category}\t{url}"
+
+
+def make_doc(url, content):
+    return {"content": content, "metadata": {"category": "질환", "source_url": url, "title": url}}
+
+
+def test_failed_new_document_is_not_stored_or_emitted(tmp_path):
+    state = CrawlState(str(tmp_path / "state.sqlite3"))
+    delta = state.apply_run([(make_doc("u1", "Error fetching content."), {"failed": True})], {"질환"}, key_fn)
+    assert delta == []
+    assert len(state) == 0
+
+    # 다음 실행에서 받기에 성공하면 그때 added
+    delta = state.apply_run([(make_doc("u1", "위염 설명"), {})], {"질환"}, key_fn)
+    assert [record["op"] for record in delta] == ["added"]
+
+
+def test_failed_known_document_keeps_old_content(tmp_path):
+    state = CrawlState(str(tmp_path / "state.sqlite3"))
+    state.apply_run([(make_doc("u1", "위염 설명"), {})], {"질환"}, key_fn)
+    delta = state.apply_run([(make_doc("u1", "Error fetching content."), {"failed": True})], {"질환"}, key_fn)
+    assert delta == []
+    assert state.get(key_fn("질환", "u1"))[2]["content"] == "위염 설명"
+
+
+def test_failed_retry_does_not_write_error_text_into_corpus(tmp_path):
+    state = CrawlState(str(tmp_path / "state.sqlite3"))
+    state.apply_run([(make_doc("u1", "위염 설명"), {})], {"질환"}, key_fn)
+
+    # 다시 받기에 실패: 아는 문서는 예전 내용, 처음 보는 문서는 제외
+    fetched = [(make_doc("u1", "Error fetching content."), {"failed": True}),
+               (make_doc("u2", "Content not found."), {"failed": True}),
+               (make_doc("u3", "장염 설명"), {})]
+    state.apply_run(fetched, {"질환"}, key_fn)
+    corpus_path = str(tmp_path / "corpus.jsonl")
+    write_corpus(corpus_path, corpus_documents(fetched, key_fn, state))
+
+    corpus = {doc["metadata"]["source_url"]: doc["content"] for doc in read_corpus(corpus_path)}
+    assert corpus == {"u1": "위염 설명", "u3": "장염 설명"}
+
+
+def test_failed_documents_are_dropped_without_state():
+    fetched = [(make_doc("u1", "Error fetching content."), {"failed": True}), (make_doc("u2", "위염 설명"), None)]
+    assert [doc["content"] for doc in corpus_documents(fetched, key_fn)] == ["위염 설명"]
@@ -0,0 +1,65 @@
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+faiss = pytest.importorskip("faiss")
+
+from faiss_index import add_documents, build_index, remove_documents
+
+
+class DictDocstore(dict):
+    def add(self, texts):
+        self.update(texts)
+
+    def delete(self, ids):
+        for doc_id in ids:
+            del self[doc_id]
+
+
+def make_db(index_type, vectors):
+    ids = [f"c{i}" for i in range(len(vectors))]
+    return SimpleNamespace(index=build_index(index_type, vectors), index_to_docstore_id=dict(enumerate(ids)),
+                           docstore=DictDocstore(zip(ids, ids)))
+
+
+@pytest.mark.parametrize("index_type", ["Flat", "IVFFlat", "IVFPQ"])
+def test_removed_chunks_leave_the_index(index_type):
+    vectors = np.random.default_rng(0).normal(size=(400, 16)).astype(np.float32)
+    db = make_db(index_type, vectors)
+
+    assert remove_documents(db, [f"c{i}" for i in range(50)]) == 50
+    assert db.index.ntotal == 350
+    assert set(db.index_to_docstore_id.values()) == {f"c{i}" for i in range(50, 400)}
+
+    # 남은 라벨은 모두 벡터를 복원할 수 있고 (bench_ann_index가 이 라벨로 복원함), 검색 결과에도 지운 라벨은 없음
+    for label, doc_id in db.index_to_docstore_id.items():
+        assert db.index.reconstruct(label).shape == (16,)
+    _, labels = db.index.search(vectors[:50], 5)
+    assert set(labels.ravel()) <= set(db.index_to_docstore_id)
+
+
+def test_ivf_labels_stay_unique_after_remove_and_add():
+    vectors = np.random.default_rng(1).normal(size=(400, 16)).astype(np.float32)
+    db = make_db("IVFFlat", vectors)
+    remove_documents(db, ["c399"])
+    add_documents(db, vectors[:2], ["x", "y"], ["n0", "n1"])
+    assert db.index.ntotal == 401
+    assert sorted(db.index_to_docstore_id)[-2:] == [399, 400]
+    assert np.allclose(db.index.reconstruct(400), vectors[1])
+
+
+def test_remove_from_index_without_direct_map_changes_nothing():
+    vectors = np.random.default_rng(2).normal(size=(400, 16)).astype(np.float32)
+    db = make_db("IVFFlat", vectors)
+    # 예전 build_index처럼 add()로 채운 IVF 인덱스 (Hashtable direct map이 비어 있음)
+    quantizer = faiss.IndexFlatL2(16)
+    db.index = faiss.IndexIVFFlat(quantizer, 16, 8)
+    db.index.set_direct_map_type(faiss.DirectMap.Hashtable)
+    db.index.train(vectors)
+    db.index.add(vectors)
+
+    with pytest.raises(RuntimeError):
+        remove_documents(db, ["c0", "c1"])
+    assert db.index.ntotal == 400
+    assert len(db.index_to_docstore_id) == 400 and "c0" in db.docstore
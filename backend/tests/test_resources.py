@@ -0,0 +1,36 @@
+import pytest
+
+import resources
+
+
+@pytest.fixture(autouse=True)
+def empty_registry(monkeypatch):
+    monkeypatch.setattr(resources, "_registry", {})
+
+
+def test_load_all_continues_after_failure():
+    @resources.lazy_resource("broken")
+    def get_broken():
+        raise RuntimeError("index not found")
+
+    @resources.lazy_resource("model")
+    def get_model():
+        return "model"
+
+    assert resources.load_all() == ["broken"]
+    status = resources.status()
+    assert status["model"]["loaded"] and status["model"]["error"] is None
+    assert not status["broken"]["loaded"] and "index not found" in status["broken"]["error"]
+    assert not resources.all_loaded(["model", "broken"])
+
+
+def test_load_all_loads_resources_registered_while_loading():
+    def make_late():
+        @resources.lazy_resource("late") # 다른 리소스를 로드하면서 import된 모듈이 등록하는 경우
+        def get_late():
+            return "late"
+        return "first"
+
+    resources.lazy_resource("first")(make_late)
+    assert resources.load_all(exclude=("whisper",)) == []
+    assert resources.all_loaded(["first", "late"])
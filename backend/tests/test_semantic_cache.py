@@ -0,0 +1,72 @@
+import time
+
+import numpy as np
+import pytest
+
+from semantic_cache import InMemoryCacheStore, SQLiteCacheStore, SemanticCache
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def make_store(request, tmp_path):
+    def make(max_entries=1000):
+        if request.param == "sqlite":
+            return SQLiteCacheStore(str(tmp_path / "cache.sqlite3"), max_entries)
+        return InMemoryCacheStore(max_entries)
+    return make
+
+
+def vec(*values):
+    return np.array(values, dtype=np.float32)
+
+
+def test_store_put_get_and_lru_eviction(make_store):
+    store = make_store(max_entries=2)
+    assert store.put("a", vec(1, 0), "A", 1.0) == []
+    store.put("b", vec(0, 1), "B", 1.0)
+    time.sleep(0.01) # SQLite는 last_used 시각으로 LRU 판정
+    store.get("a") # a를 최근 사용으로 갱신 -> b가 밀려남
+    assert store.put("c", vec(1, 1), "C", 1.0) == ["b"]
+    assert store.get("b") is None
+    vector, answer, _, seconds = store.get("a")
+    assert np.array_equal(vector, vec(1, 0)) and answer == "A" and seconds == 1.0
+    assert sorted(item[0] for item in store.items()) == ["a", "c"]
+    store.delete("a")
+    assert len(store) == 1
+    store.set_meta("index_fingerprint", "x")
+    assert store.get_meta("index_fingerprint") == "x"
+    store.clear()
+    assert len(store) == 0
+
+
+def test_lookup_hit_and_miss(make_store):
+    cache = SemanticCache(make_store(), threshold=0.9)
+    cache.store_answer(vec(1, 0, 0), "두통 답변", 2.0)
+    assert cache.lookup(vec(1, 0.1, 0)) == "두통 답변"
+    assert cache.lookup(vec(0, 1, 0)) is None
+    assert cache.stats()["hits"] == 1 and cache.stats()["misses"] == 1
+    assert cache.stats()["latency_saved_seconds"] == 2.0
+
+
+def test_expired_entry_does_not_hide_valid_match(make_store):
+    cache = SemanticCache(make_store(), threshold=0.9, ttl_seconds=60)
+    cache.store_answer(vec(1, 0.2, 0), "유효한 답변", 1.0)
+    cache.store_answer(vec(1, 0, 0), "만료된 답변", 1.0)
+    cache._created[-1] -= 120 # 더 비슷한 항목(마지막에 저장)을 만료시킴
+
+    assert cache.lookup(vec(1, 0, 0)) == "유효한 답변"
+    assert len(cache.store) == 1
+
+
+def test_sqlite_entries_from_other_workers_are_visible(tmp_path):
+    path = str(tmp_path / "cache.sqlite3")
+    worker_a = SemanticCache(SQLiteCacheStore(path), threshold=0.9)
+    worker_b = SemanticCache(SQLiteCacheStore(path), threshold=0.9)
+
+    worker_a.store_answer(vec(1, 0, 0), "A가 만든 답변", 1.0)
+    assert worker_b.lookup(vec(1, 0, 0)) == "A가 만든 답변"
+
+    # 다른 워커가 지운 항목도 반영
+    worker_a.store.clear()
+    worker_a.store_answer(vec(0, 1, 0), "새 답변", 1.0)
+    assert worker_b.lookup(vec(1, 0, 0)) is None
+    assert worker_b.lookup(vec(0, 1, 0)) == "새 답변"
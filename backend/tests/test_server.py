@@ -0,0 +1,57 @@
+import asyncio
+
+import pytest
+
+pytest.importorskip("fastapi")
+
+from starlette.requests import ClientDisconnect
+
+from server import UploadStreamingResponse
+
+
+def make_upload(tmp_path):
+    path = tmp_path / "upload.wav"
+    path.write_bytes(b"RIFF")
+    return path
+
+
+async def body():
+    yield "data: segment\n\n"
+
+
+def test_upload_removed_when_client_disconnects_before_body(tmp_path):
+    path = make_upload(tmp_path)
+    started = []
+
+    async def never_started():
+        started.append(True)
+        yield "data: segment\n\n"
+
+    async def send(message): # 응답 헤더를 보내는 순간 연결이 끊긴 상태
+        raise OSError("connection reset")
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    response = UploadStreamingResponse(never_started(), str(path), media_type="text/event-stream")
+    scope = {"type": "http", "asgi": {"spec_version": "2.4"}}
+    with pytest.raises(ClientDisconnect):
+        asyncio.run(response(scope, receive, send))
+    assert not started and not path.exists()
+
+
+def test_upload_removed_after_full_response(tmp_path):
+    path = make_upload(tmp_path)
+    sent = []
+
+    async def send(message):
+        sent.append(message)
+
+    async def receive():
+        await asyncio.sleep(10)
+        return {"type": "http.disconnect"}
+
+    response = UploadStreamingResponse(body(), str(path), media_type="text/event-stream")
+    asyncio.run(response({"type": "http", "asgi": {"spec_version": "2.4"}}, receive, send))
+    assert sent[-1] == {"type": "http.response.body", "body": b"", "more_body": False}
+    assert not path.exists()
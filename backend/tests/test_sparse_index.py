@@ -0,0 +1,32 @@
+import os
+
+import numpy as np
+
+from sparse_index import DOCS_FILE, SparseIndex
+
+
+def test_save_does_not_touch_loaded_mmap(tmp_path):
+    path = str(tmp_path)
+    SparseIndex.build([("a", "두통 완화 방법"), ("b", "위염 증상과 치료")]).save(path)
+    live = SparseIndex.load(path) # 서버처럼 mmap_mode로 열어 둠
+    before = np.array(live.docs)
+    docs_inode = os.stat(os.path.join(path, DOCS_FILE)).st_ino
+
+    # 더 큰 색인으로 다시 저장 (예전 방식이면 열려 있는 파일이 잘리거나 덮어써짐)
+    SparseIndex.build([(str(i), f"증상 {i} 두통 위염 간염") for i in range(200)]).save(path)
+
+    assert np.array_equal(np.array(live.docs), before)
+    assert [doc_id for doc_id, _, _ in live.search("두통", 2)] == ["a"]
+    assert len(SparseIndex.load(path).ids) == 200
+    assert not [name for name in os.listdir(path) if name.startswith(".tmp-")]
+    assert os.stat(os.path.join(path, DOCS_FILE)).st_ino != docs_inode # 같은 파일을 고친 게 아니라 교체됨
+
+
+def test_saved_files_keep_normal_permissions(tmp_path):
+    path = str(tmp_path)
+    umask = os.umask(0o022)
+    try:
+        SparseIndex.build([("a", "두통 완화 방법")]).save(path)
+    finally:
+        os.umask(umask)
+    assert oct(os.stat(os.path.join(path, DOCS_FILE)).st_mode & 0o777) == oct(0o644)
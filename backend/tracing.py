@@ -0,0 +1,266 @@
+# tracing.py
+# 요청별 단계 시간 / LLM 토큰·비용 / 캐시 hit 기록
+#   - Prometheus 텍스트 형식 히스토그램/카운터 (/metrics)
+#   - 요청마다 request id를 붙인 JSON 로그 한 줄 (medot.request 로거)
+# 그래프 노드는 traced_node로 감싸고(main.py), LLM 호출은 record_llm으로, 캐시는 record_cache로,
+# 의료 질문 필터 판단은 record_filter로 기록
+import contextvars
+import functools
+import inspect
+import json
+import logging
+import os
+import threading
+import time
+import uuid
+
+TRACE_LOG = os.getenv("TRACE_LOG", "1") != "0"
+REQUEST_ID_HEADER = "x-request-id"
+# gpt-4 (8k) 기준 1K 토큰당 USD (모델을 바꾸면 환경 변수로 맞춤)
+PROMPT_PRICE_PER_1K = float(os.getenv("LLM_PROMPT_PRICE_PER_1K", "0.03"))
+COMPLETION_PRICE_PER_1K = float(os.getenv("LLM_COMPLETION_PRICE_PER_1K", "0.06"))
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+UNTRACED_PATHS = ("/metrics", "/healthz", "/readyz") # 로그/지표에서 제외 (스크레이프/헬스체크 잡음)
+
+logger = logging.getLogger("medot.request")
+if not logger.handlers: # uvicorn은 우리 로거를 설정하지 않으므로 직접 stdout으로 내보냄
+    _handler = logging.StreamHandler()
+    _handler.setFormatter(logging.Formatter("%(message)s"))
+    logger.addHandler(_handler)
+    logger.setLevel(logging.INFO)
+    logger.propagate = False
+
+_metrics = []
+
+
+def _format_labels(names, values, extra=()):
+    pairs = list(zip(names, values)) + list(extra)
+    if not pairs:
+        return ""
+    escaped = (str(v).replace("\\", "\\\\").replace('"', '\\"') for _, v in pairs)
+    return "{" + ",".join(f'{k}="{v}"' for (k, _), v in zip(pairs, escaped)) + "}"
+
+
+class Counter:
+    def __init__(self, name, help_text, labels=()):
+        self.name, self.help, self.labels = name, help_text, labels
+        self._values = {}
+        self._lock = threading.Lock()
+        _metrics.append(self)
+
+    def inc(self, *label_values, amount=1.0):
+        with self._lock:
+            self._values[label_values] = self._values.get(label_values, 0.0) + amount
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            for values, total in sorted(self._values.items()):
+                lines.append(f"{self.name}{_format_labels(self.labels, values)} {total:g}")
+        return lines
+
+
+class Histogram:
+    def __init__(self, name, help_text, labels=(), buckets=DEFAULT_BUCKETS):
+        self.name, self.help, self.labels, self.buckets = name, help_text, labels, buckets
+        self._values = {} # label values -> [bucket counts..., +Inf count, sum]
+        self._lock = threading.Lock()
+        _metrics.append(self)
+
+    def observe(self, *label_values, value):
+        with self._lock:
+            counts = self._values.setdefault(label_values, [0] * (len(self.buckets) + 1) + [0.0])
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    counts[i] += 1
+            counts[len(self.buckets)] += 1
+            counts[-1] += value
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            for values, counts in sorted(self._values.items()):
+                for bound, count in zip(self.buckets, counts):
+                    lines.append(f"{self.name}_bucket{_format_labels(self.labels, values, [('le', f'{bound:g}')])} {count}")
+                total = counts[len(self.buckets)]
+                lines.append(f"{self.name}_bucket{_format_labels(self.labels, values, [('le', '+Inf')])} {total}")
+                lines.append(f"{self.name}_sum{_format_labels(self.labels, values)} {counts[-1]:.6f}")
+                lines.append(f"{self.name}_count{_format_labels(self.labels, values)} {total}")
+        return lines
+
+
+HTTP_SECONDS = Histogram("medot_http_request_duration_seconds", "HTTP 요청 처리 시간 (스트리밍은 마지막 바이트까지)",
+                         ("method", "route", "status"))
+NODE_SECONDS = Histogram("medot_graph_node_duration_seconds", "LangGraph 노드 실행 시간", ("node",))
+LLM_SECONDS = Histogram("medot_llm_call_duration_seconds", "LLM 호출 시간", ("stage", "model"))
+LLM_TOKENS = Counter("medot_llm_tokens_total", "LLM 토큰 수", ("stage", "model", "kind"))
+LLM_COST = Counter("medot_llm_cost_usd_total", "LLM 추정 비용 (USD)", ("stage", "model"))
+CACHE_REQUESTS = Counter("medot_cache_requests_total", "캐시 조회 결과", ("cache", "result"))
+FILTER_DECISIONS = Counter("medot_medical_filter_total", "의료 질문 필터 판단 (method: local / llm)", ("method", "result"))
+
+
+def render_metrics():
+    lines = []
+    for metric in _metrics:
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
+
+
+class Trace:
+    """요청 하나의 단계별 기록 (JSON 로그로 출력)."""
+
+    def __init__(self, request_id, method, path):
+        self.request_id = request_id
+        self.method = method
+        self.path = path
+        self.started = time.perf_counter()
+        self.nodes = []
+        self.llm_calls = []
+        self.cache = {}
+        self.filter = None
+        self._lock = threading.Lock() # 동기 노드/콜백은 스레드에서 실행됨
+
+    def add(self, field, item):
+        with self._lock:
+            getattr(self, field).append(item)
+
+    def to_log(self, status):
+        with self._lock:
+            return {
+                "request_id": self.request_id,
+                "method": self.method,
+                "path": self.path,
+                "status": status,
+                "total_ms": round((time.perf_counter() - self.started) * 1000, 1),
+                "nodes": list(self.nodes),
+                "llm": list(self.llm_calls),
+                "prompt_tokens": sum(call["prompt_tokens"] for call in self.llm_calls),
+                "completion_tokens": sum(call["completion_tokens"] for call in self.llm_calls),
+                "cost_usd": round(sum(call["cost_usd"] for call in self.llm_calls), 6),
+                "cache": dict(self.cache),
+                "filter": self.filter,
+            }
+
+
+current_trace = contextvars.ContextVar("current_trace", default=None)
+
+
+def current_request_id():
+    trace = current_trace.get()
+    return trace.request_id if trace else None
+
+
+def llm_cost(prompt_tokens, completion_tokens):
+    return (prompt_tokens * PROMPT_PRICE_PER_1K + completion_tokens * COMPLETION_PRICE_PER_1K) / 1000
+
+
+def record_llm(stage, model, prompt_tokens, completion_tokens, seconds):
+    prompt_tokens, completion_tokens = prompt_tokens or 0, completion_tokens or 0
+    cost = llm_cost(prompt_tokens, completion_tokens)
+    LLM_SECONDS.observe(stage, model, value=seconds)
+    LLM_TOKENS.inc(stage, model, "prompt", amount=prompt_tokens)
+    LLM_TOKENS.inc(stage, model, "completion", amount=completion_tokens)
+    LLM_COST.inc(stage, model, amount=cost)
+    trace = current_trace.get()
+    if trace is not None:
+        trace.add("llm_calls", {"stage": stage, "model": model, "ms": round(seconds * 1000, 1),
+                                "prompt_tokens": prompt_tokens, "completion_tokens": completion_tokens,
+                                "cost_usd": round(cost, 6)})
+
+
+def record_cache(cache, hit):
+    result = "hit" if hit else "miss"
+    CACHE_REQUESTS.inc(cache, result)
+    trace = current_trace.get()
+    if trace is not None:
+        with trace._lock:
+            counts = trace.cache.setdefault(cache, {"hit": 0, "miss": 0})
+            counts[result] += 1
+
+
+def record_filter(method, is_medical, llm_response=None):
+    result = "medical" if is_medical else "not_medical"
+    FILTER_DECISIONS.inc(method, result)
+    trace = current_trace.get()
+    if trace is not None:
+        decision = {"method": method, "result": result}
+        if llm_response is not None:
+            decision["llm_response"] = llm_response
+        with trace._lock:
+            trace.filter = decision
+
+
+def _record_node(name, started):
+    seconds = time.perf_counter() - started
+    NODE_SECONDS.observe(name, value=seconds)
+    trace = current_trace.get()
+    if trace is not None:
+        trace.add("nodes", {"node": name, "ms": round(seconds * 1000, 1)})
+
+
+def traced_node(name, func):
+    """그래프 노드 함수(동기/비동기)를 실행 시간 기록으로 감쌈. config 인자 등 시그니처는 그대로 유지."""
+    if inspect.iscoroutinefunction(func):
+        @functools.wraps(func)
+        async def async_wrapper(*args, **kwargs):
+            started = time.perf_counter()
+            try:
+                return await func(*args, **kwargs)
+            finally:
+                _record_node(name, started)
+        return async_wrapper
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        started = time.perf_counter()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            _record_node(name, started)
+    return wrapper
+
+
+class TracingMiddleware:
+    """ASGI 미들웨어: 요청마다 Trace를 만들고 응답이 끝나면(스트리밍 포함) 지표와 JSON 로그를 남김."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"].startswith(UNTRACED_PATHS):
+            return await self.app(scope, receive, send)
+
+        headers = dict(scope.get("headers") or [])
+        request_id = headers.get(REQUEST_ID_HEADER.encode(), b"").decode("latin-1") or uuid.uuid4().hex
+        trace = Trace(request_id, scope["method"], scope["path"])
+        token = current_trace.set(trace)
+        status = 500
+        finished = False
+
+        def finish():
+            nonlocal finished
+            if finished:
+                return
+            finished = True
+            route = scope.get("route")
+            route_path = getattr(route, "path", None) or "unmatched" # 404 경로로 라벨이 늘어나지 않게
+            HTTP_SECONDS.observe(scope["method"], route_path, str(status),
+                                 value=time.perf_counter() - trace.started)
+            if TRACE_LOG:
+                logger.info(json.dumps(trace.to_log(status), ensure_ascii=False))
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                message.setdefault("headers", [])
+                message["headers"] = list(message["headers"]) + [(REQUEST_ID_HEADER.encode(), request_id.encode())]
+            await send(message)
+            if message["type"] == "http.response.body" and not message.get("more_body", False):
+                finish()
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            finish() # 클라이언트가 중간에 끊은 경우
+            current_trace.reset(token)
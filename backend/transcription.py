@@ -0,0 +1,187 @@
+# transcription.py
+# 긴 상담 녹음을 구간별로 나눠서 병렬로 받아쓰기
+#   1. 업로드를 고유한 임시 파일에 조금씩 저장 (같은 파일 이름 업로드끼리 충돌 없음, 전체를 메모리에 올리지 않음)
+#   2. ffmpeg로 16kHz mono PCM을 조금씩 디코딩
+#   3. 에너지 기반 VAD: 무음 구간에서 자르고(최대 30초 = whisper 입력 창), 무음뿐인 구간은 건너뜀
+#   4. 구간마다 Whisper 모델 풀에서 병렬 transcribe, 끝나는 대로 순서대로 yield -> 부분 결과 스트리밍
+import asyncio
+import os
+import tempfile
+from collections import deque
+
+import numpy as np
+
+from model_registry import whisper_pool, SAMPLE_RATE
+
+UPLOAD_CHUNK_BYTES = 1024 * 1024
+UPLOAD_TMP_DIR = os.getenv("UPLOAD_TMP_DIR") or None # None이면 시스템 임시 폴더
+
+DECODE_BLOCK_SECONDS = 5 # ffmpeg 출력에서 한 번에 읽는 길이
+FRAME_SECONDS = 0.03 # VAD 프레임 길이
+MIN_SEGMENT_SECONDS = float(os.getenv("VAD_MIN_SEGMENT_SECONDS", "10")) # 이보다 짧게는 자르지 않음
+MAX_SEGMENT_SECONDS = float(os.getenv("VAD_MAX_SEGMENT_SECONDS", "30"))
+MIN_SILENCE_SECONDS = 0.3 # 이 길이 이상 조용하면 자를 수 있는 위치
+SILENCE_FLOOR_DB = -45.0 # 이보다 작으면 항상 무음
+SILENCE_BELOW_PEAK_DB = 30.0 # 구간의 큰 소리(90퍼센타일)보다 이만큼 작으면 무음
+# 한 요청이 동시에 transcribe하는 구간 수 (모델 풀은 모든 요청이 공유)
+TRANSCRIBE_PARALLEL = int(os.getenv("TRANSCRIBE_PARALLEL", "0")) or whisper_pool.pool_size
+
+
+async def save_upload(upload, directory=UPLOAD_TMP_DIR):
+    """UploadFile을 고유한 임시 파일에 조금씩 복사하고 경로를 반환 (삭제는 호출한 쪽에서)."""
+    suffix = os.path.splitext(upload.filename or "")[1]
+    fd, path = tempfile.mkstemp(prefix="medot_upload_", suffix=suffix, dir=directory)
+    try:
+        with os.fdopen(fd, "wb") as f:
+            while chunk := await upload.read(UPLOAD_CHUNK_BYTES):
+                f.write(chunk)
+    except Exception:
+        os.remove(path)
+        raise
+    return path
+
+
+async def decode_audio_blocks(path, block_seconds=DECODE_BLOCK_SECONDS):
+    """ffmpeg로 디코딩한 16kHz mono float32 오디오를 block_seconds씩 yield."""
+    process = await asyncio.create_subprocess_exec(
+        "ffmpeg", "-nostdin", "-loglevel", "error", "-i", path,
+        "-f", "s16le", "-ac", "1", "-ar", str(SAMPLE_RATE), "-",
+        stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.PIPE,
+    )
+    block_bytes = int(block_seconds * SAMPLE_RATE) * 2
+    try:
+        while True:
+            data = await process.stdout.read(block_bytes)
+            if not data:
+                break
+            if len(data) % 2: # 16bit 샘플 경계에 맞춤
+                data += await process.stdout.readexactly(1)
+            yield np.frombuffer(data, dtype=np.int16).astype(np.float32) / 32768.0
+        if await process.wait() != 0:
+            error = (await process.stderr.read()).decode(errors="replace")
+            raise RuntimeError(f"오디오 디코딩 실패: {error.strip()[-500:]}")
+    finally:
+        if process.returncode is None: # 클라이언트가 끊겨서 중간에 닫힌 경우
+            process.kill()
+            await process.wait()
+
+
+def frame_db(audio):
+    frame = int(FRAME_SECONDS * SAMPLE_RATE)
+    count = len(audio) // frame
+    if count == 0:
+        return np.zeros(0, dtype=np.float32)
+    frames = audio[:count * frame].reshape(count, frame)
+    rms = np.sqrt(np.mean(frames ** 2, axis=1) + 1e-12)
+    return 20 * np.log10(rms)
+
+
+class SpeechSegmenter:
+    """오디오 블록을 받아서 무음 위치에서 자른 (시작 초, 오디오) 구간을 내보냄."""
+
+    def __init__(self):
+        self.buffer = np.zeros(0, dtype=np.float32)
+        self.offset = 0 # buffer 첫 샘플의 전체 오디오 기준 위치
+
+    def _silence_mask(self, levels):
+        threshold = max(SILENCE_FLOOR_DB, float(np.percentile(levels, 90)) - SILENCE_BELOW_PEAK_DB)
+        return levels < threshold
+
+    def _cut_point(self):
+        """MIN~MAX 사이에서 가장 뒤쪽의 충분히 긴 무음 가운데 (샘플 위치). 없으면 가장 조용한 프레임."""
+        frame = int(FRAME_SECONDS * SAMPLE_RATE)
+        limit = min(len(self.buffer), int(MAX_SEGMENT_SECONDS * SAMPLE_RATE))
+        levels = frame_db(self.buffer[:limit])
+        silent = self._silence_mask(levels)
+        min_frame = int(MIN_SEGMENT_SECONDS / FRAME_SECONDS)
+        need = max(1, int(MIN_SILENCE_SECONDS / FRAME_SECONDS))
+        run_end = None
+        run = 0
+        for i in range(len(silent) - 1, min_frame - 1, -1):
+            if silent[i]:
+                run += 1
+                run_end = run_end if run_end is not None else i
+                if run >= need:
+                    return (i + run_end + 1) // 2 * frame
+            else:
+                run, run_end = 0, None
+        if len(self.buffer) < int(MAX_SEGMENT_SECONDS * SAMPLE_RATE):
+            return None # 아직 최대 길이가 안 됐으면 오디오를 더 기다림
+        return (min_frame + int(np.argmin(levels[min_frame:]))) * frame
+
+    def _emit(self, end):
+        audio = self.buffer[:end]
+        start = self.offset / SAMPLE_RATE
+        self.buffer = self.buffer[end:]
+        self.offset += end
+        levels = frame_db(audio)
+        if len(levels) == 0 or self._silence_mask(levels).all() or levels.max() < SILENCE_FLOOR_DB:
+            return None # 무음뿐인 구간은 transcribe하지 않음
+        return start, audio
+
+    def feed(self, block):
+        self.buffer = np.concatenate([self.buffer, block])
+        segments = []
+        while len(self.buffer) >= int(MIN_SEGMENT_SECONDS * SAMPLE_RATE):
+            end = self._cut_point()
+            if end is None:
+                break
+            segment = self._emit(end)
+            if segment:
+                segments.append(segment)
+        return segments
+
+    def flush(self):
+        segments = []
+        while len(self.buffer) > int(MAX_SEGMENT_SECONDS * SAMPLE_RATE):
+            segment = self._emit(self._cut_point())
+            if segment:
+                segments.append(segment)
+        if len(self.buffer):
+            segment = self._emit(len(self.buffer))
+            if segment:
+                segments.append(segment)
+        return segments
+
+
+async def transcribe_stream(path, pool=whisper_pool, parallel=TRANSCRIBE_PARALLEL, **transcribe_kwargs):
+    """구간별 받아쓰기 결과 {"index", "start", "end", "text"}를 오디오 순서대로 yield.
+
+    디코딩/구간 나누기와 transcribe가 동시에 진행되고, 대기 중인 구간은 parallel*2개로 제한 (메모리 상한).
+    """
+    semaphore = asyncio.Semaphore(parallel)
+    pending = deque()
+    segmenter = SpeechSegmenter()
+    index = 0
+
+    async def run(i, start, audio):
+        async with semaphore:
+            result = await pool.atranscribe(audio, **transcribe_kwargs)
+        return {"index": i, "start": round(start, 2), "end": round(start + len(audio) / SAMPLE_RATE, 2),
+                "text": result["text"].strip()}
+
+    def submit(segments):
+        nonlocal index
+        for start, audio in segments:
+            pending.append(asyncio.create_task(run(index, start, audio)))
+            index += 1
+
+    try:
+        async for block in decode_audio_blocks(path):
+            submit(segmenter.feed(block))
+            while pending and (pending[0].done() or len(pending) >= parallel * 2):
+                yield await pending.popleft()
+        submit(segmenter.flush())
+        while pending:
+            yield await pending.popleft()
+    finally:
+        for task in pending:
+            task.cancel()
+
+
+def stitch(segments):
+    return " ".join(segment["text"] for segment in segments if segment["text"])
+
+
+async def transcribe_file(path, **transcribe_kwargs):
+    return stitch([segment async for segment in transcribe_stream(path, **transcribe_kwargs)])
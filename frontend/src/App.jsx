@@ -1,22 +1,86 @@
 import { useState } from 'react'
 import './App.css'
 
+// SSE 응답(event: ...\ndata: ...\n\n)을 읽으면서 이벤트마다 onEvent 호출
+async function readEventStream(res, onEvent) {
+  const reader = res.body.getReader()
+  const decoder = new TextDecoder()
+  let buffer = ''
+
+  while (true) {
+    const { done, value } = await reader.read()
+    if (done) break
+    buffer += decoder.decode(value, { stream: true })
+
+    let boundary
+    while ((boundary = buffer.indexOf('\n\n')) !== -1) {
+      const rawEvent = buffer.slice(0, boundary)
+      buffer = buffer.slice(boundary + 2)
+
+      let event = 'message'
+      let data = ''
+      for (const line of rawEvent.split('\n')) {
+        if (line.startsWith('event:')) event = line.slice(6).trim()
+        else if (line.startsWith('data:')) data += line.slice(5).trim()
+      }
+      if (data) onEvent(event, JSON.parse(data))
+    }
+  }
+}
+
+// 같은 탭에서는 같은 대화로 이어지도록 세션 id를 한 번만 만듦 (서버가 이전 대화를 기억)
+function getSessionId() {
+  let sessionId = sessionStorage.getItem('medot_session_id')
+  if (!sessionId) {
+    sessionId = crypto.randomUUID()
+    sessionStorage.setItem('medot_session_id', sessionId)
+  }
+  return sessionId
+}
+
 function App() {
   const [input, setInput] = useState('')
   const [response, setResponse] = useState('')
+  const [sources, setSources] = useState([])
+  const [status, setStatus] = useState('')
   const [audioFile, setAudioFile] = useState(null)
 
   const handleTextSubmit = async () => {
-    const res = await fetch('http://localhost:8000/chat', {
+    setResponse('')
+    setSources([])
+    setStatus('질문을 확인하는 중...')
+
+    const res = await fetch('http://localhost:8000/chat/stream', {
       method: 'POST',
       headers: {
         'Content-Type': 'application/json',
       },
-      body: JSON.stringify({ message: input }),
+      body: JSON.stringify({ message: input, session_id: getSessionId() }),
     })
 
-    const data = await res.json()
-    setResponse(data.answer)
+    if (!res.ok) {
+      setStatus('')
+      setResponse(res.status === 429 ? '요청이 많습니다. 잠시 후 다시 시도해주세요.' : '오류가 발생했습니다.')
+      return
+    }
+
+    await readEventStream(res, (event, data) => {
+      if (event === 'filter') {
+        setStatus(data.is_medical ? '관련 정보를 찾는 중...' : '')
+      } else if (event === 'sources') {
+        setSources(data)
+        setStatus('답변을 작성하는 중...')
+      } else if (event === 'token') {
+        setStatus('')
+        setResponse((prev) => prev + data.text)
+      } else if (event === 'done') {
+        setStatus('')
+        setResponse(data.answer)
+      } else if (event === 'error') {
+        setStatus('')
+        setResponse(data.message)
+      }
+    })
   }
 
   const handleFileUpload = async () => {
@@ -25,13 +89,35 @@ function App() {
     const formData = new FormData()
     formData.append('file', audioFile)
 
-    const res = await fetch('http://localhost:8000/summarize-audio', {
+    setResponse('')
+    setSources([])
+    setStatus('녹음을 받아쓰는 중...')
+
+    const res = await fetch('http://localhost:8000/summarize-audio/stream', {
       method: 'POST',
       body: formData,
     })
 
-    const data = await res.json()
-    setResponse(data.summary)
+    if (!res.ok) {
+      setStatus('')
+      setResponse(res.status === 429 ? '요청이 많습니다. 잠시 후 다시 시도해주세요.' : '오류가 발생했습니다.')
+      return
+    }
+
+    // 구간별 받아쓰기 결과를 먼저 보여주고, 요약이 끝나면 요약으로 교체
+    await readEventStream(res, (event, data) => {
+      if (event === 'segment') {
+        setResponse((prev) => (prev ? prev + ' ' : '') + data.text)
+      } else if (event === 'transcript') {
+        setStatus('요약하는 중...')
+      } else if (event === 'summary') {
+        setStatus('')
+        setResponse(data.summary)
+      } else if (event === 'error') {
+        setStatus('')
+        setResponse(data.message)
+      }
+    })
   }
 
   return (
@@ -59,7 +145,22 @@ function App() {
 
       <div style={{ marginTop: '2rem' }}>
         <strong>🧠 응답 결과:</strong>
-        <p>{response}</p>
+        {status && <p style={{ color: 'gray' }}>{status}</p>}
+        <p style={{ whiteSpace: 'pre-wrap' }}>{response}</p>
+        {sources.length > 0 && (
+          <div>
+            <strong>📚 참고 자료:</strong>
+            <ul>
+              {sources.map((source) => (
+                <li key={source.source_url}>
+                  <a href={source.source_url} target="_blank" rel="noreferrer">
+                    {source.title}
+                  </a>
+                </li>
+              ))}
+            </ul>
+          </div>
+        )}
       </div>
     </div>
   )